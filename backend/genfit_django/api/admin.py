@@ -3,6 +3,8 @@ from .models import UserWithType, Notification, FitnessGoal, Profile, Forum, Thr
 from .models import UserWithType, Notification, FitnessGoal, Profile, Forum, Thread, Comment, Subcomment, Vote, AiTutorChat, AiTutorResponse, UserAiMessage
 from django.contrib import admin
 from .models import Report
+from .counters import adjust_counter, like_count_delta
+from .search import search_query
 from time import timezone
 
 
@@ -48,20 +50,41 @@ class ForumAdmin(admin.ModelAdmin):
     search_fields = ('title', 'description')
     ordering = ('order', 'title')
     readonly_fields = ('created_at', 'updated_at')
+    list_select_related = ('created_by',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_thread_stats()
+
+    @admin.display(ordering='num_threads')
+    def thread_count(self, obj):
+        return obj.thread_count
+
+class FullTextSearchAdminMixin:
+    """
+    Admin search through the model's indexed search_vector instead of ILIKE over the text columns.
+    Usernames in search_username_field are still matched exactly.
+    """
+    search_fields = ('search_vector',)  # Shows the search box; the lookup itself is done below
+    search_username_field = 'author__username'
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        matches = queryset.filter(search_vector=search_query(search_term))
+        return matches | queryset.filter(**{self.search_username_field: search_term}), False
 
 @admin.register(Thread)
-class ThreadAdmin(admin.ModelAdmin):
+class ThreadAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ('title', 'forum', 'author', 'created_at', 'is_pinned', 'is_locked', 'view_count', 'like_count')
     list_filter = ('is_pinned', 'is_locked', 'created_at', 'forum')
-    search_fields = ('title', 'content', 'author__username')
     readonly_fields = ('created_at', 'updated_at', 'view_count', 'like_count')
     raw_id_fields = ('author', 'forum')
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'author', 'thread', 'short_content', 'like_count', 'subcomment_count', 'created_at')
-    search_fields = ('author__username', 'content')
     list_filter = ('created_at',)
     readonly_fields = ('created_at', 'updated_at')
 
@@ -70,9 +93,8 @@ class CommentAdmin(admin.ModelAdmin):
     short_content.short_description = 'Content'
 
 @admin.register(Subcomment)
-class SubcommentAdmin(admin.ModelAdmin):
+class SubcommentAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
     list_display = ('id', 'author', 'comment', 'short_content', 'like_count', 'created_at')
-    search_fields = ('author__username', 'content')
     list_filter = ('created_at',)
     readonly_fields = ('created_at', 'updated_at')
 
@@ -92,40 +114,35 @@ class VoteAdmin(admin.ModelAdmin):
         return super().get_queryset(request).select_related('user', 'content_type')
     
     def save_model(self, request, obj, form, change):
-        if not change:  # Creating new vote
+        if not change:  # Creating new vote (Vote.save counts the upvote)
             obj.save()
-            obj.update_content_like_count(increment=True)
         else:  # Modifying existing vote
             old_vote = Vote.objects.get(pk=obj.pk)
             old_vote_type = old_vote.vote_type
             obj.save()
             if old_vote_type != obj.vote_type:
-                obj.update_content_like_count(increment=True, old_vote_type=old_vote_type)
+                adjust_counter(obj.content_type.model_class(), obj.object_id, 'like_count',
+                               like_count_delta(old_vote_type, obj.vote_type))
     
     def delete_model(self, request, obj):
-        obj.update_content_like_count(increment=False)
+        # Vote.delete decrements the like count
         obj.delete()
     
     def delete_queryset(self, request, queryset):
-        for obj in queryset:
+        for obj in queryset.filter(vote_type='UPVOTE'):
             obj.update_content_like_count(increment=False)
         queryset.delete()
 
 
 # Admin for Challenge model
 @admin.register(Challenge)
-class ChallengeAdmin(admin.ModelAdmin):
-    list_display = ('title', 'coach', 'difficulty_level', 'start_date', 'end_date', 'target_value', 'unit', 'is_active')
-    list_filter = ('difficulty_level', 'challenge_type', 'coach', 'start_date', 'end_date', 'created_at')
-    search_fields = ('title', 'description', 'coach__username')
+class ChallengeAdmin(FullTextSearchAdminMixin, admin.ModelAdmin):
+    list_display = ('title', 'coach', 'difficulty_level', 'start_date', 'end_date', 'target_value', 'unit', 'status')
+    list_filter = ('status', 'difficulty_level', 'challenge_type', 'coach', 'start_date', 'end_date', 'created_at')
+    search_username_field = 'coach__username'
     ordering = ('-start_date',)
     readonly_fields = ('created_at',)
 
-    def is_active(self, obj):
-        return obj.is_active()
-    is_active.boolean = True
-    is_active.short_description = 'Active'
-
 
 # Admin for ChallengeParticipant model
 @admin.register(ChallengeParticipant)
@@ -0,0 +1,168 @@
+"""
+Username and email availability for registration.
+
+With a Redis cache, the existing usernames and emails are kept in Bloom filters stored there as bitmaps,
+so every process sees the same filters and sets the bits of the users it saves. A value the filter has
+never seen is free without a query; possible hits are confirmed with a probe of the unique index.
+
+The filters are built by `python manage.py build_availability_filter` (after deploying, then e.g. daily
+so deleted users stop showing up as possible hits), never in a request. Until they are built, and
+without Redis, every check is answered by the index probe. Registration enforces uniqueness either way.
+"""
+import hashlib
+import math
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .shared_cache import redis_client, redis_key
+
+User = get_user_model()
+
+FIELDS = ('username', 'email')
+FALSE_POSITIVE_RATE = 0.01
+
+# Bit 0 of a stored filter is set once the filter is built, so a missing or evicted filter isn't trusted
+READY_BIT = 0
+# Users saved while a build reads the table are also written here and merged into the new filter
+NEXT_SUFFIX = ':next'
+NEXT_KEY_SECONDS = 24 * 3600
+
+
+def _dimensions(capacity, false_positive_rate=FALSE_POSITIVE_RATE):
+    capacity = max(capacity, 1)
+    size = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+    return size, max(1, round(size / capacity * math.log(2)))
+
+
+def _positions(value, size, hash_count):
+    """k bit positions derived from one blake2b digest, after READY_BIT."""
+    digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:], 'little') | 1
+    return [1 + (h1 + i * h2) % size for i in range(hash_count)]
+
+
+class BloomFilter:
+    """A fixed-size Bloom filter over strings, its bits in Redis bitmap order so they can be stored as is."""
+
+    def __init__(self, capacity, false_positive_rate=FALSE_POSITIVE_RATE):
+        self.size, self.hash_count = _dimensions(capacity, false_positive_rate)
+        self.bits = bytearray((self.size + 8) // 8)
+
+    def _set(self, position):
+        self.bits[position >> 3] |= 0x80 >> (position & 7)
+
+    def add(self, value):
+        for position in _positions(value, self.size, self.hash_count):
+            self._set(position)
+
+    def __contains__(self, value):
+        return all(
+            self.bits[position >> 3] & (0x80 >> (position & 7))
+            for position in _positions(value, self.size, self.hash_count)
+        )
+
+
+def normalize_username(value):
+    return User.normalize_username(value)
+
+
+def normalize_email(value):
+    """The form create_user stores an email in, so the probe matches the unique index."""
+    return User.objects.normalize_email(value)
+
+
+def _filter_key(field, suffix=''):
+    return redis_key(f'availability:{field}{suffix}')
+
+
+def _stored_dimensions():
+    # Fixed by the setting rather than the user count, so bits written by any process land in the same places
+    return _dimensions(settings.USERNAME_AVAILABILITY_CAPACITY)
+
+
+def build_filters(batch_size=5000):
+    """Rebuild the filters in Redis from the users table. Returns the number of users read, or None without Redis."""
+    client = redis_client()
+    if client is None:
+        return None
+    for field in FIELDS:
+        client.delete(_filter_key(field, NEXT_SUFFIX))
+
+    filters = {field: BloomFilter(settings.USERNAME_AVAILABILITY_CAPACITY) for field in FIELDS}
+    count = 0
+    rows = User.objects.order_by().values_list('username', 'email')
+    for username, email in rows.iterator(chunk_size=batch_size):
+        filters['username'].add(username)
+        if email:
+            filters['email'].add(email)
+        count += 1
+
+    for field, bloom in filters.items():
+        bloom._set(READY_BIT)
+        building = _filter_key(field, ':building')
+        client.set(building, bytes(bloom.bits))
+        # One MULTI, so no user saved meanwhile can miss both the old and the new filter
+        pipe = client.pipeline()
+        pipe.bitop('OR', building, building, _filter_key(field, NEXT_SUFFIX))
+        pipe.rename(building, _filter_key(field))
+        pipe.delete(_filter_key(field, NEXT_SUFFIX))
+        pipe.execute()
+    return count
+
+
+def remember_user(username, email):
+    """Set a saved user's username and email in the stored filters (and in a build in progress)."""
+    client = redis_client()
+    if client is None:
+        return
+    size, hash_count = _stored_dimensions()
+    pipe = client.pipeline(transaction=False)
+    for field, value in (('username', username), ('email', email)):
+        if not value:
+            continue
+        for suffix in ('', NEXT_SUFFIX):
+            for position in _positions(value, size, hash_count):
+                pipe.setbit(_filter_key(field, suffix), position, 1)
+        pipe.expire(_filter_key(field, NEXT_SUFFIX), NEXT_KEY_SECONDS)
+    pipe.execute()
+
+
+def reset_filters():
+    """Drop the stored filters, so checks probe the database until they are built again."""
+    client = redis_client()
+    if client is None:
+        return
+    client.delete(*(_filter_key(field, suffix) for field in FIELDS for suffix in ('', NEXT_SUFFIX)))
+
+
+def _maybe_taken(field, value):
+    """False if the filter has never seen the value, True if it may be taken, None when there's no filter."""
+    client = redis_client()
+    if client is None:
+        return None
+    size, hash_count = _stored_dimensions()
+    key = _filter_key(field)
+    pipe = client.pipeline(transaction=False)
+    pipe.getbit(key, READY_BIT)
+    for position in _positions(value, size, hash_count):
+        pipe.getbit(key, position)
+    ready, *bits = pipe.execute()
+    if not ready:
+        return None
+    return all(bits)
+
+
+def is_username_available(username):
+    username = normalize_username(username)
+    if _maybe_taken('username', username) is False:
+        return True
+    return not User.objects.filter(username=username).exists()
+
+
+def is_email_available(email):
+    email = normalize_email(email)
+    if _maybe_taken('email', email) is False:
+        return True
+    return not User.objects.filter(email=email).exists()
@@ -0,0 +1,51 @@
+from collections import defaultdict
+
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+
+def adjust_counters(model, pk, **deltas):
+    """
+    Atomically add the given deltas to counter columns of one row in a single UPDATE.
+    Counters never go below zero. Returns the number of rows updated.
+
+    Example: adjust_counters(Thread, thread_id, comment_count=1)
+    """
+    updates = {}
+    for field, delta in deltas.items():
+        if not delta:
+            continue
+        if delta > 0:
+            updates[field] = F(field) + delta
+        else:
+            updates[field] = Greatest(F(field) + delta, 0)
+    if not updates:
+        return 0
+    return model.objects.filter(pk=pk).update(**updates)
+
+
+def adjust_counter(model, pk, field, delta):
+    """Atomically add delta to one counter column, e.g. adjust_counter(Comment, comment_id, 'like_count', -1)."""
+    return adjust_counters(model, pk, **{field: delta})
+
+
+def adjust_counter_for_many(model, field, deltas):
+    """
+    Apply per-row deltas ({pk: delta}) to one counter column with one UPDATE per distinct delta,
+    e.g. after deleting comments spread over several threads.
+    """
+    pks_by_delta = defaultdict(list)
+    for pk, delta in deltas.items():
+        if delta:
+            pks_by_delta[delta].append(pk)
+    for delta, pks in pks_by_delta.items():
+        if delta > 0:
+            value = F(field) + delta
+        else:
+            value = Greatest(F(field) + delta, 0)
+        model.objects.filter(pk__in=pks).update(**{field: value})
+
+
+def like_count_delta(old_vote_type, new_vote_type):
+    """How much like_count moves when a vote changes from old_vote_type to new_vote_type (None = no vote)."""
+    return int(new_vote_type == 'UPVOTE') - int(old_vote_type == 'UPVOTE')
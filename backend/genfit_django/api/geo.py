@@ -0,0 +1,61 @@
+"""
+Distance filtering and ordering on latitude/longitude columns, done in SQL.
+
+A bounding box around the point narrows the rows through the (latitude, longitude) index,
+then the great-circle (haversine) distance is computed in the query for the rows left,
+so callers can filter, order and paginate by distance without loading candidates into Python.
+"""
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LATITUDE = 111.32
+
+
+def bounding_box(lat, lon, radius_km):
+    """
+    Q for the rows whose coordinates fall in the box that contains every point within radius_km of (lat, lon).
+    Longitude degrees shrink with cos(latitude); boxes crossing the antimeridian are split in two,
+    and boxes reaching a pole span every longitude.
+    """
+    dlat = radius_km / KM_PER_DEGREE_LATITUDE
+    condition = Q(latitude__range=(max(lat - dlat, -90.0), min(lat + dlat, 90.0)))
+
+    # The widest longitude span is at the edge of the box nearest a pole
+    widest_lat = min(abs(lat) + dlat, 90.0)
+    cos_lat = math.cos(math.radians(widest_lat))
+    if cos_lat < 1e-6:
+        return condition
+    dlon = radius_km / (KM_PER_DEGREE_LATITUDE * cos_lat)
+    if dlon >= 180:
+        return condition
+
+    west, east = lon - dlon, lon + dlon
+    if west < -180:
+        return condition & (Q(longitude__gte=west + 360) | Q(longitude__lte=east))
+    if east > 180:
+        return condition & (Q(longitude__gte=west) | Q(longitude__lte=east - 360))
+    return condition & Q(longitude__range=(west, east))
+
+
+def distance_km(lat, lon):
+    """Expression for the haversine distance in km from (lat, lon) to each row's latitude/longitude."""
+    lat_rad = math.radians(lat)
+    half_dlat = (Radians(F('latitude')) - Value(lat_rad)) / 2.0
+    half_dlon = (Radians(F('longitude')) - Value(math.radians(lon))) / 2.0
+    a = Power(Sin(half_dlat), 2) + Value(math.cos(lat_rad)) * Cos(Radians(F('latitude'))) * Power(Sin(half_dlon), 2)
+    # Least() keeps rounding from pushing asin's argument past 1 for antipodal points
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Sqrt(a), Value(1.0)), output_field=FloatField())
+
+
+def within_radius(queryset, lat, lon, radius_km):
+    """Rows within radius_km of (lat, lon), annotated with `distance_km`."""
+    return (
+        queryset
+        .filter(latitude__isnull=False, longitude__isnull=False)
+        .filter(bounding_box(lat, lon, radius_km))
+        .annotate(distance_km=distance_km(lat, lon))
+        .filter(distance_km__lte=radius_km)
+    )
@@ -0,0 +1,244 @@
+"""
+Place name -> (latitude, longitude) lookups for challenges.
+
+A query is answered from, in order:
+1. an in-process LRU of recent answers,
+2. the offline gazetteer, if GEOCODING_GAZETTEER_PATH points to a GeoNames cities file
+   (e.g. cities15000.txt from https://download.geonames.org/export/dump/),
+3. the GeocodeCacheEntry table, shared by all processes,
+4. Nominatim, with a GEOCODING_TIMEOUT_SECONDS timeout. Its answer is stored in the table,
+   including "not found", which is retried after GEOCODING_NEGATIVE_TTL_SECONDS.
+
+Queries are normalized first, so "  Kadıköy " and "kadıköy" share an entry. Queries longer than the
+table's column are only remembered in memory.
+
+Only a query none of the first three know waits on the network, at most GEOCODING_TIMEOUT_SECONDS.
+Callers that must not wait at all pass wait=False: such a query answers "not found" at once and is
+resolved on a background worker, so the next lookup finds it.
+"""
+import logging
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from .models import GeocodeCacheEntry
+
+logger = logging.getLogger(__name__)
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_HEADERS = {
+    "User-Agent": "ChallengeApp/1.0 (a.akdogan101@gmail.com)"
+}
+NOT_FOUND = (None, None)
+
+# Nominatim errors are remembered in memory only, briefly, so an outage doesn't make every search wait
+ERROR_BACKOFF_SECONDS = 60
+
+
+class _LRUCache:
+    """A small thread-safe LRU whose entries may expire."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_memory = _LRUCache(getattr(settings, 'GEOCODING_LRU_SIZE', 1024))
+_gazetteer = None
+_gazetteer_lock = threading.Lock()
+
+# Nominatim asks for at most one request per second, so background lookups run one at a time
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='geocoding')
+_resolving = set()
+_resolving_lock = threading.Lock()
+
+MAX_STORED_QUERY_LENGTH = GeocodeCacheEntry._meta.get_field('query').max_length
+
+
+def normalize_query(query):
+    return ' '.join(unicodedata.normalize('NFKC', query).casefold().split()).strip(' ,')
+
+
+def _load_gazetteer(path):
+    """Index a GeoNames cities file by name and ASCII name, keeping the most populous place per name."""
+    places = {}
+    with open(path, encoding='utf-8') as rows:
+        for row in rows:
+            columns = row.rstrip('\n').split('\t')
+            if len(columns) < 15:
+                continue
+            try:
+                coordinates = (float(columns[4]), float(columns[5]))
+                population = int(columns[14] or 0)
+            except ValueError:
+                continue
+            for name in (columns[1], columns[2]):
+                key = normalize_query(name)
+                if key and (key not in places or places[key][1] < population):
+                    places[key] = (coordinates, population)
+    return {key: coordinates for key, (coordinates, _) in places.items()}
+
+
+def _gazetteer_lookup(key):
+    global _gazetteer
+    path = getattr(settings, 'GEOCODING_GAZETTEER_PATH', None)
+    if not path:
+        return None
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                try:
+                    _gazetteer = _load_gazetteer(path)
+                except OSError:
+                    logger.warning("Could not read gazetteer %s", path, exc_info=True)
+                    _gazetteer = {}
+    return _gazetteer.get(key)
+
+
+def _stored_lookup(key):
+    entry = GeocodeCacheEntry.objects.filter(query=key).first()
+    if entry is None:
+        return None
+    if entry.latitude is None or entry.longitude is None:
+        negative_ttl = timedelta(seconds=getattr(settings, 'GEOCODING_NEGATIVE_TTL_SECONDS', 86400))
+        if entry.updated_at < timezone.now() - negative_ttl:
+            return None
+        return NOT_FOUND
+    return entry.latitude, entry.longitude
+
+
+def _nominatim_lookup(query):
+    """(lat, lon), NOT_FOUND when Nominatim has no match, or None when it could not be asked."""
+    params = {
+        "q": query,
+        "format": "json",
+        "limit": 1,
+    }
+    try:
+        response = requests.get(
+            NOMINATIM_URL, params=params, headers=NOMINATIM_HEADERS,
+            timeout=getattr(settings, 'GEOCODING_TIMEOUT_SECONDS', 3),
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not data:
+            return NOT_FOUND
+        return float(data[0]["lat"]), float(data[0]["lon"])
+    except (requests.RequestException, ValueError, KeyError, IndexError, TypeError):
+        logger.warning("Geocoding %r failed", query, exc_info=True)
+        return None
+
+
+def _negative_ttl():
+    return getattr(settings, 'GEOCODING_NEGATIVE_TTL_SECONDS', 86400)
+
+
+def _known_lookup(key):
+    """The answer from memory, the gazetteer or the table, or None if Nominatim has to be asked."""
+    coordinates = _memory.get(key)
+    if coordinates is not None:
+        return coordinates
+
+    coordinates = _gazetteer_lookup(key)
+    if coordinates is not None:
+        _memory.set(key, coordinates)
+        return coordinates
+
+    if len(key) > MAX_STORED_QUERY_LENGTH:
+        return None
+    coordinates = _stored_lookup(key)
+    if coordinates is not None:
+        _memory.set(key, coordinates, _negative_ttl() if coordinates == NOT_FOUND else None)
+    return coordinates
+
+
+def _resolve(query, key):
+    coordinates = _nominatim_lookup(query)
+    if coordinates is None:
+        _memory.set(key, NOT_FOUND, ERROR_BACKOFF_SECONDS)
+        return NOT_FOUND
+
+    latitude, longitude = coordinates
+    if len(key) <= MAX_STORED_QUERY_LENGTH:
+        GeocodeCacheEntry.objects.update_or_create(query=key, defaults={'latitude': latitude, 'longitude': longitude})
+    _memory.set(key, coordinates, _negative_ttl() if coordinates == NOT_FOUND else None)
+    return coordinates
+
+
+def _resolve_in_worker(query, key):
+    try:
+        _resolve(query, key)
+    except Exception:
+        logger.exception("Resolving %r in the background failed", query)
+    finally:
+        with _resolving_lock:
+            _resolving.discard(key)
+        # The worker thread owns its own connection; don't leave it open between jobs
+        connections.close_all()
+
+
+def _resolve_later(query, key):
+    with _resolving_lock:
+        if key in _resolving:
+            return
+        _resolving.add(key)
+    _executor.submit(_resolve_in_worker, query, key)
+
+
+def geocode_location(query, wait=True):
+    """
+    Coordinates for a place name as (lat, lon), or (None, None) when it can't be resolved.
+    With wait=False, a query only Nominatim can answer returns (None, None) and is resolved in the background.
+    """
+    key = normalize_query(query or '')
+    if not key:
+        return NOT_FOUND
+
+    coordinates = _known_lookup(key)
+    if coordinates is not None:
+        return coordinates
+    if not wait:
+        _resolve_later(query.strip(), key)
+        return NOT_FOUND
+    return _resolve(query.strip(), key)
+
+
+def clear_memory_cache():
+    """Forget the in-process answers and gazetteer, e.g. after changing settings in tests."""
+    global _gazetteer
+    _memory.clear()
+    with _gazetteer_lock:
+        _gazetteer = None
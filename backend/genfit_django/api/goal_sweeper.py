@@ -0,0 +1,102 @@
+"""
+Periodic sweep over every user's open (ACTIVE or RESTARTED) goals, run by `python manage.py sweep_goals`.
+
+- Overdue: the target date passed. The owner, and the mentor who set the goal, are told once per
+  target date; `deadline_notified_at` records it, so a goal given a later target date is reported again.
+- Inactive: not updated for GOAL_INACTIVITY_DAYS. The goal becomes INACTIVE and the owner is told.
+
+Each state is one locked SELECT on the (status, target_date) or (status, last_updated) index, one
+UPDATE and one bulk INSERT of notifications in a single transaction. Rows another sweep holds are
+skipped, so running sweeps side by side never notifies twice.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import FitnessGoal, Notification
+from .utils import dispatch_notifications
+
+OPEN_STATUSES = ('ACTIVE', 'RESTARTED')
+GOAL_INACTIVITY_DAYS = 7
+
+
+def _claim(queryset, **changes):
+    """Lock the goals in `queryset` not locked by another sweep and apply `changes` to them."""
+    goals = list(queryset.select_for_update(skip_locked=True).only('id', 'title', 'user_id', 'mentor_id'))
+    if goals:
+        FitnessGoal.objects.filter(id__in=[goal.id for goal in goals]).update(**changes)
+    return goals
+
+
+def _overdue_notifications(goals):
+    notifications = []
+    for goal in goals:
+        notifications.append(Notification(
+            recipient_id=goal.user_id,
+            notification_type='GOAL_INACTIVE',
+            title="Goal Target Date Reached",
+            message=f"Your goal '{goal.title}' has reached its target date but is not completed yet.",
+            related_object_id=goal.id,
+            related_object_type='FitnessGoal'
+        ))
+        if goal.mentor_id:
+            notifications.append(Notification(
+                recipient_id=goal.mentor_id,
+                sender_id=goal.user_id,
+                notification_type='GOAL_INACTIVE',
+                title="Mentee Goal Target Date Reached",
+                message=f"Your mentee's goal '{goal.title}' has reached its target date but is not completed yet.",
+                related_object_id=goal.id,
+                related_object_type='FitnessGoal'
+            ))
+    return notifications
+
+
+def _inactive_notifications(goals):
+    return [
+        Notification(
+            recipient_id=goal.user_id,
+            notification_type='GOAL_INACTIVE',
+            title='Inactive Goal Alert',
+            message=f'Your goal "{goal.title}" has been inactive for {GOAL_INACTIVITY_DAYS} days. Keep pushing!',
+            related_object_id=goal.id,
+            related_object_type='FitnessGoal'
+        )
+        for goal in goals
+    ]
+
+
+def sweep_overdue_goals(now=None, user=None):
+    """Notify about open goals past their target date not reported yet. Returns the number of goals."""
+    now = now or timezone.now()
+    goals = FitnessGoal.objects.filter(status__in=OPEN_STATUSES, target_date__lte=now).filter(
+        Q(deadline_notified_at__isnull=True) | Q(deadline_notified_at__lt=F('target_date'))
+    )
+    if user is not None:
+        goals = goals.filter(user=user)
+    with transaction.atomic():
+        overdue = _claim(goals, deadline_notified_at=now)
+        dispatch_notifications(_overdue_notifications(overdue))
+    return len(overdue)
+
+
+def sweep_inactive_goals(now=None, user=None):
+    """Mark open goals not updated for GOAL_INACTIVITY_DAYS as INACTIVE and notify. Returns the number of goals."""
+    now = now or timezone.now()
+    goals = FitnessGoal.objects.filter(
+        status__in=OPEN_STATUSES, last_updated__lt=now - timedelta(days=GOAL_INACTIVITY_DAYS)
+    )
+    if user is not None:
+        goals = goals.filter(user=user)
+    with transaction.atomic():
+        inactive = _claim(goals, status='INACTIVE', last_updated=now)
+        dispatch_notifications(_inactive_notifications(inactive))
+    return len(inactive)
+
+
+def sweep_goals(now=None):
+    """Both sweeps for every user; overdue first, so a goal that is both gets its deadline notice."""
+    now = now or timezone.now()
+    return {'overdue': sweep_overdue_goals(now), 'inactive': sweep_inactive_goals(now)}
@@ -0,0 +1,251 @@
+"""
+Challenge leaderboards.
+
+With a Redis cache, each challenge's board is a sorted set of participants whose members sort in ranking
+order, plus hashes of user -> member and user -> serialized participant. A user's rank is a ZRANK, a page
+is a ZRANGE, and a participant who joins, progresses or leaves is moved with one ZREM/ZADD: O(log n),
+whatever the board size. Each read and update is a Lua script, so it sees and leaves the board whole.
+Boards are built from one window-function query the first time they are read (or after expiring);
+a build that overlaps a change is served but not cached.
+
+Without Redis there is no cache every process sees, so boards are read from the database each time.
+
+Ranking: finishers first by finish time, then higher progress, earlier join, username.
+"""
+import json
+import struct
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import ChallengeParticipant
+from .serializers import ChallengeParticipantSerializer
+from .shared_cache import redis_client, redis_key
+
+RANKING = (
+    F('finish_date').asc(nulls_last=True),
+    F('current_value').desc(),
+    F('joined_at').asc(),
+    F('user__username').asc(),
+    F('user_id').asc(),
+)
+
+# KEYS: board, members, entries, changes. ARGV: user id, member ('' to remove), entry, ttl
+_UPDATE = """
+redis.call('INCR', KEYS[4])
+redis.call('EXPIRE', KEYS[4], ARGV[4])
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+local old = redis.call('HGET', KEYS[2], ARGV[1])
+if old then
+    redis.call('ZREM', KEYS[1], old)
+end
+if ARGV[2] == '' then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+    redis.call('HDEL', KEYS[3], ARGV[1])
+else
+    redis.call('ZADD', KEYS[1], 0, ARGV[2])
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[3])
+end
+for i = 1, 3 do
+    redis.call('EXPIRE', KEYS[i], ARGV[4])
+end
+return 1
+"""
+
+# KEYS: board, entries. ARGV: first index, last index (-1 for the end). Entries, or nil for a cold board
+_PAGE = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local entries = {}
+for i, member in ipairs(redis.call('ZRANGE', KEYS[1], ARGV[1], ARGV[2])) do
+    entries[i] = redis.call('HGET', KEYS[2], tostring(tonumber(string.match(member, '%z(%d+)$'))))
+end
+return entries
+"""
+
+# KEYS: board, members, entries. ARGV: user id, neighbours.
+# {index, count, first index, entries...}, {} if the user hasn't joined, or nil for a cold board
+_AROUND = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local member = redis.call('HGET', KEYS[2], ARGV[1])
+if not member then
+    return {}
+end
+local index = redis.call('ZRANK', KEYS[1], member)
+local first = math.max(index - tonumber(ARGV[2]), 0)
+local result = {index, redis.call('ZCARD', KEYS[1]), first}
+for _, neighbour in ipairs(redis.call('ZRANGE', KEYS[1], first, index + tonumber(ARGV[2]))) do
+    table.insert(result, redis.call('HGET', KEYS[3], tostring(tonumber(string.match(neighbour, '%z(%d+)$')))))
+end
+return result
+"""
+
+
+def _keys(challenge_id):
+    prefix = f'challenge_leaderboard:{challenge_id}'
+    return [redis_key(prefix), redis_key(f'{prefix}:members'), redis_key(f'{prefix}:entries'),
+            redis_key(f'{prefix}:changes')]
+
+
+def _sortable(number, descending=False):
+    """A float as 16 hex digits that sort like the number."""
+    bits = struct.unpack('>Q', struct.pack('>d', number))[0]
+    bits = bits ^ 0xFFFFFFFFFFFFFFFF if bits >> 63 else bits | 1 << 63
+    if descending:
+        bits ^= 0xFFFFFFFFFFFFFFFF
+    return f'{bits:016x}'
+
+
+def _member(participant):
+    """RANKING as a string that sorts byte-wise; the user id last makes every member unique."""
+    finish = participant.finish_date
+    return ''.join([
+        '1' if finish is None else '0',
+        _sortable(finish.timestamp() if finish else 0.0),
+        _sortable(participant.current_value, descending=True),
+        _sortable(participant.joined_at.timestamp()),
+        participant.user.username,
+        f'\0{participant.user_id:020d}',
+    ])
+
+
+def _entry(participant):
+    return dict(ChallengeParticipantSerializer(participant).data)
+
+
+def _ranked(entries, first_index):
+    return [dict(entry, rank=first_index + offset + 1) for offset, entry in enumerate(entries)]
+
+
+def ranked_participants(challenge_id, ordering=RANKING):
+    """Participants in `ordering` annotated with their 1-based `rank`, users loaded in the same query."""
+    return (
+        ChallengeParticipant.objects
+        .filter(challenge_id=challenge_id)
+        .select_related('user')
+        .annotate(rank=Window(RowNumber(), order_by=list(ordering)))
+        .order_by('rank')
+    )
+
+
+def _build(client, challenge_id):
+    """The board's entries in ranking order, cached unless a participant changed while they were read."""
+    from redis.exceptions import WatchError
+
+    board, members, entries, changes_key = _keys(challenge_id)
+    changes = client.get(changes_key)
+    # Sorted again in Python: the database may collate usernames differently from Redis' byte order
+    rows = sorted((_member(participant), participant.user_id, _entry(participant))
+                  for participant in ranked_participants(challenge_id))
+    if rows:
+        with client.pipeline() as pipe:
+            try:
+                pipe.watch(changes_key)
+                if pipe.get(changes_key) == changes:
+                    pipe.multi()
+                    pipe.delete(board, members, entries)
+                    pipe.zadd(board, {member: 0 for member, _, _ in rows})
+                    pipe.hset(members, mapping={user_id: member for member, user_id, _ in rows})
+                    pipe.hset(entries, mapping={user_id: json.dumps(entry) for _, user_id, entry in rows})
+                    for key in (board, members, entries):
+                        pipe.expire(key, settings.LEADERBOARD_CACHE_SECONDS)
+                    pipe.execute()
+            except WatchError:
+                pass
+    return [(user_id, entry) for _, user_id, entry in rows]
+
+
+def leaderboard_page(challenge_id, offset=0, limit=None):
+    """Entries ranked offset+1 .. offset+limit (all remaining ones without a limit), each with `rank`."""
+    client = redis_client()
+    if client is None:
+        participants = ranked_participants(challenge_id)
+        participants = participants[offset:offset + limit] if limit is not None else participants[offset:]
+        return [dict(_entry(participant), rank=participant.rank) for participant in participants]
+
+    board, _, entries, _ = _keys(challenge_id)
+    stop = -1 if limit is None else offset + limit - 1
+    page = [] if limit == 0 else client.eval(_PAGE, 2, board, entries, offset, stop)
+    if page is None:
+        rows = _build(client, challenge_id)
+        page = [entry for _, entry in rows[offset:None if limit is None else offset + limit]]
+    else:
+        page = [json.loads(entry) for entry in page]
+    return _ranked(page, offset)
+
+
+def leaderboard_around(challenge_id, user_id, neighbours=2):
+    """
+    The user's rank, the number of participants and the entries from `neighbours` above to
+    `neighbours` below the user, or None if the user hasn't joined.
+    """
+    client = redis_client()
+    if client is None:
+        ranked = ranked_participants(challenge_id)
+        # Filtering on user_id would run before ROW_NUMBER(), so the user's row is picked from all ranks
+        ranks = dict(ranked.values_list('user_id', 'rank'))
+        rank = ranks.get(user_id)
+        if rank is None:
+            return None
+        total = len(ranks)
+        # Conditions on the window annotation itself are applied after it is computed
+        around = ranked.filter(rank__gte=rank - neighbours, rank__lte=rank + neighbours)
+        return rank, total, [dict(_entry(participant), rank=participant.rank) for participant in around]
+
+    board, members, entries, _ = _keys(challenge_id)
+    position = client.eval(_AROUND, 3, board, members, entries, user_id, neighbours)
+    if position is None:
+        rows = _build(client, challenge_id)
+        index = next((index for index, (row_user_id, _) in enumerate(rows) if row_user_id == user_id), None)
+        if index is None:
+            return None
+        first = max(index - neighbours, 0)
+        return index + 1, len(rows), _ranked([entry for _, entry in rows[first:index + neighbours + 1]], first)
+    if not position:
+        return None
+    index, total, first, *page = position
+    return index + 1, total, _ranked([json.loads(entry) for entry in page], first)
+
+
+def _update(challenge_id, user_id, member='', entry=''):
+    client = redis_client()
+    if client is None:
+        return
+    client.eval(_UPDATE, 4, *_keys(challenge_id), user_id, member, entry, settings.LEADERBOARD_CACHE_SECONDS)
+
+
+def refresh_participant(challenge_id, user_id):
+    """Move a participant to their current place, reading the committed row so concurrent updates can't reorder."""
+    if redis_client() is None:
+        return
+    participant = (
+        ChallengeParticipant.objects.select_related('user')
+        .filter(challenge_id=challenge_id, user_id=user_id).first()
+    )
+    if participant is None:
+        _update(challenge_id, user_id)
+    else:
+        _update(challenge_id, user_id, _member(participant), json.dumps(_entry(participant)))
+
+
+def remove_participant(challenge_id, user_id):
+    _update(challenge_id, user_id)
+
+
+def invalidate_leaderboard(challenge_id):
+    client = redis_client()
+    if client is None:
+        return
+    board, members, entries, changes_key = _keys(challenge_id)
+    pipe = client.pipeline()
+    pipe.incr(changes_key)
+    pipe.expire(changes_key, settings.LEADERBOARD_CACHE_SECONDS)
+    pipe.delete(board, members, entries)
+    pipe.execute()
@@ -0,0 +1,144 @@
+"""
+Challenge lifecycle: UPCOMING -> ACTIVE -> ENDED.
+
+`Challenge.status` is materialized so listings and the processor can filter on it. New challenges
+get the status of their dates when created; after that `process_challenge_lifecycle()` moves them
+along, run every minute or so by `python manage.py process_challenge_lifecycle` (from cron, or with
+`--every SECONDS` as a long-running process).
+
+Each run finds the challenges whose start or end date has passed with range queries on the
+(status, start_date) and (status, end_date) indexes. Their rows are locked (skipping rows another run
+holds) and moved to the new status in the same transaction that writes the notifications, so each
+transition notifies once however many processors run. Ending a challenge also freezes every
+participant's `final_rank`.
+
+Challenges whose dates were changed so they haven't ended or started yet (e.g. an extended end date)
+are reopened without notifications. The first start and end of a challenge are recorded in
+`start_notified_at` / `end_notified_at`, so one that ends (or starts) again after being reopened
+isn't announced twice.
+"""
+from django.db import transaction
+from django.db.models import F, Value, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+
+from .leaderboards import RANKING, invalidate_leaderboard
+from .models import Challenge, ChallengeParticipant, Notification
+from .utils import dispatch_notifications
+
+
+def status_at(start_date, end_date, now):
+    if end_date <= now:
+        return 'ENDED'
+    if start_date <= now:
+        return 'ACTIVE'
+    return 'UPCOMING'
+
+
+def _claim(queryset, status, notified_field, now):
+    """
+    Lock the challenges in `queryset` not locked by another run and move them to `status`.
+    Returns them and those among them not notified of this transition before, which are marked notified.
+    """
+    challenges = list(queryset.select_for_update(skip_locked=True).only('id', 'title', 'coach_id', notified_field))
+    if challenges:
+        Challenge.objects.filter(id__in=[challenge.id for challenge in challenges]).update(
+            status=status, **{notified_field: Coalesce(notified_field, Value(now))},
+        )
+    return challenges, [challenge for challenge in challenges if getattr(challenge, notified_field) is None]
+
+
+def _participants(challenges):
+    """challenge id -> participant user ids, in one query."""
+    by_challenge = {challenge.id: [] for challenge in challenges}
+    rows = ChallengeParticipant.objects.filter(challenge_id__in=by_challenge).values_list('challenge_id', 'user_id')
+    for challenge_id, user_id in rows:
+        by_challenge[challenge_id].append(user_id)
+    return by_challenge
+
+
+def _start_notifications(challenges):
+    participants = _participants(challenges)
+    return [
+        Notification(
+            recipient_id=user_id,
+            sender_id=challenge.coach_id,
+            notification_type='CHALLENGE',
+            title="Challenge Started",
+            message=f"The challenge '{challenge.title}' has started. Good luck!",
+            related_object_id=challenge.id,
+            related_object_type='Challenge'
+        )
+        for challenge in challenges
+        for user_id in participants[challenge.id]
+    ]
+
+
+def _end_notifications(challenges):
+    participants = _participants(challenges)
+    notifications = []
+    for challenge in challenges:
+        notifications.extend(
+            Notification(
+                recipient_id=user_id,
+                sender_id=challenge.coach_id,
+                notification_type='CHALLENGE',
+                title="Challenge Ended",
+                message=f"The challenge '{challenge.title}' has ended. Check your results!",
+                related_object_id=challenge.id,
+                related_object_type='Challenge'
+            )
+            for user_id in participants[challenge.id]
+        )
+        notifications.append(Notification(
+            recipient_id=challenge.coach_id,
+            notification_type='CHALLENGE',
+            title="Your Challenge Has Ended",
+            message=f"Your challenge '{challenge.title}' has ended. Check the participants' results!",
+            related_object_id=challenge.id,
+            related_object_type='Challenge'
+        ))
+    return notifications
+
+
+def finalize_leaderboards(challenge_ids):
+    """Store each participant's rank in its challenge, computed with one window query over all of them."""
+    ranked = (
+        ChallengeParticipant.objects
+        .filter(challenge_id__in=challenge_ids)
+        .annotate(rank=Window(RowNumber(), partition_by=[F('challenge_id')], order_by=list(RANKING)))
+        .only('id')
+    )
+    participants = []
+    for participant in ranked:
+        participant.final_rank = participant.rank
+        participants.append(participant)
+    ChallengeParticipant.objects.bulk_update(participants, ['final_rank'], batch_size=1000)
+    for challenge_id in challenge_ids:
+        transaction.on_commit(lambda challenge_id=challenge_id: invalidate_leaderboard(challenge_id))
+
+
+def process_challenge_lifecycle(now=None):
+    """Apply every transition that is due. Returns the number of challenges started, ended and reopened."""
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Dates changed after a transition: back to the status the dates say, without notifying twice
+        reopened = (
+            Challenge.objects.filter(status='ENDED', end_date__gt=now, start_date__lte=now).update(status='ACTIVE')
+            + Challenge.objects.filter(status__in=['ACTIVE', 'ENDED'], start_date__gt=now).update(status='UPCOMING')
+        )
+
+        ended, to_notify = _claim(
+            Challenge.objects.filter(status__in=['UPCOMING', 'ACTIVE'], end_date__lte=now), 'ENDED', 'end_notified_at', now,
+        )
+        if ended:
+            finalize_leaderboards([challenge.id for challenge in ended])
+            dispatch_notifications(_end_notifications(to_notify))
+
+        started, to_notify = _claim(
+            Challenge.objects.filter(status='UPCOMING', start_date__lte=now, end_date__gt=now), 'ACTIVE',
+            'start_notified_at', now,
+        )
+        dispatch_notifications(_start_notifications(to_notify))
+
+    return {'started': len(started), 'ended': len(ended), 'reopened': reopened}
@@ -0,0 +1,99 @@
+"""
+Per-day login records and the login calendar.
+
+`user_login` inserts one LoginDay per user and day (ON CONFLICT DO NOTHING, so a second login that day
+costs nothing more) and updates the streak counters with a narrow UPDATE.
+
+The calendar is served from one bitmask per user and month, bit n-1 set if the user logged in on day n.
+Masks are built in SQL with bit_or over the LoginDay rows and cached; only the current month can change,
+and recording a login drops its mask. Without a shared cache that drop only reaches the process that
+recorded the login, so there the current month is read from the database each time.
+"""
+import datetime
+
+from django.contrib.postgres.aggregates import BitOr
+from django.core.cache import cache
+from django.db.models import IntegerField, Value
+from django.db.models.functions import Cast, ExtractDay, TruncMonth
+from django.utils import timezone
+
+from .models import LoginDay
+from .shared_cache import is_shared
+
+# Past months never change, so their masks can stay cached for long
+MONTH_CACHE_SECONDS = 30 * 24 * 3600
+
+
+def _month_key(user_id, month):
+    return f'login_calendar:{user_id}:{month:%Y-%m}'
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def record_login_day(user_id, day):
+    LoginDay.objects.bulk_create([LoginDay(user_id=user_id, day=day)], ignore_conflicts=True)
+    cache.delete(_month_key(user_id, day.replace(day=1)))
+
+
+def month_masks(user_id, first_month, last_month):
+    """{first day of month: bitmask} from first_month to last_month, with one query for all uncached months."""
+    months = []
+    month = first_month
+    while month <= last_month:
+        months.append(month)
+        month = _add_months(month, 1)
+
+    cached = cache.get_many([_month_key(user_id, month) for month in months])
+    masks = {month: cached.get(_month_key(user_id, month)) for month in months}
+    missing = [month for month, mask in masks.items() if mask is None]
+    if missing:
+        rows = (
+            LoginDay.objects
+            .filter(user_id=user_id, day__gte=missing[0], day__lt=_add_months(missing[-1], 1))
+            .annotate(month=TruncMonth('day'))
+            .values('month')
+            # EXTRACT returns numeric on PostgreSQL 14+, which has no << operator
+            .annotate(mask=BitOr(Value(1).bitleftshift(Cast(ExtractDay('day'), IntegerField()) - 1)))
+            .order_by()
+        )
+        found = {row['month']: row['mask'] for row in rows}
+        for month in missing:
+            masks[month] = found.get(month, 0)
+        if not is_shared():
+            current = timezone.localdate().replace(day=1)
+            missing = [month for month in missing if month < current]
+        cache.set_many({_month_key(user_id, month): masks[month] for month in missing}, MONTH_CACHE_SECONDS)
+    return masks
+
+
+def days_in_mask(month, mask):
+    return [month.replace(day=bit + 1) for bit in range(31) if mask >> bit & 1]
+
+
+def login_days_between(user_id, start, end):
+    """The days from start to end (inclusive) the user logged in, oldest first."""
+    masks = month_masks(user_id, start.replace(day=1), end.replace(day=1))
+    return [
+        day
+        for month, mask in sorted(masks.items())
+        for day in days_in_mask(month, mask)
+        if start <= day <= end
+    ]
+
+
+def login_calendar(user_id, months=3, today=None):
+    """The last `months` months including the current one, oldest first."""
+    today = today or timezone.localdate()
+    current = today.replace(day=1)
+    masks = month_masks(user_id, _add_months(current, 1 - months), current)
+    return [
+        {
+            'month': f'{month:%Y-%m}',
+            'mask': mask,
+            'days': [day.day for day in days_in_mask(month, mask)],
+        }
+        for month, mask in sorted(masks.items())
+    ]
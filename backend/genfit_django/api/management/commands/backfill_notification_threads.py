@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from api.models import Notification
+from api.utils import resolve_target_thread_ids
+
+
+class Command(BaseCommand):
+    help = 'Fills Notification.target_thread_id for rows written before it was stored at creation time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of notifications resolved and updated per batch.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        pending = Notification.objects.filter(
+            target_thread_id__isnull=True,
+            related_object_id__isnull=False,
+            related_object_type__in=['Thread', 'Comment', 'Subcomment'],
+        ).only('id', 'related_object_id', 'related_object_type', 'target_thread_id').order_by('id')
+
+        last_id = 0
+        total = 0
+        while True:
+            batch = list(pending.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            thread_ids = resolve_target_thread_ids(batch)
+            updated = []
+            for notification in batch:
+                notification.target_thread_id = thread_ids.get(notification.id)
+                if notification.target_thread_id is not None:
+                    updated.append(notification)
+            Notification.objects.bulk_update(updated, ['target_thread_id'])
+            total += len(updated)
+
+        self.stdout.write(self.style.SUCCESS(f'Backfilled target_thread_id on {total} notifications.'))
@@ -0,0 +1,30 @@
+import asyncio
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from api.availability import build_filters
+from api.scheduler import run_periodically
+
+
+class Command(BaseCommand):
+    help = ('Builds the username/email availability filters in Redis from the users table. '
+            'Run it after deploying and then daily from cron, or pass --every to keep it running.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=None,
+                            help='Keep running, rebuilding every this many seconds.')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of users read per round trip.')
+
+    def report(self, count):
+        if count is None:
+            self.stdout.write('No Redis cache is configured; availability checks query the database.')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Built the availability filters from {count} users.'))
+
+    def handle(self, *args, **options):
+        build = partial(build_filters, batch_size=options['batch_size'])
+        if options['every'] is None:
+            self.report(build())
+            return
+        asyncio.run(run_periodically(build, options['every'], on_result=self.report))
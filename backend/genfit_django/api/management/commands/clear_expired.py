@@ -0,0 +1,31 @@
+import asyncio
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from api.progress import purge_idempotency_keys
+from api.scheduler import run_periodically
+
+
+def clear_expired():
+    # Same as `manage.py clearsessions`; cached copies expire from the cache on their own
+    import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+    return purge_idempotency_keys()
+
+
+class Command(BaseCommand):
+    help = ('Deletes expired sessions and progress idempotency keys older than PROGRESS_IDEMPOTENCY_KEY_DAYS. '
+            'Run it daily from cron, or pass --every to keep it running.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=None,
+                            help='Keep running, clearing every this many seconds.')
+
+    def report(self, keys):
+        self.stdout.write(self.style.SUCCESS(f'Cleared expired sessions and {keys} idempotency keys.'))
+
+    def handle(self, *args, **options):
+        if options['every'] is None:
+            self.report(clear_expired())
+            return
+        asyncio.run(run_periodically(clear_expired, options['every'], on_result=self.report))
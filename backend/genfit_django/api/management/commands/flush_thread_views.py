@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from api.view_counts import flush_thread_views
+
+
+class Command(BaseCommand):
+    help = 'Writes thread views buffered in Redis to Thread.view_count. Run it periodically (e.g. every minute from cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of buffered threads read per Redis round trip.')
+
+    def handle(self, *args, **options):
+        total = flush_thread_views(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Flushed {total} thread views.'))
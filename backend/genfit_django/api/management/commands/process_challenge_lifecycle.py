@@ -0,0 +1,25 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+from api.lifecycle import process_challenge_lifecycle
+from api.scheduler import run_periodically
+
+
+class Command(BaseCommand):
+    help = ('Starts and ends the challenges whose dates have passed, notifying participants once per transition. '
+            'Run it every minute from cron, or pass --every to keep it running.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=None,
+                            help='Keep running, processing the lifecycle every this many seconds.')
+
+    def report(self, counts):
+        self.stdout.write(self.style.SUCCESS(
+            f"Started {counts['started']}, ended {counts['ended']} and reopened {counts['reopened']} challenges."
+        ))
+
+    def handle(self, *args, **options):
+        if options['every'] is None:
+            self.report(process_challenge_lifecycle())
+            return
+        asyncio.run(run_periodically(process_challenge_lifecycle, options['every'], on_result=self.report))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from api.thread_scores import refresh_thread_scores
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the hot, top_week and rising thread scores that changed. Run it periodically (e.g. every five minutes from cron).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of threads rescored per UPDATE batch.')
+
+    def handle(self, *args, **options):
+        total = refresh_thread_scores(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rescored {total} threads.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from api.progress_history import roll_up_progress
+
+
+class Command(BaseCommand):
+    help = 'Sums the progress events of finished days into daily rollups for the progress history charts. Run it nightly, e.g. from cron.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of rollup rows written per INSERT.')
+
+    def handle(self, *args, **options):
+        total = roll_up_progress(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {total} daily rollups.'))
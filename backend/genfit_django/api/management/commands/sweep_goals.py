@@ -0,0 +1,25 @@
+import asyncio
+
+from django.core.management.base import BaseCommand
+from api.goal_sweeper import sweep_goals
+from api.scheduler import run_periodically
+
+
+class Command(BaseCommand):
+    help = ('Notifies owners of overdue goals and marks goals without updates for a week as inactive, for all users. '
+            'Run it periodically (e.g. hourly from cron), or pass --every to keep it running.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=None,
+                            help='Keep running, sweeping every this many seconds.')
+
+    def report(self, counts):
+        self.stdout.write(self.style.SUCCESS(
+            f"Notified {counts['overdue']} overdue goals and marked {counts['inactive']} goals as inactive."
+        ))
+
+    def handle(self, *args, **options):
+        if options['every'] is None:
+            self.report(sweep_goals())
+            return
+        asyncio.run(run_periodically(sweep_goals, options['every'], on_result=self.report))
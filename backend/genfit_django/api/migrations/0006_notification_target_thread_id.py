@@ -0,0 +1,60 @@
+# Generated by Django 5.2 on 2026-10-16 20:39
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_target_thread_id(apps, schema_editor):
+    Notification = apps.get_model('api', 'Notification')
+    Comment = apps.get_model('api', 'Comment')
+    Subcomment = apps.get_model('api', 'Subcomment')
+
+    pending = Notification.objects.filter(
+        target_thread_id__isnull=True,
+        related_object_id__isnull=False,
+        related_object_type__in=['Thread', 'Comment', 'Subcomment'],
+    ).order_by('id')
+
+    last_id = 0
+    while True:
+        batch = list(pending.filter(id__gt=last_id).only('id', 'related_object_id', 'related_object_type')[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        comment_ids = {n.related_object_id for n in batch if n.related_object_type == 'Comment'}
+        subcomment_ids = {n.related_object_id for n in batch if n.related_object_type == 'Subcomment'}
+        comment_threads = dict(Comment.objects.filter(id__in=comment_ids).values_list('id', 'thread_id'))
+        subcomment_threads = dict(
+            Subcomment.objects.filter(id__in=subcomment_ids).values_list('id', 'comment__thread_id')
+        )
+
+        updated = []
+        for notification in batch:
+            if notification.related_object_type == 'Thread':
+                notification.target_thread_id = notification.related_object_id
+            elif notification.related_object_type == 'Comment':
+                notification.target_thread_id = comment_threads.get(notification.related_object_id)
+            else:
+                notification.target_thread_id = subcomment_threads.get(notification.related_object_id)
+            if notification.target_thread_id is not None:
+                updated.append(notification)
+        Notification.objects.bulk_update(updated, ['target_thread_id'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_notification_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='target_thread_id',
+            field=models.PositiveIntegerField(blank=True, help_text='Thread the notification navigates to, resolved at write time', null=True),
+        ),
+        migrations.RunPython(backfill_target_thread_id, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-16 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_notification_target_thread_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-is_pinned', '-last_activity', '-id'], name='api_thread_is_pinn_c86f08_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['forum', '-is_pinned', '-last_activity', '-id'], name='api_thread_forum_i_6e0ff4_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-16 21:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_thread_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['thread', 'created_at', 'id'], name='api_comment_thread__61c448_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subcomment',
+            index=models.Index(fields=['comment', 'created_at', 'id'], name='api_subcomm_comment_6ee930_idx'),
+        ),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2 on 2026-10-16 21:40
+
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.utils import timezone
+
+# The scoring formula as of this migration, copied so later changes to api.thread_scores don't change it
+LIKE_POINTS = 10
+COMMENT_POINTS = 20
+VIEW_POINTS = 1
+HOT_DECAY_SECONDS = 45000
+HOT_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+TOP_WEEK_WINDOW = timedelta(days=7)
+RISING_WINDOW = timedelta(hours=24)
+RISING_GRAVITY = 1.5
+
+
+def score_thread(thread, now):
+    created_at = thread.created_at or now
+    points = thread.like_count * LIKE_POINTS + thread.comment_count * COMMENT_POINTS + thread.view_count * VIEW_POINTS
+    age = now - created_at
+    thread.scored_engagement = points
+    thread.hot_score = math.log10(max(points, 1)) + (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+    thread.top_week_score = points if age <= TOP_WEEK_WINDOW else 0
+    if age <= RISING_WINDOW:
+        thread.rising_score = points / (max(age.total_seconds(), 0) / 3600 + 2) ** RISING_GRAVITY
+    else:
+        thread.rising_score = 0.0
+
+
+def score_existing_threads(apps, schema_editor):
+    Thread = apps.get_model('api', 'Thread')
+    now = timezone.now()
+    batch = []
+    for thread in Thread.objects.order_by('id').iterator(chunk_size=1000):
+        score_thread(thread, now)
+        batch.append(thread)
+        if len(batch) >= 1000:
+            Thread.objects.bulk_update(batch, ['scored_engagement', 'hot_score', 'top_week_score', 'rising_score'])
+            batch = []
+    if batch:
+        Thread.objects.bulk_update(batch, ['scored_engagement', 'hot_score', 'top_week_score', 'rising_score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_comment_tree_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='thread',
+            name='hot_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='rising_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='scored_engagement',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='top_week_score',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-hot_score', '-id'], name='api_thread_hot_sco_3037ec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-top_week_score', '-id'], name='api_thread_top_wee_f25a60_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=models.Index(fields=['-rising_score', '-id'], name='api_thread_rising__733162_idx'),
+        ),
+        migrations.RunPython(score_existing_threads, migrations.RunPython.noop),
+    ]
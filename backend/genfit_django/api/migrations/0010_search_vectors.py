@@ -0,0 +1,95 @@
+# Generated by Django 5.2 on 2026-10-16 21:55
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# table -> [(column, weight)]; must match api/search.py
+SEARCH_COLUMNS = {
+    'api_thread': [('title', 'A'), ('content', 'B')],
+    'api_comment': [('content', 'B')],
+    'api_subcomment': [('content', 'B')],
+    'api_challenge': [('title', 'A'), ('description', 'B'), ('location', 'C')],
+}
+
+
+def _vector(columns, row=''):
+    return ' || '.join(
+        f"setweight(to_tsvector('pg_catalog.english', coalesce({row}{column}, '')), '{weight}')"
+        for column, weight in columns
+    )
+
+
+def _forward_sql():
+    statements = []
+    for table, columns in SEARCH_COLUMNS.items():
+        statements.append(f"""
+            CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {_vector(columns, 'NEW.')};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql;
+        """)
+        statements.append(f"""
+            CREATE TRIGGER {table}_search_vector_trigger
+            BEFORE INSERT OR UPDATE OF {', '.join(column for column, _ in columns)} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update();
+        """)
+        statements.append(f"UPDATE {table} SET search_vector = {_vector(columns)};")
+    return statements
+
+
+def _reverse_sql():
+    statements = []
+    for table in SEARCH_COLUMNS:
+        statements.append(f"DROP TRIGGER IF EXISTS {table}_search_vector_trigger ON {table};")
+        statements.append(f"DROP FUNCTION IF EXISTS {table}_search_vector_update();")
+    return statements
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_thread_scores'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challenge',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='subcomment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='thread',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='challenge',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='challenge_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='comment_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='subcomment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='subcomment_search_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='thread',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='thread_search_gin'),
+        ),
+        migrations.RunSQL(_forward_sql(), _reverse_sql()),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-16 22:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_search_vectors'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='challenge',
+            index=models.Index(fields=['latitude', 'longitude'], name='api_challen_latitud_e83f10_idx'),
+        ),
+    ]
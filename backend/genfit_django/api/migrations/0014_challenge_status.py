@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-17 00:20
+
+from django.db import migrations, models
+from django.db.models.functions import Now
+
+
+def set_status_from_dates(apps, schema_editor):
+    Challenge = apps.get_model('api', 'Challenge')
+    Challenge.objects.filter(end_date__lte=Now()).update(status='ENDED')
+    Challenge.objects.filter(start_date__lte=Now(), end_date__gt=Now()).update(status='ACTIVE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_progresssubmission'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challenge',
+            name='status',
+            field=models.CharField(choices=[('UPCOMING', 'Upcoming'), ('ACTIVE', 'Active'), ('ENDED', 'Ended')], default='UPCOMING', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='challengeparticipant',
+            name='final_rank',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='challenge',
+            index=models.Index(fields=['status', 'start_date'], name='api_challen_status_24e090_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='challenge',
+            index=models.Index(fields=['status', 'end_date'], name='api_challen_status_2effd2_idx'),
+        ),
+        # Challenges that ended before this migration are not finalized or notified again
+        migrations.RunPython(set_status_from_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-17 01:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_challenge_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fitnessgoal',
+            name='deadline_notified_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='fitnessgoal',
+            index=models.Index(fields=['status', 'last_updated'], name='api_fitness_status_062634_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fitnessgoal',
+            index=models.Index(fields=['status', 'target_date'], name='api_fitness_status_66f6ef_idx'),
+        ),
+    ]
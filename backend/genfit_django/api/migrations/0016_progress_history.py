@@ -0,0 +1,50 @@
+# Generated by Django 5.2 on 2026-10-17 01:50
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_fitnessgoal_sweep'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.PositiveSmallIntegerField(choices=[(1, 'Fitness Goal'), (2, 'Challenge')])),
+                ('target_id', models.PositiveIntegerField()),
+                ('delta', models.FloatField()),
+                ('recorded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [
+                    django.contrib.postgres.indexes.BrinIndex(fields=['recorded_at'], name='progressevent_recorded_brin'),
+                    models.Index(fields=['user', 'target_type', 'target_id', 'recorded_at'], name='api_progres_user_id_bbeabe_idx'),
+                ],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProgressDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.PositiveSmallIntegerField(choices=[(1, 'Fitness Goal'), (2, 'Challenge')])),
+                ('target_id', models.PositiveIntegerField()),
+                ('day', models.DateField(db_index=True)),
+                ('total', models.FloatField()),
+                ('entries', models.PositiveIntegerField()),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'target_type', 'target_id', 'day')},
+            },
+        ),
+    ]
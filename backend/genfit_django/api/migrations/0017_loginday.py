@@ -0,0 +1,47 @@
+# Generated by Django 5.2 on 2026-10-17 02:30
+
+import datetime
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def record_current_streaks(apps, schema_editor):
+    """The only login days known before they were recorded: each user's current streak."""
+    User = apps.get_model('api', 'UserWithType')
+    LoginDay = apps.get_model('api', 'LoginDay')
+    users = User.objects.filter(last_login_date__isnull=False).values_list('id', 'last_login_date', 'current_streak')
+    batch = []
+    for user_id, last_login_date, current_streak in users.iterator(chunk_size=1000):
+        batch.extend(
+            LoginDay(user_id=user_id, day=last_login_date - datetime.timedelta(days=offset))
+            for offset in range(max(current_streak, 1))
+        )
+        if len(batch) >= 5000:
+            LoginDay.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    LoginDay.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_progress_history'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LoginDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='login_days', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'day')},
+            },
+        ),
+        migrations.RunPython(record_current_streaks, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-17 03:10
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def mark_past_transitions_notified(apps, schema_editor):
+    Challenge = apps.get_model('api', 'Challenge')
+    Challenge.objects.filter(status__in=['ACTIVE', 'ENDED']).update(start_notified_at=F('start_date'))
+    Challenge.objects.filter(status='ENDED').update(end_notified_at=F('end_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_loginday'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='challenge',
+            name='start_notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='challenge',
+            name='end_notified_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        # Challenges that started or ended before this migration are not announced again if reopened
+        migrations.RunPython(mark_past_transitions_notified, migrations.RunPython.noop),
+    ]
@@ -1,12 +1,16 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Coalesce
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericRelation
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
+from .counters import adjust_counter
 
 
 
@@ -28,39 +32,47 @@ class UserWithType(AbstractUser):
     daily_advice_enabled = models.BooleanField(default=True, help_text='Enable AI-generated daily advice')
     
     def update_login_streak(self):
-        """Update login streak when user logs in"""
-        from datetime import date, timedelta
-        today = date.today()
-        
-        # First time login
-        if self.last_login_date is None:
-            self.current_streak = 1
-            self.longest_streak = 1
-            self.total_login_days = 1
-            self.last_login_date = today
-            self.save()
-            return
+        """Record today's login and update the streak, writing only the streak columns"""
+        from datetime import timedelta
+        from .login_days import record_login_day
+        today = timezone.localdate()
         
         # Already logged in today
         if self.last_login_date == today:
             return
         
+        record_login_day(self.pk, today)
+        
         # Logged in yesterday - continue streak
         yesterday = today - timedelta(days=1)
         if self.last_login_date == yesterday:
             self.current_streak += 1
-            self.total_login_days += 1
-        # Streak broken - start new streak
+        # First login or streak broken - start new streak
         else:
             self.current_streak = 1
-            self.total_login_days += 1
+        self.total_login_days += 1
         
         # Update longest streak if current is longer
         if self.current_streak > self.longest_streak:
             self.longest_streak = self.current_streak
         
         self.last_login_date = today
-        self.save()
+        # update() rather than save(), which would also fire save_user_profile and rewrite the profile
+        UserWithType.objects.filter(pk=self.pk).update(
+            current_streak=self.current_streak,
+            longest_streak=self.longest_streak,
+            total_login_days=self.total_login_days,
+            last_login_date=today,
+        )
+
+
+class LoginDay(models.Model):
+    """A day the user logged in on; one row per user and day (see api/login_days.py)."""
+    user = models.ForeignKey(UserWithType, on_delete=models.CASCADE, related_name='login_days', db_index=False)
+    day = models.DateField()
+
+    class Meta:
+        unique_together = ('user', 'day')
 
 
 class FitnessGoal(models.Model):
@@ -100,9 +112,16 @@ class FitnessGoal(models.Model):
     target_date = models.DateTimeField()
     status = models.CharField(max_length=20, choices=GOAL_STATUS, default='ACTIVE')
     last_updated = models.DateTimeField(auto_now=True)
+    # When the owner was last told the target date passed (see api/goal_sweeper.py)
+    deadline_notified_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-start_date']
+        indexes = [
+            # Goals due for the inactivity and deadline sweeps
+            models.Index(fields=['status', 'last_updated']),
+            models.Index(fields=['status', 'target_date']),
+        ]
 
     @property
     def progress_percentage(self):
@@ -117,12 +136,39 @@ class FitnessGoal(models.Model):
 
 
 
+class ChallengeQuerySet(models.QuerySet):
+    def with_participant_stats(self, user=None):
+        """
+        Annotate each challenge's participant count and, for an authenticated user, whether they
+        joined it and their progress, so listing challenges takes one query however many there are.
+        Subqueries rather than a join keep the count right when the queryset already filters on participants.
+        """
+        participants = ChallengeParticipant.objects.filter(challenge=models.OuterRef('pk'))
+        counts = participants.order_by().values('challenge').annotate(total=models.Count('*')).values('total')
+        queryset = self.annotate(
+            num_participants=Coalesce(models.Subquery(counts), 0),
+        )
+        if user is not None and user.is_authenticated:
+            mine = participants.filter(user=user)
+            queryset = queryset.annotate(
+                viewer_joined=models.Exists(mine),
+                viewer_progress=models.Subquery(mine.values('current_value')[:1]),
+            )
+        return queryset
+
+
 class Challenge(models.Model):
     DIFFICULTY_CHOICES = [
         ('Beginner', 'Beginner'),
         ('Intermediate', 'Intermediate'),
         ('Advanced', 'Advanced'),
     ]
+
+    STATUS_CHOICES = [
+        ('UPCOMING', 'Upcoming'),
+        ('ACTIVE', 'Active'),
+        ('ENDED', 'Ended'),
+    ]
     
     coach = models.ForeignKey(UserWithType, on_delete=models.CASCADE, related_name='created_challenges')
     title = models.CharField(max_length=255)
@@ -139,15 +185,52 @@ class Challenge(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     min_age = models.IntegerField(null=True, blank=True)
     max_age = models.IntegerField(null=True, blank=True)
+    # Advanced by `python manage.py process_challenge_lifecycle` as start_date and end_date pass (see api/lifecycle.py)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='UPCOMING')
+    # When participants were told the challenge started / ended, so a reopened challenge isn't announced twice
+    start_notified_at = models.DateTimeField(null=True, blank=True, editable=False)
+    end_notified_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    # Maintained by a database trigger from title, description and location (see api/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ChallengeQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_vector'], name='challenge_search_gin'),
+            # Serves the bounding box in api.geo.within_radius
+            models.Index(fields=['latitude', 'longitude']),
+            # Challenges due to start or end, for api.lifecycle
+            models.Index(fields=['status', 'start_date']),
+            models.Index(fields=['status', 'end_date']),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            from .lifecycle import status_at
+            self.status = status_at(self.start_date, self.end_date, timezone.now())
+        super().save(*args, **kwargs)
+
     def is_active(self):
         now = timezone.now()
         return self.start_date <= now <= self.end_date
 
 
+class GeocodeCacheEntry(models.Model):
+    """Nominatim's answer for a normalized place query; null coordinates mean it found nothing."""
+    query = models.CharField(max_length=255, unique=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.query
+
+
 class ChallengeParticipant(models.Model):
     challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE, related_name='participants')
     user = models.ForeignKey(UserWithType, on_delete=models.CASCADE, related_name='joined_challenges')
@@ -155,15 +238,74 @@ class ChallengeParticipant(models.Model):
     joined_at = models.DateTimeField(auto_now_add=True)
     last_updated = models.DateTimeField(auto_now=True)
     finish_date = models.DateTimeField(null=True, blank=True)
+    # Rank frozen when the challenge ends
+    final_rank = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         unique_together = ('challenge', 'user')
 
     def update_progress(self, added_value):
-        self.current_value += added_value
-        if self.current_value >= self.challenge.target_value and self.finish_date is None:
-            self.finish_date = timezone.now()
-        self.save()
+        """Add to current_value in one UPDATE so concurrent submissions aren't lost, then reload."""
+        from .progress import add_challenge_progress
+        add_challenge_progress(self.challenge_id, self.user_id, added_value)
+        self.refresh_from_db(fields=['current_value', 'finish_date', 'last_updated'])
+
+
+class ProgressSubmission(models.Model):
+    """An idempotency key sent with a progress submission, recorded in the transaction that applied it."""
+    TARGET_TYPES = [
+        ('challenge', 'Challenge'),
+        ('goal', 'Fitness Goal'),
+    ]
+
+    user = models.ForeignKey(UserWithType, on_delete=models.CASCADE, related_name='progress_submissions')
+    idempotency_key = models.CharField(max_length=64)
+    target_type = models.CharField(max_length=20, choices=TARGET_TYPES)
+    target_id = models.PositiveIntegerField()
+    added_value = models.FloatField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'idempotency_key')
+
+
+class ProgressEvent(models.Model):
+    """
+    Progress added to a goal or challenge, appended on every update and never changed (see api/progress_history.py).
+    Kept narrow with no foreign keys to the target, so history survives the goal or challenge.
+    """
+    GOAL = 1
+    CHALLENGE = 2
+    TARGET_TYPES = [
+        (GOAL, 'Fitness Goal'),
+        (CHALLENGE, 'Challenge'),
+    ]
+
+    user = models.ForeignKey(UserWithType, on_delete=models.CASCADE, related_name='+', db_index=False)
+    target_type = models.PositiveSmallIntegerField(choices=TARGET_TYPES)
+    target_id = models.PositiveIntegerField()
+    delta = models.FloatField()
+    recorded_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # Rows arrive in time order, so a BRIN index finds a time range in a few pages
+            BrinIndex(fields=['recorded_at'], name='progressevent_recorded_brin'),
+            models.Index(fields=['user', 'target_type', 'target_id', 'recorded_at']),
+        ]
+
+
+class ProgressDailyRollup(models.Model):
+    """A day of ProgressEvents for one target, written nightly so charts don't scan the raw events."""
+    user = models.ForeignKey(UserWithType, on_delete=models.CASCADE, related_name='+', db_index=False)
+    target_type = models.PositiveSmallIntegerField(choices=ProgressEvent.TARGET_TYPES)
+    target_id = models.PositiveIntegerField()
+    day = models.DateField(db_index=True)
+    total = models.FloatField()
+    entries = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('user', 'target_type', 'target_id', 'day')
 
 
 
@@ -195,12 +337,18 @@ class Notification(models.Model):
     message = models.TextField()
     related_object_id = models.PositiveIntegerField(null=True, blank=True)
     related_object_type = models.CharField(max_length=50, null=True, blank=True)
+    target_thread_id = models.PositiveIntegerField(null=True, blank=True,
+                                                   help_text='Thread the notification navigates to, resolved at write time')
     is_read = models.BooleanField(default=False)
     is_email_sent = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['recipient', '-created_at', '-id']),
+            models.Index(fields=['recipient', 'is_read', 'created_at']),
+        ]
 
 
 class MentorMenteeRelationship(models.Model):
@@ -268,6 +416,15 @@ def save_user_profile(sender, instance, **kwargs):
     instance.profile.save()
 
 
+class ForumQuerySet(models.QuerySet):
+    def with_thread_stats(self):
+        """Annotate each forum's thread count and latest thread activity in the same query."""
+        return self.annotate(
+            num_threads=models.Count('threads'),
+            latest_thread_activity=models.Max('threads__last_activity'),
+        )
+
+
 class Forum(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
@@ -277,6 +434,8 @@ class Forum(models.Model):
     is_active = models.BooleanField(default=True)
     order = models.IntegerField(default=0, help_text='Order in which forums should be displayed')
 
+    objects = ForumQuerySet.as_manager()
+
     class Meta:
         ordering = ['order', 'title']
 
@@ -285,8 +444,17 @@ class Forum(models.Model):
 
     @property
     def thread_count(self):
+        # Querysets built with with_thread_stats() already carry the count
+        if hasattr(self, 'num_threads'):
+            return self.num_threads
         return self.threads.count()
 
+    @property
+    def latest_activity(self):
+        if hasattr(self, 'latest_thread_activity'):
+            return self.latest_thread_activity
+        return self.threads.aggregate(latest=models.Max('last_activity'))['latest']
+
 
 class Thread(models.Model):
     forum = models.ForeignKey(Forum, on_delete=models.CASCADE, related_name='threads')
@@ -302,14 +470,40 @@ class Thread(models.Model):
     comment_count = models.PositiveIntegerField(default=0)
     last_activity = models.DateTimeField(auto_now=True)
 
+    # Ranking scores, kept current by `manage.py refresh_thread_scores` (see api/thread_scores.py)
+    hot_score = models.FloatField(default=0)
+    top_week_score = models.PositiveIntegerField(default=0)
+    rising_score = models.FloatField(default=0)
+    scored_engagement = models.PositiveIntegerField(default=0)
+
+    # Maintained by a database trigger from title and content (see api/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
     votes = GenericRelation('Vote')
 
     class Meta:
         ordering = ['-is_pinned', '-last_activity']
+        indexes = [
+            # Match ThreadCursorPagination's ordering so listing pages are index range scans
+            models.Index(fields=['-is_pinned', '-last_activity', '-id']),
+            models.Index(fields=['forum', '-is_pinned', '-last_activity', '-id']),
+            # One per THREAD_RANKINGS ordering
+            models.Index(fields=['-hot_score', '-id']),
+            models.Index(fields=['-top_week_score', '-id']),
+            models.Index(fields=['-rising_score', '-id']),
+            GinIndex(fields=['search_vector'], name='thread_search_gin'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            # Rank new threads right away instead of waiting for the next score refresh
+            from .thread_scores import score_thread
+            score_thread(self)
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name='comments')
@@ -324,6 +518,15 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now_add=True)  # Overridden in save()
 
+    # Maintained by a database trigger from content (see api/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['thread', 'created_at', 'id']),
+            GinIndex(fields=['search_vector'], name='comment_search_gin'),
+        ]
+
     def __str__(self):
         return f'Comment by {self.author.username} on Thread {self.thread.id}'
 
@@ -339,6 +542,15 @@ class Subcomment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now_add=True)
 
+    # Maintained by a database trigger from content (see api/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['comment', 'created_at', 'id']),
+            GinIndex(fields=['search_vector'], name='subcomment_search_gin'),
+        ]
+
     def __str__(self):
         return f'Subcomment by {self.author.username} on Comment {self.comment.id}'
 
@@ -368,42 +580,13 @@ class Vote(models.Model):
 
     @classmethod
     def create_or_update_vote(cls, user, content_object, new_vote_type):
-        content_type = ContentType.objects.get_for_model(content_object)
-
-        vote, created = cls.objects.get_or_create(
-            user=user,
-            content_type=content_type,
-            object_id=content_object.id,
-            defaults={'vote_type': new_vote_type}
-        )
-
-        print("Creating or updating vote...")
-
-        if not created:
-            print("Vote exists, updating...")
-            # If changing from UPVOTE to something else, decrement like count
-            if vote.vote_type == 'UPVOTE' and new_vote_type != 'UPVOTE':
-                print("Decrementing like count...")
-                content_object.like_count -= 1
-                content_object.save()
-            # If changing to UPVOTE from something else, increment like count
-            elif vote.vote_type != 'UPVOTE' and new_vote_type == 'UPVOTE':
-                content_object.like_count += 1
-                content_object.save()
-
-            vote.vote_type = new_vote_type
-            vote.save()
-
-        return vote
+        from .votes import cast_vote
+        return cast_vote(user, content_object, new_vote_type)
 
     def update_content_like_count(self, increment=True):
-        content_object = self.content_object
-        if hasattr(content_object, 'like_count'):
-            if increment:
-                content_object.like_count += 1
-            else:
-                content_object.like_count -= 1
-            content_object.save()
+        model_class = self.content_type.model_class()
+        if model_class is not None and hasattr(model_class, 'like_count'):
+            adjust_counter(model_class, self.object_id, 'like_count', 1 if increment else -1)
 
     def save(self, *args, **kwargs):
         is_new = self._state.adding
@@ -415,9 +598,11 @@ class Vote(models.Model):
             
 
     def delete(self, *args, **kwargs):
-        if self.vote_type == 'UPVOTE':
+        result = super().delete(*args, **kwargs)
+        # Only decrement when this call actually removed the row
+        if result[0] and self.vote_type == 'UPVOTE':
             self.update_content_like_count(increment=False)
-        super().delete(*args, **kwargs)
+        return result
 
 class AiTutorChat(models.Model):
     user = models.ForeignKey(UserWithType, on_delete=models.CASCADE, related_name='ai_chats')
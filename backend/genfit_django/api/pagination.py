@@ -0,0 +1,151 @@
+import json
+from base64 import b64decode, b64encode
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class NotificationCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the notification feed.
+    Pages are fetched by (created_at, id) so deep pages cost the same as the first one.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class SearchPagination(PageNumberPagination):
+    """
+    Page numbers for search results. Ranks only exist per query, so there is no stable key to seek on,
+    and ranking already visits every match; clients rarely go past the first few pages.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 50
+
+
+class ChallengeSearchPagination(PageNumberPagination):
+    """
+    Page numbers for challenge search, which can be ordered by a computed distance.
+    Opt-in like ThreadCursorPagination: without `page` or `page_size` the full list is returned.
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.page_query_param not in request.query_params and self.page_size_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over a multi-column ordering.
+
+    DRF's CursorPagination only seeks on the first ordering field, so orderings that lead with a
+    low-cardinality column (a pinned flag, a like count) fall back to OFFSET within ties. Here the
+    cursor holds all ordering values of the last row and the next page is fetched with a row
+    comparison that a composite index on the same columns can serve. The last ordering field
+    must be unique (normally the id).
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    ordering = ('id',)
+
+    def __init__(self, ordering=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.fields = self._ordering_fields(queryset.model)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self._after(position))
+
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def _ordering_fields(self, model):
+        return [model._meta.get_field(name.lstrip('-')) for name in self.ordering]
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def _after(self, position):
+        """Rows strictly after `position` in self.ordering, e.g. a < A or (a = A and b < B) ..."""
+        condition = None
+        for name, field, value in reversed(list(zip(self.ordering, self.fields, position))):
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            bound = 'lte' if name.startswith('-') else 'gte'
+            strictly_after = Q(**{f'{field.name}__{lookup}': value})
+            if condition is None:
+                condition = strictly_after
+            else:
+                # The redundant bound on the current field keeps the whole condition index friendly
+                condition = strictly_after | (Q(**{field.name: value}) & condition)
+                condition &= Q(**{f'{field.name}__{bound}': value})
+        return condition
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            values = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [field.to_python(value) for field, value in zip(self.fields, values)]
+        except (TypeError, ValueError, DjangoValidationError, UnicodeError):
+            raise NotFound('Invalid cursor')
+
+    def encode_cursor(self, row):
+        values = [field.value_to_string(row) for field in self._ordering_fields(type(row))]
+        return b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+        return replace_query_param(url, self.page_size_query_param, self.page_size)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class ThreadCursorPagination(KeysetPagination):
+    """
+    Keyset pagination over the thread ordering (pinned first, then latest activity).
+
+    Pagination is opt-in: requests without `cursor` or `page_size` get the plain list that
+    existing clients expect.
+    """
+    ordering = ('-is_pinned', '-last_activity', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params and self.page_size_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
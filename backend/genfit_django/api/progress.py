@@ -0,0 +1,194 @@
+"""
+Progress ingestion for challenges and fitness goals.
+
+Progress is added in the database rather than read, modified and saved, so submissions arriving
+at the same time from the mobile app and the web add up instead of overwriting each other:
+- a participant's value is incremented and `finish_date` set in the same UPDATE, the first time the
+  new value reaches the challenge's target;
+- a goal's value is incremented, then a second UPDATE marks it COMPLETED only if it has just reached
+  its target, so exactly one submission sends the achievement notification.
+
+A submission may carry an idempotency key. The key is stored in the transaction that applies the
+progress, so a retry with the same key is reported as a duplicate instead of being counted again.
+"""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DateTimeField, F, OuterRef, Subquery, Value, When
+from django.db.models.lookups import GreaterThanOrEqual
+from django.utils import timezone
+
+from .leaderboards import refresh_participant
+from .models import Challenge, ChallengeParticipant, FitnessGoal, Notification, ProgressEvent, ProgressSubmission
+from .progress_history import record_progress
+
+MAX_BATCH_SIZE = 100
+IDEMPOTENCY_KEY_MAX_LENGTH = 64
+
+APPLIED = 'applied'
+DUPLICATE = 'duplicate'
+
+
+class ProgressError(Exception):
+    """A submission that can't be applied, with the HTTP status it is answered with."""
+
+    def __init__(self, detail, status_code=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+def clean_added_value(value):
+    """`value` as a finite, positive float."""
+    if isinstance(value, bool):
+        raise ProgressError("added_value must be a number.")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ProgressError("added_value must be a number.")
+    if not math.isfinite(number) or number <= 0:
+        raise ProgressError("added_value must be a positive number.")
+    return number
+
+
+def clean_idempotency_key(key):
+    if key is None:
+        return None
+    if not isinstance(key, str) or not 0 < len(key) <= IDEMPOTENCY_KEY_MAX_LENGTH:
+        raise ProgressError(f"idempotency_key must be a string of 1 to {IDEMPOTENCY_KEY_MAX_LENGTH} characters.")
+    return key
+
+
+def add_challenge_progress(challenge_id, user_id, added_value, now=None):
+    """
+    Add to a participant's value, setting finish_date if this reaches the target. Returns the number
+    of rows updated (0 if the user hasn't joined). Appends the progress to the history and refreshes
+    the cached leaderboard on commit.
+    """
+    now = now or timezone.now()
+    target = Subquery(Challenge.objects.filter(pk=OuterRef('challenge_id')).values('target_value')[:1])
+    updated = ChallengeParticipant.objects.filter(challenge_id=challenge_id, user_id=user_id).update(
+        current_value=F('current_value') + Value(added_value),
+        finish_date=Case(
+            When(finish_date__isnull=False, then=F('finish_date')),
+            When(GreaterThanOrEqual(F('current_value') + Value(added_value), target), then=Value(now)),
+            default=None,
+            output_field=DateTimeField(),
+        ),
+        # update() skips auto_now and post_save, so both are done here
+        last_updated=now,
+    )
+    if updated:
+        record_progress(user_id, ProgressEvent.CHALLENGE, challenge_id, added_value)
+        transaction.on_commit(lambda: refresh_participant(challenge_id, user_id))
+    return updated
+
+
+def add_goal_progress(goal, user, added_value, now=None):
+    """Add to one of the user's goals, completing it and notifying them if this reaches the target."""
+    now = now or timezone.now()
+    goals = FitnessGoal.objects.filter(pk=goal.pk, user=user)
+    if not goals.update(current_value=F('current_value') + Value(added_value), last_updated=now):
+        raise ProgressError("Goal not found.", 404)
+    record_progress(user.pk, ProgressEvent.GOAL, goal.pk, added_value)
+    # Only the submission that crosses the target finds the goal not yet completed
+    if goals.filter(current_value__gte=F('target_value')).exclude(status='COMPLETED').update(status='COMPLETED'):
+        Notification.objects.create(
+            recipient=user,
+            notification_type='ACHIEVEMENT',
+            title='Goal Completed!',
+            message=f'Congratulations! You have completed your goal: {goal.title}',
+            related_object_id=goal.pk,
+            related_object_type='FitnessGoal'
+        )
+
+
+def _apply_challenge(user, challenge, added_value, now):
+    if not challenge.start_date <= now <= challenge.end_date:
+        raise ProgressError("This challenge is not active", 403)
+    if not add_challenge_progress(challenge.pk, user.pk, added_value, now):
+        raise ProgressError("You are not a participant of this challenge.")
+
+
+def _claim_key(user, key, target_type, target_id, added_value):
+    """Store the key; False if an earlier submission already used it for the same progress."""
+    try:
+        with transaction.atomic():
+            ProgressSubmission.objects.create(
+                user=user, idempotency_key=key, target_type=target_type,
+                target_id=target_id, added_value=added_value,
+            )
+    except IntegrityError:
+        # The insert waits for a concurrent submission with the same key, so this row is committed
+        earlier = ProgressSubmission.objects.get(user=user, idempotency_key=key)
+        if (earlier.target_type, earlier.target_id, earlier.added_value) != (target_type, target_id, added_value):
+            raise ProgressError("idempotency_key was already used for a different submission.", 409)
+        return False
+    return True
+
+
+def submit_progress(user, target_type, target, added_value, idempotency_key=None, now=None):
+    """
+    Apply one submission to a Challenge or FitnessGoal instance. Returns APPLIED, or DUPLICATE when
+    the idempotency key was seen before; raises ProgressError when it can't be applied.
+    """
+    added_value = clean_added_value(added_value)
+    idempotency_key = clean_idempotency_key(idempotency_key)
+    now = now or timezone.now()
+    with transaction.atomic():
+        if idempotency_key and not _claim_key(user, idempotency_key, target_type, target.pk, added_value):
+            return DUPLICATE
+        if target_type == 'challenge':
+            _apply_challenge(user, target, added_value, now)
+        else:
+            add_goal_progress(target, user, added_value, now)
+    return APPLIED
+
+
+def submit_batch(user, entries):
+    """
+    Apply a list of {"type", "id", "added_value", "idempotency_key"} entries, each in its own
+    transaction so one bad entry doesn't undo the others. Returns one result per entry, in order.
+    """
+    if not isinstance(entries, list) or not entries:
+        raise ProgressError("entries must be a non-empty list.")
+    if len(entries) > MAX_BATCH_SIZE:
+        raise ProgressError(f"At most {MAX_BATCH_SIZE} entries can be submitted at once.")
+
+    ids = {'challenge': set(), 'goal': set()}
+    for entry in entries:
+        if isinstance(entry, dict) and entry.get('type') in ids and isinstance(entry.get('id'), int):
+            ids[entry['type']].add(entry['id'])
+    targets = {
+        'challenge': Challenge.objects.only('id', 'start_date', 'end_date').in_bulk(ids['challenge']),
+        'goal': FitnessGoal.objects.filter(user=user).only('id', 'title').in_bulk(ids['goal']),
+    }
+
+    now = timezone.now()
+    results = []
+    for index, entry in enumerate(entries):
+        result = {'index': index}
+        try:
+            if not isinstance(entry, dict) or entry.get('type') not in targets:
+                raise ProgressError("type must be 'challenge' or 'goal'.")
+            result.update(type=entry['type'], id=entry.get('id'))
+            target = targets[entry['type']].get(entry.get('id')) if isinstance(entry.get('id'), int) else None
+            if target is None:
+                raise ProgressError(f"{entry['type'].capitalize()} not found.", 404)
+            result['status'] = submit_progress(
+                user, entry['type'], target, entry.get('added_value'), entry.get('idempotency_key'), now,
+            )
+        except ProgressError as error:
+            result.update(status='error', detail=error.detail, status_code=error.status_code)
+        results.append(result)
+    return results
+
+
+def purge_idempotency_keys(now=None):
+    """Forget keys older than PROGRESS_IDEMPOTENCY_KEY_DAYS. Returns the number removed."""
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=settings.PROGRESS_IDEMPOTENCY_KEY_DAYS)
+    deleted, _ = ProgressSubmission.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,165 @@
+"""
+Progress history for goals and challenges.
+
+Every progress update appends a ProgressEvent with the amount added. `python manage.py rollup_progress`,
+run nightly, sums each finished day into ProgressDailyRollup. A history query reads the rollups and
+only the raw events after the target's last rolled-up day, so a chart costs the same whatever the
+target's age.
+
+Buckets are built in SQL: date_trunc groups days or weeks, and window functions give each bucket's
+total and the running total. Days follow settings.TIME_ZONE.
+"""
+import datetime
+
+from django.db.models import Count, DateField, Max, Sum, Window
+from django.db.models.functions import Trunc, TruncDate
+from django.utils import timezone
+
+from .models import ProgressEvent, ProgressDailyRollup
+
+PERIODS = ('day', 'week')
+MAX_HISTORY_DAYS = 366
+
+
+def record_progress(user_id, target_type, target_id, delta):
+    if delta:
+        ProgressEvent.objects.create(user_id=user_id, target_type=target_type, target_id=target_id, delta=delta)
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+
+
+def roll_up_progress(today=None, batch_size=1000):
+    """
+    Sum the events of every finished day not rolled up yet into ProgressDailyRollup; the last
+    rolled-up day is summed again, so a rerun is harmless. Returns the number of rollup rows written.
+    """
+    today = today or timezone.localdate()
+    events = ProgressEvent.objects.filter(recorded_at__lt=_day_start(today))
+    last_day = ProgressDailyRollup.objects.aggregate(last=Max('day'))['last']
+    if last_day is not None:
+        events = events.filter(recorded_at__gte=_day_start(last_day))
+
+    days = (
+        events
+        .annotate(day=TruncDate('recorded_at'))
+        .values('user_id', 'target_type', 'target_id', 'day')
+        .annotate(total=Sum('delta'), entries=Count('id'))
+        .order_by()
+    )
+    written = 0
+    batch = []
+    for row in days.iterator(chunk_size=batch_size):
+        batch.append(ProgressDailyRollup(**row))
+        if len(batch) >= batch_size:
+            written += _save_rollups(batch)
+            batch = []
+    if batch:
+        written += _save_rollups(batch)
+    return written
+
+
+def _save_rollups(rollups):
+    ProgressDailyRollup.objects.bulk_create(
+        rollups, update_conflicts=True,
+        unique_fields=['user', 'target_type', 'target_id', 'day'], update_fields=['total', 'entries'],
+    )
+    return len(rollups)
+
+
+def _buckets(queryset, date_expression, value_field, count_expression, period):
+    """Rows of `queryset` grouped into `period` buckets, with each bucket's total, entries and running total."""
+    bucket = Trunc(date_expression, period, output_field=DateField())
+    # Not named total/entries: annotations can't shadow the ProgressDailyRollup fields
+    rows = (
+        queryset
+        .annotate(
+            period_start=bucket,
+            bucket_total=Window(Sum(value_field), partition_by=[bucket]),
+            bucket_entries=Window(count_expression, partition_by=[bucket]),
+            running_total=Window(Sum(value_field), order_by=[bucket.asc()]),
+        )
+        .values('period_start', 'bucket_total', 'bucket_entries', 'running_total')
+        .distinct()
+        .order_by('period_start')
+    )
+    return [
+        {
+            'period_start': row['period_start'],
+            'total': row['bucket_total'],
+            'entries': row['bucket_entries'],
+            'running_total': row['running_total'],
+        }
+        for row in rows
+    ]
+
+
+def progress_history(user_id, target_type, target_id, period='day', days=90):
+    """
+    The user's progress on one target over the last `days` days in `period` buckets, oldest first:
+    [{'period_start', 'total', 'entries', 'running_total'}]. Running totals start at the range start.
+    """
+    since = timezone.localdate() - datetime.timedelta(days=days - 1)
+    target = {'user_id': user_id, 'target_type': target_type, 'target_id': target_id}
+
+    rollups = ProgressDailyRollup.objects.filter(**target, day__gte=since)
+    last_rolled = rollups.aggregate(last=Max('day'))['last']
+    raw_since = last_rolled + datetime.timedelta(days=1) if last_rolled else since
+    events = ProgressEvent.objects.filter(**target, recorded_at__gte=_day_start(raw_since))
+
+    buckets = _buckets(rollups, 'day', 'total', Sum('entries'), period)
+    offset = buckets[-1]['running_total'] if buckets else 0
+    for row in _buckets(events, 'recorded_at', 'delta', Count('id'), period):
+        row['running_total'] += offset
+        # A week can hold both rolled-up days and today's events
+        if buckets and buckets[-1]['period_start'] == row['period_start']:
+            last = buckets[-1]
+            last.update(total=last['total'] + row['total'], entries=last['entries'] + row['entries'],
+                        running_total=row['running_total'])
+        else:
+            buckets.append(row)
+    return buckets
+
+
+def current_streak(daily_buckets, today=None):
+    """Consecutive days with progress ending today, or yesterday if nothing was logged yet today."""
+    today = today or timezone.localdate()
+    logged = {bucket['period_start'] for bucket in daily_buckets}
+    day = today if today in logged else today - datetime.timedelta(days=1)
+    streak = 0
+    while day in logged:
+        streak += 1
+        day -= datetime.timedelta(days=1)
+    return streak
+
+
+def history_params(params):
+    """The validated `period` and `days` query parameters; raises ValueError when they are invalid."""
+    period = params.get('period', 'day')
+    if period not in PERIODS:
+        raise ValueError("period must be 'day' or 'week'.")
+    try:
+        days = int(params.get('days', 90))
+    except (TypeError, ValueError):
+        raise ValueError(f"days must be an integer from 1 to {MAX_HISTORY_DAYS}.")
+    if not 1 <= days <= MAX_HISTORY_DAYS:
+        raise ValueError(f"days must be an integer from 1 to {MAX_HISTORY_DAYS}.")
+    return period, days
+
+
+def history_response(user_id, target_type, target_id, period, days):
+    """The history response body for parameters validated by history_params()."""
+    buckets = progress_history(user_id, target_type, target_id, period, days)
+    total = sum(bucket['total'] for bucket in buckets)
+    body = {
+        'period': period,
+        'days': days,
+        'total': total,
+        'entries': sum(bucket['entries'] for bucket in buckets),
+        'average_per_day': total / days,
+        'buckets': buckets,
+    }
+    if period == 'day':
+        body['current_streak'] = current_streak(buckets)
+    return body
@@ -0,0 +1,69 @@
+"""
+Set-based deletion of forum content.
+
+Deleting a thread, comment or subcomment also removes everything below it and every vote on
+that content. Doing it row by row costs a few statements per reply. These helpers delete a whole
+subtree with a fixed number of statements and adjust the counters of the parents that remain.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Count
+
+from .counters import adjust_counter_for_many
+from .models import Thread, Comment, Subcomment, Vote
+
+
+def purge_forum_content(thread_ids=(), comment_ids=(), subcomment_ids=()):
+    """
+    Delete the given threads, comments and subcomments with their replies and votes.
+
+    Votes are deleted with one `content_type/object_id__in` statement per content type,
+    replies in bulk, and comment_count/subcomment_count of surviving threads and comments
+    are decremented by the number of their children that were removed.
+    """
+    with transaction.atomic():
+        thread_ids = set(thread_ids)
+        comment_ids = set(comment_ids)
+        comment_ids.update(Comment.objects.filter(thread_id__in=thread_ids).values_list('id', flat=True))
+        subcomment_ids = set(subcomment_ids)
+        subcomment_ids.update(Subcomment.objects.filter(comment_id__in=comment_ids).values_list('id', flat=True))
+
+        # Children removed from parents that stay
+        removed_comments = (
+            Comment.objects.filter(id__in=comment_ids).exclude(thread_id__in=thread_ids)
+            .values('thread_id').annotate(removed=Count('id'))
+        )
+        removed_subcomments = (
+            Subcomment.objects.filter(id__in=subcomment_ids).exclude(comment_id__in=comment_ids)
+            .values('comment_id').annotate(removed=Count('id'))
+        )
+        adjust_counter_for_many(Thread, 'comment_count', {row['thread_id']: -row['removed'] for row in removed_comments})
+        adjust_counter_for_many(Comment, 'subcomment_count', {row['comment_id']: -row['removed'] for row in removed_subcomments})
+
+        for model, ids in ((Thread, thread_ids), (Comment, comment_ids), (Subcomment, subcomment_ids)):
+            if ids:
+                Vote.objects.filter(content_type=ContentType.objects.get_for_model(model), object_id__in=ids).delete()
+
+        # Leaves first, so each delete finds nothing left to cascade to
+        if subcomment_ids:
+            Subcomment.objects.filter(id__in=subcomment_ids).delete()
+        if comment_ids:
+            Comment.objects.filter(id__in=comment_ids).delete()
+        if thread_ids:
+            Thread.objects.filter(id__in=thread_ids).delete()
+
+
+def remove_user_votes(user):
+    """
+    Delete all votes cast by user, taking their upvotes back off the content's like_count.
+    Each user has at most one vote per object, so every upvoted object loses exactly one like.
+    """
+    with transaction.atomic():
+        votes = Vote.objects.filter(user=user)
+        upvoted = {}
+        for content_type_id, object_id in votes.filter(vote_type='UPVOTE').values_list('content_type_id', 'object_id'):
+            upvoted.setdefault(content_type_id, []).append(object_id)
+        for content_type_id, object_ids in upvoted.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            adjust_counter_for_many(model, 'like_count', {object_id: -1 for object_id in object_ids})
+        votes.delete()
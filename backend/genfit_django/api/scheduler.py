@@ -0,0 +1,34 @@
+"""
+A small asyncio loop for running periodic jobs inside one process, for deployments without cron.
+
+Each run happens in a worker thread with fresh database connections, and a failing run is logged
+without stopping the loop.
+"""
+import asyncio
+import logging
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+def _run(job):
+    close_old_connections()
+    try:
+        return job()
+    finally:
+        close_old_connections()
+
+
+async def run_periodically(job, interval_seconds, on_result=None):
+    """Run `job()` every `interval_seconds` until cancelled, passing each result to `on_result`."""
+    while True:
+        try:
+            result = await sync_to_async(_run, thread_sensitive=False)(job)
+        except Exception:
+            logger.exception("Periodic job %s failed", getattr(job, '__name__', job))
+        else:
+            if on_result is not None:
+                on_result(result)
+        await asyncio.sleep(interval_seconds)
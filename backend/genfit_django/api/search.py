@@ -0,0 +1,64 @@
+"""
+Full-text search over threads, comments, subcomments and challenges.
+
+Each searchable model has a `search_vector` column filled by a database trigger (migration 0010)
+and a GIN index on it, so matching never scans the text columns. Results are ranked with ts_rank
+and carry a highlighted snippet of the matching text, HTML-escaped with the matches in <mark>.
+"""
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F
+from django.utils.html import escape
+
+from .models import Thread, Comment, Subcomment, Challenge
+
+# Must match the configuration the triggers build the vectors with
+SEARCH_CONFIG = 'english'
+
+# Postgres marks the matches with private-use characters, swapped for <mark> once the text is escaped
+START_SEL = '\ue000'
+STOP_SEL = '\ue001'
+
+SNIPPET_OPTIONS = {
+    'start_sel': START_SEL,
+    'stop_sel': STOP_SEL,
+    'min_words': 15,
+    'max_words': 35,
+    'max_fragments': 2,
+}
+
+# type -> (model, relations the result serializer reads, text the snippet is cut from)
+SEARCH_TARGETS = {
+    'thread': (Thread, ('author', 'forum'), 'content'),
+    'comment': (Comment, ('author', 'thread'), 'content'),
+    'subcomment': (Subcomment, ('author', 'comment'), 'content'),
+    'challenge': (Challenge, ('coach',), 'description'),
+}
+
+
+def search_query(text):
+    """Parse user input the way web search engines do: quoted phrases, OR, -excluded words."""
+    return SearchQuery(text, search_type='websearch', config=SEARCH_CONFIG)
+
+
+def search(kind, text):
+    """
+    Matches of `text` among one SEARCH_TARGETS type, best first, annotated with `rank` and `snippet`.
+    Postgres only builds the snippets for the rows that survive LIMIT, so a page costs one headline per row.
+    """
+    model, related, snippet_field = SEARCH_TARGETS[kind]
+    query = search_query(text)
+    return (
+        model.objects
+        .filter(search_vector=query)
+        .select_related(*related)
+        .annotate(
+            rank=SearchRank(F('search_vector'), query),
+            snippet=SearchHeadline(snippet_field, query, config=SEARCH_CONFIG, **SNIPPET_OPTIONS),
+        )
+        .order_by('-rank', '-id')
+    )
+
+
+def snippet_html(snippet):
+    """A snippet from search() as HTML: the stored text escaped, the matched words wrapped in <mark>."""
+    return escape(snippet).replace(START_SEL, '<mark>').replace(STOP_SEL, '</mark>')
@@ -1,21 +1,26 @@
+import math
+
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
-from django.utils import timezone
-from math import radians, sin, cos, sqrt, atan2
+from django.db.models import F, Q
 
-from ..models import Challenge, ChallengeParticipant
+from ..models import Challenge, ChallengeParticipant, ProgressEvent
 from ..serializers import ChallengeSerializer, ChallengeParticipantSerializer
 from ..utils import geocode_location
+from ..geo import within_radius
+from ..pagination import ChallengeSearchPagination
+from ..leaderboards import leaderboard_page, leaderboard_around, ranked_participants
+from ..progress import submit_progress, ProgressError, DUPLICATE
+from ..progress_history import history_params, history_response
 
 # Gets one challenge for the user. If user has joined to that challenge "joined" will be true. Otherwise flase
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_challenge_detail(request, challenge_id):
-    challenge = get_object_or_404(Challenge, id=challenge_id)
+    challenge = get_object_or_404(Challenge.objects.with_participant_stats(), id=challenge_id)
     challenge_data = ChallengeSerializer(challenge).data
 
     participants = ChallengeParticipant.objects.filter(challenge=challenge)
@@ -116,19 +121,37 @@ def leave_challenge(request, challenge_id):
 @permission_classes([IsAuthenticated])
 def update_progress(request, challenge_id):
     challenge = get_object_or_404(Challenge, id=challenge_id)
-    participant = ChallengeParticipant.objects.filter(challenge=challenge, user=request.user).first()
+    idempotency_key = request.headers.get('Idempotency-Key') or request.data.get('idempotency_key')
 
-    if not challenge.is_active():
-        return Response({"detail": "This challenge is not active"}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        result = submit_progress(request.user, 'challenge', challenge, request.data.get('added_value'), idempotency_key)
+    except ProgressError as error:
+        return Response({"detail": error.detail}, status=error.status_code)
 
-    if not participant:
-        return Response({"detail": "You are not a participant of this challenge."}, status=status.HTTP_400_BAD_REQUEST)
+    if result == DUPLICATE:
+        return Response({"detail": "Progress already recorded."}, status=status.HTTP_200_OK)
+    return Response({"detail": "Progress updated successfully!"}, status=status.HTTP_200_OK)
 
-    added_value = request.data.get('added_value')
-    if added_value is not None:
-        participant.update_progress(added_value)
 
-    return Response({"detail": "Progress updated successfully!"}, status=status.HTTP_200_OK)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def challenge_progress_history(request, challenge_id):
+    """The user's progress on a challenge per day or week, e.g. ?period=day&days=30."""
+    challenge = get_object_or_404(Challenge.objects.only('id'), id=challenge_id)
+    try:
+        period, days = history_params(request.query_params)
+    except ValueError as error:
+        return Response({"detail": str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(history_response(request.user.id, ProgressEvent.CHALLENGE, challenge.id, period, days))
+
+
+def _non_negative_int(value, default):
+    if value is None:
+        return default
+    number = int(value)
+    if number < 0:
+        raise ValueError
+    return number
 
 
 @api_view(['GET'])
@@ -136,6 +159,12 @@ def update_progress(request, challenge_id):
 def challenge_leaderboard(request, challenge_id):
     challenge = get_object_or_404(Challenge, id=challenge_id)
 
+    try:
+        offset = _non_negative_int(request.GET.get('offset'), 0)
+        limit = _non_negative_int(request.GET.get('limit'), None)
+    except ValueError:
+        return Response({"detail": "offset and limit must be non-negative integers."}, status=status.HTTP_400_BAD_REQUEST)
+
     # Default ordering rules
     order_fields = {
         'finish_date': 'finish_date',
@@ -144,22 +173,45 @@ def challenge_leaderboard(request, challenge_id):
         'username': 'user__username'
     }
 
+    if not any(request.GET.get(field) == '-' for field in order_fields):
+        # The default ranking is kept sorted in Redis when there is one
+        return Response(leaderboard_page(challenge.id, offset, limit), status=status.HTTP_200_OK)
+
     # Apply query param overrides if provided
     custom_order = []
     for field in ['finish_date', 'progress', 'joined_at', 'username']:
-        user_order = request.GET.get(field)
-        if user_order == '-':
-            field_path = order_fields[field]
-            if field_path.startswith('-'):
-                custom_order.append(field_path[1:])  # reverse if already descending
-            else:
-                custom_order.append(f'-{field_path}')
-        else:
-            custom_order.append(order_fields[field])
+        field_path = order_fields[field]
+        descending = field_path.startswith('-')
+        if request.GET.get(field) == '-':
+            descending = not descending  # reverse if already descending
+        expression = F(field_path.lstrip('-'))
+        custom_order.append(expression.desc() if descending else expression.asc())
+    custom_order.append(F('user_id').asc())
+
+    participants = ranked_participants(challenge.id, custom_order)
+    participants = participants[offset:offset + limit] if limit is not None else participants[offset:]
+    data = [
+        dict(ChallengeParticipantSerializer(participant).data, rank=participant.rank)
+        for participant in participants
+    ]
+    return Response(data, status=status.HTTP_200_OK)
 
-    participants = ChallengeParticipant.objects.filter(challenge=challenge).order_by(*custom_order)
-    serializer = ChallengeParticipantSerializer(participants, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def my_leaderboard_position(request, challenge_id):
+    """The requesting user's rank on the challenge leaderboard with `neighbours` entries on each side."""
+    challenge = get_object_or_404(Challenge, id=challenge_id)
+    try:
+        neighbours = min(_non_negative_int(request.GET.get('neighbours'), 2), 50)
+    except ValueError:
+        return Response({"detail": "neighbours must be a non-negative integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+    position = leaderboard_around(challenge.id, request.user.id, neighbours)
+    if position is None:
+        return Response({"detail": "You are not a participant of this challenge."}, status=status.HTTP_404_NOT_FOUND)
+    rank, total, entries = position
+    return Response({"rank": rank, "total": total, "entries": entries}, status=status.HTTP_200_OK)
 
 
 @api_view(['GET'])
@@ -170,7 +222,9 @@ def search_challenges(request):
     - active/passive status
     - user participation
     - age range
-    - location proximity
+    - location proximity (order_by=distance sorts nearest first; each result then has distance_km)
+
+    Pagination is opt-in with `page` / `page_size`.
     """
     # Get query parameters
     is_active = request.GET.get('is_active')
@@ -178,18 +232,28 @@ def search_challenges(request):
     min_age = request.GET.get('min_age')
     max_age = request.GET.get('max_age')
     location = request.GET.get('location')
-    radius_km = request.GET.get('radius_km', 10)  # Default 10km radius
-
-    # Start with all challenges
-    challenges = Challenge.objects.all()
-
-    # Filter by active/passive status
+    order_by = request.GET.get('order_by')
+    try:
+        radius_km = float(request.GET.get('radius_km', 10))  # Default 10km radius
+        if not math.isfinite(radius_km) or radius_km <= 0:
+            raise ValueError
+    except ValueError:
+        return Response(
+            {"error": "Invalid radius value. Must be a valid number."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if order_by not in (None, 'distance'):
+        return Response({"error": "order_by must be 'distance'"}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Start with all challenges, with their participant stats annotated in the same query
+    challenges = Challenge.objects.with_participant_stats(request.user)
+
+    # Filter by active/passive status, through the (status, ...) indexes kept by api.lifecycle
     if is_active is not None:
-        now = timezone.now()
         if is_active.lower() == 'true':
-            challenges = challenges.filter(start_date__lte=now, end_date__gte=now)
+            challenges = challenges.filter(status='ACTIVE')
         else:
-            challenges = challenges.filter(Q(start_date__gt=now) | Q(end_date__lt=now))
+            challenges = challenges.filter(status__in=['UPCOMING', 'ENDED'])
 
     # Filter by user participation
     if user_participating is not None:
@@ -207,40 +271,25 @@ def search_challenges(request):
     # Filter by location proximity
     if location:
         # Get coordinates for the search location
+        # A place not looked up before is asked of the provider, waiting at most GEOCODING_TIMEOUT_SECONDS
         lat, lon = geocode_location(location)
-        if lat is not None and lon is not None:
-            # Convert radius from km to degrees (approximate)
-            if radius_km:
-                try:
-                    radius_deg = float(radius_km) / 111.32
-                except ValueError:
-                    return Response(
-                        {"error": "Invalid radius value. Must be a valid number."},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            # Filter challenges within the radius
-            challenges = challenges.filter(
-                latitude__isnull=False,
-                longitude__isnull=False,
-                latitude__range=(lat - radius_deg, lat + radius_deg),
-                longitude__range=(lon - radius_deg, lon + radius_deg)
+        if lat is None or lon is None:
+            return Response(
+                {"error": "Location could not be resolved. Try a different place name."},
+                status=status.HTTP_400_BAD_REQUEST
             )
-
-            # Calculate exact distances and filter
-            def calculate_distance(lat1, lon1, lat2, lon2):
-                R = 6371  # Earth's radius in kilometers
-                lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-                dlat = lat2 - lat1
-                dlon = lon2 - lon1
-                a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-                c = 2 * atan2(sqrt(a), sqrt(1-a))
-                return R * c
-
-            # Filter challenges by exact distance
-            challenges = [
-                challenge for challenge in challenges
-                if calculate_distance(lat, lon, challenge.latitude, challenge.longitude) <= float(radius_km)
-            ]
+        # Bounding box through the (latitude, longitude) index, then the exact distance in SQL
+        challenges = within_radius(challenges, lat, lon, radius_km)
+        if order_by == 'distance':
+            challenges = challenges.order_by('distance_km', 'id')
+    if not challenges.query.order_by:
+        challenges = challenges.order_by('id')
+
+    paginator = ChallengeSearchPagination()
+    page = paginator.paginate_queryset(challenges, request)
+    if page is not None:
+        serializer = ChallengeSerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
 
     # Serialize the results
     serializer = ChallengeSerializer(challenges, many=True, context={'request': request})
@@ -2,11 +2,14 @@ from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.db import transaction
 from django.utils import timezone
 from django.db.models import Q
 
-from ..models import FitnessGoal, Notification, UserWithType, MentorMenteeRelationship
+from ..models import FitnessGoal, Notification, UserWithType, MentorMenteeRelationship, ProgressEvent
 from ..serializers import FitnessGoalSerializer, FitnessGoalUpdateSerializer
+from ..goal_sweeper import sweep_inactive_goals
+from ..progress_history import record_progress, history_params, history_response
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
@@ -106,13 +109,18 @@ def fitness_goal_detail(request, goal_id):
 @api_view(['PATCH'])
 @permission_classes([IsAuthenticated])
 def update_goal_progress(request, goal_id):
-    try:
-        goal = FitnessGoal.objects.get(user=request.user, id=goal_id)
-    except FitnessGoal.DoesNotExist:
-        return Response(status=status.HTTP_404_NOT_FOUND)
+    # The goal row stays locked until the new value and its progress event are both written
+    with transaction.atomic():
+        try:
+            goal = FitnessGoal.objects.select_for_update().get(user=request.user, id=goal_id)
+        except FitnessGoal.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        previous_value = goal.current_value
+        serializer = FitnessGoalUpdateSerializer(goal, data=request.data, partial=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    serializer = FitnessGoalUpdateSerializer(goal, data=request.data, partial=True)
-    if serializer.is_valid():
         # Update progress and check if goal is completed
         if 'current_value' in request.data:
             if request.data['current_value'] >= goal.target_value:
@@ -128,13 +136,28 @@ def update_goal_progress(request, goal_id):
                 )
             else:
                 serializer.save()
+            record_progress(request.user.id, ProgressEvent.GOAL, goal.id, goal.current_value - previous_value)
 
         # Handle goal restart
         if 'status' in request.data and request.data['status'] == 'RESTARTED':
             serializer.save(current_value=0.0, start_date=timezone.now())
 
-        return Response(serializer.data)
-    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    return Response(serializer.data)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def goal_progress_history(request, goal_id):
+    """Progress logged on a goal per day or week, for its owner and mentor, e.g. ?period=week&days=180."""
+    try:
+        goal = FitnessGoal.objects.only('id', 'user_id').get(Q(user=request.user) | Q(mentor=request.user), id=goal_id)
+    except FitnessGoal.DoesNotExist:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        period, days = history_params(request.query_params)
+    except ValueError as error:
+        return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(history_response(goal.user_id, ProgressEvent.GOAL, goal.id, period, days))
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -160,26 +183,6 @@ def restart_goal(request, goal_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def check_inactive_goals(request):
-    # Get goals that haven't been updated in the last 7 days
-    inactive_threshold = timezone.now() - timezone.timedelta(days=7)
-    inactive_goals = FitnessGoal.objects.filter(
-        user=request.user,
-        status='ACTIVE',
-        last_updated__lt=inactive_threshold
-    )
-
-    for goal in inactive_goals:
-        # Create notification for inactive goal
-        Notification.objects.create(
-            recipient=request.user,
-            notification_type='GOAL_INACTIVE',
-            title='Inactive Goal Alert',
-            message=f'Your goal "{goal.title}" has been inactive for 7 days. Keep pushing!',
-            related_object_id=goal.id,
-            related_object_type='FitnessGoal'
-        )
-        # Update goal status to inactive
-        goal.status = 'INACTIVE'
-        goal.save()
-
-    return Response({'message': f'{len(inactive_goals)} goals marked as inactive'})
\ No newline at end of file
+    # The same sweep `python manage.py sweep_goals` runs for everyone, limited to this user's goals
+    marked = sweep_inactive_goals(user=request.user)
+    return Response({'message': f'{marked} goals marked as inactive'})
\ No newline at end of file
@@ -1,9 +1,13 @@
 from rest_framework import status, generics
 from rest_framework.response import Response
-from ..models import Comment, Subcomment
-from ..serializers import CommentSerializer, SubcommentSerializer
+from ..models import Thread, Comment, Subcomment
+from ..counters import adjust_counter
+from ..serializers import CommentSerializer, SubcommentSerializer, CommentTreeSerializer
+from ..pagination import KeysetPagination
+from ..viewer_state import with_viewer_state
 from rest_framework.decorators import api_view, permission_classes
 from django.shortcuts import get_object_or_404
+from django.db.models import Prefetch
 from rest_framework.permissions import IsAuthenticated
 
 
@@ -18,9 +22,7 @@ def add_comment(request, thread_id):
     if serializer.is_valid():
         comment = serializer.save()
         # Increment the comment count for the parent thread
-        thread = comment.thread
-        thread.comment_count += 1
-        thread.save(update_fields=['comment_count'])
+        adjust_counter(Thread, comment.thread_id, 'comment_count', 1)
         return Response(CommentSerializer(comment).data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -59,15 +61,15 @@ def update_comment(request, comment_id):
 @permission_classes([IsAuthenticated])
 def get_comment(request, comment_id):
     comment = get_object_or_404(Comment, pk=comment_id)
-    return Response(CommentSerializer(comment).data, status=status.HTTP_200_OK)
+    return Response(CommentSerializer(comment, context={'request': request}).data, status=status.HTTP_200_OK)
 
 
 # 5. Get all comments for a Thread sorted by created_at
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_comments_for_thread_by_date(request, thread_id):
-    comments = Comment.objects.filter(thread_id=thread_id).order_by('created_at')
-    serializer = CommentSerializer(comments, many=True)
+    comments = with_viewer_state(Comment.objects.filter(thread_id=thread_id).select_related('author').order_by('created_at'), request.user)
+    serializer = CommentSerializer(comments, many=True, context={'request': request})
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -75,8 +77,8 @@ def get_comments_for_thread_by_date(request, thread_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_comments_for_thread_by_likes(request, thread_id):
-    comments = Comment.objects.filter(thread_id=thread_id).order_by('-like_count')
-    serializer = CommentSerializer(comments, many=True)
+    comments = with_viewer_state(Comment.objects.filter(thread_id=thread_id).select_related('author').order_by('-like_count'), request.user)
+    serializer = CommentSerializer(comments, many=True, context={'request': request})
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -91,9 +93,7 @@ def add_subcomment(request, comment_id):
     if serializer.is_valid():
         subcomment = serializer.save()
         # Increment the subcomment count for the parent comment
-        comment = subcomment.comment
-        comment.subcomment_count += 1
-        comment.save(update_fields=['subcomment_count'])
+        adjust_counter(Comment, subcomment.comment_id, 'subcomment_count', 1)
         return Response(SubcommentSerializer(subcomment).data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -131,15 +131,15 @@ def update_subcomment(request, subcomment_id):
 @permission_classes([IsAuthenticated])
 def get_subcomment(request, subcomment_id):
     subcomment = get_object_or_404(Subcomment, pk=subcomment_id)
-    return Response(SubcommentSerializer(subcomment).data, status=status.HTTP_200_OK)
+    return Response(SubcommentSerializer(subcomment, context={'request': request}).data, status=status.HTTP_200_OK)
 
 
 # 11. Get all Subcomments for a Comment sorted by created_at
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_subcomments_for_comment_by_date(request, comment_id):
-    subcomments = Subcomment.objects.filter(comment_id=comment_id).order_by('created_at')
-    serializer = SubcommentSerializer(subcomments, many=True)
+    subcomments = with_viewer_state(Subcomment.objects.filter(comment_id=comment_id).select_related('author').order_by('created_at'), request.user)
+    serializer = SubcommentSerializer(subcomments, many=True, context={'request': request})
     return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -147,6 +147,74 @@ def get_subcomments_for_comment_by_date(request, comment_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_subcomments_for_comment_by_likes(request, comment_id):
-    subcomments = Subcomment.objects.filter(comment_id=comment_id).order_by('-like_count')
-    serializer = SubcommentSerializer(subcomments, many=True)
+    subcomments = with_viewer_state(Subcomment.objects.filter(comment_id=comment_id).select_related('author').order_by('-like_count'), request.user)
+    serializer = SubcommentSerializer(subcomments, many=True, context={'request': request})
     return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+# Orderings for the comment tree; the trailing id keeps cursor positions unique
+TREE_ORDERINGS = {
+    'date': ('created_at', 'id'),
+    'likes': ('-like_count', 'created_at', 'id'),
+}
+DEFAULT_TREE_REPLIES = 3
+MAX_TREE_REPLIES = 20
+
+
+def _tree_sort(request):
+    sort = request.query_params.get('sort', 'date')
+    if sort not in TREE_ORDERINGS:
+        return None
+    return sort
+
+
+# 13. Get a page of a Thread's comments, each with its first replies
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_comment_tree(request, thread_id):
+    get_object_or_404(Thread, pk=thread_id)
+    sort = _tree_sort(request)
+    if sort is None:
+        return Response({'error': f"sort must be one of: {', '.join(TREE_ORDERINGS)}"}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        replies = min(max(int(request.query_params.get('replies', DEFAULT_TREE_REPLIES)), 0), MAX_TREE_REPLIES)
+    except ValueError:
+        return Response({'error': 'replies must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    ordering = TREE_ORDERINGS[sort]
+    # Sliced prefetches run as one windowed query (ROW_NUMBER() per comment) for the whole page.
+    # One extra reply is fetched to tell whether a comment has more.
+    top_subcomments = with_viewer_state(
+        Subcomment.objects.select_related('author').order_by(*ordering), request.user
+    )[:replies + 1]
+    comments = with_viewer_state(
+        Comment.objects.filter(thread_id=thread_id).select_related('author'), request.user
+    ).prefetch_related(Prefetch('subcomments', queryset=top_subcomments, to_attr='top_subcomments'))
+
+    paginator = KeysetPagination(ordering)
+    page = paginator.paginate_queryset(comments, request)
+    serializer = CommentTreeSerializer(page, many=True, context={
+        'request': request,
+        'sort': sort,
+        'replies': replies,
+        'reply_paginator': KeysetPagination(ordering),
+    })
+    return paginator.get_paginated_response(serializer.data)
+
+
+# 14. Get a page of a Comment's replies, continuing from the comment tree
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_comment_replies(request, comment_id):
+    get_object_or_404(Comment, pk=comment_id)
+    sort = _tree_sort(request)
+    if sort is None:
+        return Response({'error': f"sort must be one of: {', '.join(TREE_ORDERINGS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    subcomments = with_viewer_state(
+        Subcomment.objects.filter(comment_id=comment_id).select_related('author'), request.user
+    )
+    paginator = KeysetPagination(TREE_ORDERINGS[sort])
+    page = paginator.paginate_queryset(subcomments, request)
+    serializer = SubcommentSerializer(page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
@@ -1,15 +1,32 @@
+from django.conf import settings
+from django.core.cache import cache
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from ..models import Forum, Thread, ThreadBookmark
 from ..serializers import ForumSerializer, ThreadListSerializer, ThreadDetailSerializer, ThreadBookmarkSerializer
 from ..permissions import IsAuthorOrReadOnly
+from ..view_counts import record_thread_view, viewer_key
+from ..utils import FORUM_LIST_CACHE_KEY
+from ..pagination import ThreadCursorPagination, KeysetPagination
+from ..viewer_state import with_viewer_state
+from ..purge import purge_forum_content
+from ..thread_scores import THREAD_RANKINGS, ranked_threads
 
 class ForumViewSet(viewsets.ModelViewSet):
-    queryset = Forum.objects.all()
+    queryset = Forum.objects.select_related('created_by').with_thread_stats()
     serializer_class = ForumSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
+    def list(self, request, *args, **kwargs):
+        # The listing is the same for every user; signals drop it when forums or threads change
+        data = cache.get(FORUM_LIST_CACHE_KEY)
+        if data is None:
+            serializer = self.get_serializer(self.filter_queryset(self.get_queryset()), many=True)
+            data = serializer.data
+            cache.set(FORUM_LIST_CACHE_KEY, data, settings.FORUM_LIST_CACHE_SECONDS)
+        return Response(data)
+
     def get_permissions(self):
         """
         Override get_permissions to ensure only admin users can create/modify forums
@@ -21,13 +38,24 @@ class ForumViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def threads(self, request, pk=None):
         forum = self.get_object()
-        threads = Thread.objects.filter(forum=forum)
-        serializer = ThreadListSerializer(threads, many=True)
+        threads = with_viewer_state(Thread.objects.filter(forum=forum).select_related('author', 'forum'), request.user)
+
+        paginator = ThreadCursorPagination()
+        page = paginator.paginate_queryset(threads, request, view=self)
+        if page is not None:
+            serializer = ThreadListSerializer(page, many=True, context={'request': request})
+            return paginator.get_paginated_response(serializer.data)
+
+        serializer = ThreadListSerializer(threads, many=True, context={'request': request})
         return Response(serializer.data)
 
 class ThreadViewSet(viewsets.ModelViewSet):
-    queryset = Thread.objects.all()
+    queryset = Thread.objects.select_related('author', 'forum')
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly]
+    pagination_class = ThreadCursorPagination
+
+    def get_queryset(self):
+        return with_viewer_state(super().get_queryset(), self.request.user)
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -37,10 +65,27 @@ class ThreadViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def list(self, request, *args, **kwargs):
+        """List threads, or with ?sort=hot|top_week|rising a ranked page of them"""
+        sort = request.query_params.get('sort')
+        if sort is None:
+            return super().list(request, *args, **kwargs)
+        if sort not in THREAD_RANKINGS:
+            return Response(
+                {'error': f"sort must be one of: {', '.join(THREAD_RANKINGS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Ranked listings are always paginated; each ranking has its own (score, id) index
+        paginator = KeysetPagination(THREAD_RANKINGS[sort])
+        page = paginator.paginate_queryset(ranked_threads(self.get_queryset(), sort), request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     def retrieve(self, request, *args, **kwargs):
         instance = self.get_object()
-        instance.view_count += 1
-        instance.save()
+        # With Redis, views are buffered and flushed by the flush_thread_views command, so reading doesn't write the row
+        instance.view_count += record_thread_view(instance.pk, viewer_key(request))
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
@@ -53,6 +98,9 @@ class ThreadViewSet(viewsets.ModelViewSet):
         self.perform_update(serializer)
         return Response(serializer.data)
 
+    def perform_destroy(self, instance):
+        purge_forum_content(thread_ids=[instance.pk])
+
     def destroy(self, request, *args, **kwargs):
         """Delete a thread (only by author)"""
         instance = self.get_object()
@@ -80,13 +128,15 @@ class ThreadViewSet(viewsets.ModelViewSet):
     def bookmarked(self, request):
         """List threads bookmarked by the current user"""
         user = request.user
-        bookmarked_threads = Thread.objects.filter(bookmarks__user=user)
+        bookmarked_threads = with_viewer_state(
+            Thread.objects.filter(bookmarks__user=user).select_related('author', 'forum'), user
+        )
         
         page = self.paginate_queryset(bookmarked_threads)
         if page is not None:
-            serializer = ThreadListSerializer(page, many=True)
+            serializer = ThreadListSerializer(page, many=True, context=self.get_serializer_context())
             return self.get_paginated_response(serializer.data)
             
-        serializer = ThreadListSerializer(bookmarked_threads, many=True)
+        serializer = ThreadListSerializer(bookmarked_threads, many=True, context=self.get_serializer_context())
         return Response(serializer.data)
  
\ No newline at end of file
@@ -0,0 +1,21 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..progress import submit_batch, ProgressError
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def submit_progress_batch(request):
+    """
+    Progress for several challenges and goals in one request, e.g. what the mobile app queued offline.
+    The body is {"entries": [...]} or the bare list. Each entry is applied on its own; the response has one result per entry, in order.
+    """
+    entries = request.data if isinstance(request.data, list) else request.data.get('entries')
+    try:
+        results = submit_batch(request.user, entries)
+    except ProgressError as error:
+        return Response({"detail": error.detail}, status=error.status_code)
+    return Response({"results": results}, status=status.HTTP_200_OK)
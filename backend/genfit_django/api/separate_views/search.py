@@ -0,0 +1,38 @@
+from rest_framework import status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ..search import SEARCH_TARGETS, search
+from ..pagination import SearchPagination
+from ..serializers import (
+    ThreadSearchResultSerializer, CommentSearchResultSerializer,
+    SubcommentSearchResultSerializer, ChallengeSearchResultSerializer,
+)
+
+RESULT_SERIALIZERS = {
+    'thread': ThreadSearchResultSerializer,
+    'comment': CommentSearchResultSerializer,
+    'subcomment': SubcommentSearchResultSerializer,
+    'challenge': ChallengeSearchResultSerializer,
+}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_content(request):
+    """
+    Ranked full-text search, e.g. /api/search/?q=morning run&type=thread.
+    `type` is one of thread, comment, subcomment, challenge (default thread).
+    """
+    text = request.query_params.get('q', '').strip()
+    kind = request.query_params.get('type', 'thread')
+    if not text:
+        return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+    if kind not in SEARCH_TARGETS:
+        return Response({'error': f"type must be one of: {', '.join(SEARCH_TARGETS)}"}, status=status.HTTP_400_BAD_REQUEST)
+
+    paginator = SearchPagination()
+    page = paginator.paginate_queryset(search(kind, text), request)
+    serializer = RESULT_SERIALIZERS[kind](page, many=True, context={'request': request})
+    return paginator.get_paginated_response(serializer.data)
@@ -3,8 +3,14 @@ from django.contrib.auth import password_validation
 from django.core.validators import RegexValidator
 from django.contrib.auth import get_user_model
 from django.db.models import Q
+from django.urls import reverse
 from django.utils import timezone
+from rest_framework.utils.urls import replace_query_param
 from .utils import geocode_location
+from .purge import purge_forum_content
+from .viewer_state import viewer_vote, viewer_bookmarked
+from .search import snippet_html
+from .votes import get_vote_target, cast_vote
 from .models import Notification, Report, UserWithType, FitnessGoal, Profile, ContactSubmission, Forum, Thread, Comment, Subcomment, Vote, Challenge, ChallengeParticipant, AiTutorChat, AiTutorResponse, UserAiMessage, DailyAdvice, MentorMenteeRelationship, ThreadBookmark
 
 
@@ -113,6 +119,15 @@ class NotificationSerializer(serializers.ModelSerializer):
         return instance
 
     def get_target_thread_id(self, obj):
+        # Resolved when the notification was written
+        if obj.target_thread_id is not None:
+            return obj.target_thread_id
+
+        # Prefer ids resolved in bulk by the view (see utils.resolve_target_thread_ids)
+        target_thread_ids = self.context.get('target_thread_ids')
+        if target_thread_ids is not None and obj.id in target_thread_ids:
+            return target_thread_ids[obj.id]
+
         # Determine the thread id that the notification should navigate to
         try:
             if obj.related_object_type == 'Thread' and obj.related_object_id:
@@ -137,7 +152,7 @@ class FitnessGoalSerializer(serializers.ModelSerializer):
     class Meta:
         model = FitnessGoal
         fields = '__all__'
-        read_only_fields = ('user', 'current_value', 'status', 'last_updated', 'progress_percentage')
+        read_only_fields = ('user', 'current_value', 'status', 'last_updated', 'deadline_notified_at', 'progress_percentage')
 
     def validate_mentor(self, value):
         return value
@@ -176,44 +191,54 @@ class ProfileSerializer(serializers.ModelSerializer):
 
 class ForumSerializer(serializers.ModelSerializer):
     thread_count = serializers.IntegerField(read_only=True)
+    latest_activity = serializers.DateTimeField(read_only=True)
     created_by = serializers.StringRelatedField(read_only=True)
     
     class Meta:
         model = Forum
         fields = ['id', 'title', 'description', 'created_at', 'updated_at', 
-                 'created_by', 'is_active', 'order', 'thread_count']
+                 'created_by', 'is_active', 'order', 'thread_count', 'latest_activity']
         read_only_fields = ['created_at', 'updated_at']
 
 class ThreadListSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
     forum = serializers.StringRelatedField(read_only=True)
     comment_count = serializers.IntegerField(read_only=True)
+    is_bookmarked = serializers.SerializerMethodField()
+    my_vote = serializers.SerializerMethodField()
     
     class Meta:
         model = Thread
         fields = ['id', 'title', 'author', 'forum', 'created_at', 'updated_at',
                  'is_pinned', 'is_locked', 'view_count', 'like_count', 'last_activity',
-                 'comment_count']
+                 'comment_count', 'is_bookmarked', 'my_vote']
         read_only_fields = ['created_at', 'updated_at', 'view_count', 'like_count', 'last_activity']
 
+    def get_is_bookmarked(self, obj):
+        return viewer_bookmarked(obj, self.context.get('request'))
+
+    def get_my_vote(self, obj):
+        return viewer_vote(obj, self.context.get('request'))
+
 class ThreadDetailSerializer(serializers.ModelSerializer):
     author = serializers.StringRelatedField(read_only=True)
     forum = serializers.PrimaryKeyRelatedField(queryset=Forum.objects.all())
     comment_count = serializers.IntegerField(read_only=True)
     is_bookmarked = serializers.SerializerMethodField()
+    my_vote = serializers.SerializerMethodField()
     
     class Meta:
         model = Thread
         fields = ['id', 'title', 'content', 'author', 'forum', 'created_at', 
                  'updated_at', 'is_pinned', 'is_locked', 'view_count', 
-                 'like_count', 'last_activity', 'comment_count', 'is_bookmarked']
+                 'like_count', 'last_activity', 'comment_count', 'is_bookmarked', 'my_vote']
         read_only_fields = ['created_at', 'updated_at', 'view_count', 'like_count', 'last_activity', 'is_bookmarked']
 
     def get_is_bookmarked(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            return ThreadBookmark.objects.filter(user=request.user, thread=obj).exists()
-        return False
+        return viewer_bookmarked(obj, self.context.get('request'))
+
+    def get_my_vote(self, obj):
+        return viewer_vote(obj, self.context.get('request'))
 
     def update(self, instance, validated_data):
         instance.title = validated_data.get('title', instance.title)
@@ -234,9 +259,10 @@ class ThreadBookmarkSerializer(serializers.ModelSerializer):
 
 
 class CommentSerializer(serializers.ModelSerializer):
-    author_id = serializers.IntegerField(source='author.id', read_only=True)
-    thread_id = serializers.IntegerField(source='thread.id', read_only=True)
+    author_id = serializers.IntegerField(read_only=True)
+    thread_id = serializers.IntegerField(read_only=True)
     author_username = serializers.CharField(source='author.username', read_only=True)
+    my_vote = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
@@ -249,10 +275,14 @@ class CommentSerializer(serializers.ModelSerializer):
             'like_count',
             'subcomment_count',
             'created_at',
-            'updated_at'
+            'updated_at',
+            'my_vote'
         ]
         read_only_fields = ['id', 'author_id', 'thread_id', 'created_at', 'updated_at', 'subcomment_count', 'like_count']
 
+    def get_my_vote(self, obj):
+        return viewer_vote(obj, self.context.get('request'))
+
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
         thread_id = self.context.get('thread_id')
@@ -270,21 +300,13 @@ class CommentSerializer(serializers.ModelSerializer):
         return instance
 
     def delete(self, instance):
-        thread = instance.thread
-        thread.comment_count = max(0, thread.comment_count - 1)
-        thread.save(update_fields=['comment_count'])
-
-        for sub in instance.subcomments.all():
-            sub.votes.all().delete()
-            sub.delete()
-
-        instance.votes.all().delete()
-        instance.delete()
+        purge_forum_content(comment_ids=[instance.id])
 
 class SubcommentSerializer(serializers.ModelSerializer):
-    author_id = serializers.IntegerField(source='author.id', read_only=True)
-    comment_id = serializers.IntegerField(source='comment.id', read_only=True)
+    author_id = serializers.IntegerField(read_only=True)
+    comment_id = serializers.IntegerField(read_only=True)
     author_username = serializers.CharField(source='author.username', read_only=True)
+    my_vote = serializers.SerializerMethodField()
 
     class Meta:
         model = Subcomment
@@ -296,10 +318,14 @@ class SubcommentSerializer(serializers.ModelSerializer):
             'content',
             'like_count',
             'created_at',
-            'updated_at'
+            'updated_at',
+            'my_vote'
         ]
         read_only_fields = ['id', 'author_id', 'comment_id', 'created_at', 'updated_at', 'like_count']
 
+    def get_my_vote(self, obj):
+        return viewer_vote(obj, self.context.get('request'))
+
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
         comment_id = self.context.get('comment_id')
@@ -317,13 +343,80 @@ class SubcommentSerializer(serializers.ModelSerializer):
         return instance
 
     def delete(self, instance):
-        comment = instance.comment
-        instance.votes.all().delete()
-        instance.delete()
+        purge_forum_content(subcomment_ids=[instance.id])
+
+
+class CommentTreeSerializer(CommentSerializer):
+    """
+    A comment with its first replies, as returned by the thread comment tree.
+    Expects `top_subcomments` prefetched with one row more than context['replies'],
+    so a link to the remaining replies is only given when there are any.
+    """
+    subcomments = serializers.SerializerMethodField()
+    more_replies = serializers.SerializerMethodField()
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ['subcomments', 'more_replies']
+
+    def get_subcomments(self, obj):
+        replies = obj.top_subcomments[:self.context['replies']]
+        return SubcommentSerializer(replies, many=True, context=self.context).data
+
+    def get_more_replies(self, obj):
+        limit = self.context['replies']
+        if len(obj.top_subcomments) <= limit:
+            return None
+        paginator = self.context['reply_paginator']
+        url = self.context['request'].build_absolute_uri(reverse('get_comment_replies', args=[obj.id]))
+        url = replace_query_param(url, 'sort', self.context['sort'])
+        if limit:
+            url = replace_query_param(url, paginator.cursor_query_param, paginator.encode_cursor(obj.top_subcomments[limit - 1]))
+        return url
+
+class SearchResultSerializer(serializers.ModelSerializer):
+    """
+    Base for search results: expects the `rank` and `snippet` annotations added by api.search.search.
+    The snippet is HTML: the stored text escaped, with the matched words wrapped in <mark>.
+    """
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.SerializerMethodField()
+
+    def get_snippet(self, obj):
+        return snippet_html(obj.snippet)
+
+class ThreadSearchResultSerializer(SearchResultSerializer):
+    author_username = serializers.CharField(source='author.username', read_only=True)
+    forum_title = serializers.CharField(source='forum.title', read_only=True)
+
+    class Meta:
+        model = Thread
+        fields = ['id', 'title', 'forum_id', 'forum_title', 'author_username', 'created_at',
+                  'like_count', 'comment_count', 'rank', 'snippet']
+
+class CommentSearchResultSerializer(SearchResultSerializer):
+    author_username = serializers.CharField(source='author.username', read_only=True)
+    thread_title = serializers.CharField(source='thread.title', read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ['id', 'thread_id', 'thread_title', 'author_username', 'created_at', 'like_count', 'rank', 'snippet']
+
+class SubcommentSearchResultSerializer(SearchResultSerializer):
+    author_username = serializers.CharField(source='author.username', read_only=True)
+    thread_id = serializers.IntegerField(source='comment.thread_id', read_only=True)
+
+    class Meta:
+        model = Subcomment
+        fields = ['id', 'comment_id', 'thread_id', 'author_username', 'created_at', 'like_count', 'rank', 'snippet']
+
+class ChallengeSearchResultSerializer(SearchResultSerializer):
+    coach_username = serializers.CharField(source='coach.username', read_only=True)
+
+    class Meta:
+        model = Challenge
+        fields = ['id', 'title', 'challenge_type', 'difficulty_level', 'location', 'start_date', 'end_date',
+                  'coach_username', 'rank', 'snippet']
 
-        comment.subcomment_count = max(0, comment.subcomment_count - 1)
-        comment.save(update_fields=['subcomment_count'])
-        
 class VoteSerializer(serializers.ModelSerializer):
     user_username = serializers.CharField(source='user.username', read_only=True)
 
@@ -346,16 +439,10 @@ class VoteSerializer(serializers.ModelSerializer):
         object_id = validated_data.get('object_id')
         vote_type = validated_data.get('vote_type')
         
-        # Get the actual content object
-        content_object = content_type.get_object_for_this_type(id=object_id)
-        
-        # Create or update the vote using the class method
-        vote = Vote.create_or_update_vote(
-            user=self.context['request'].user,
-            content_object=content_object,
-            new_vote_type=vote_type
-        )
-        return vote
+        # Get the actual content object, with the parent the upvote notification reads
+        content_object = get_vote_target(content_type.model_class(), object_id)
+
+        return cast_vote(self.context['request'].user, content_object, vote_type)
 
 
 class ChangePasswordSerializer(serializers.Serializer):
@@ -372,19 +459,26 @@ class ChallengeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Challenge
-        fields = '__all__'
-        read_only_fields = ['coach', 'created_at', 'is_active', 'is_joined', 'user_progress', 'participant_count']
+        # The full-text index column and the lifecycle's bookkeeping, not challenge data
+        exclude = ['search_vector', 'start_notified_at', 'end_notified_at']
+        read_only_fields = ['coach', 'created_at', 'status', 'is_active', 'is_joined', 'user_progress', 'participant_count']
 
     def get_is_active(self, obj):
         return obj.is_active()
     
+    # The three below read the annotations from Challenge.objects.with_participant_stats when present
+
     def get_is_joined(self, obj):
+        if hasattr(obj, 'viewer_joined'):
+            return obj.viewer_joined
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return ChallengeParticipant.objects.filter(challenge=obj, user=request.user).exists()
         return False
     
     def get_user_progress(self, obj):
+        if hasattr(obj, 'viewer_progress'):
+            return obj.viewer_progress if obj.viewer_progress is not None else 0
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             participant = ChallengeParticipant.objects.filter(challenge=obj, user=request.user).first()
@@ -392,8 +486,18 @@ class ChallengeSerializer(serializers.ModelSerializer):
         return 0
     
     def get_participant_count(self, obj):
+        if hasattr(obj, 'num_participants'):
+            return obj.num_participants
         return obj.participants.count()
 
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Only present when searched by location (see api.geo.within_radius)
+        distance = getattr(instance, 'distance_km', None)
+        if distance is not None:
+            data['distance_km'] = round(distance, 2)
+        return data
+
     def create(self, validated_data):
         request = self.context['request']
         user = request.user
@@ -439,7 +543,7 @@ class ChallengeParticipantSerializer(serializers.ModelSerializer):
     class Meta:
         model = ChallengeParticipant
         fields = '__all__'
-        read_only_fields = ['challenge', 'user', 'joined_at', 'last_updated', 'finish_date']
+        read_only_fields = ['challenge', 'user', 'joined_at', 'last_updated', 'finish_date', 'final_rank']
 
     def update(self, instance, validated_data):
         # First, call the parent update method to update other fields if necessary
@@ -0,0 +1,28 @@
+"""
+What the configured cache can be trusted with.
+
+Without CACHE_URL every process has its own in-memory cache, so state other processes must see
+(buffered counters, boards updated in place) can't live there. With Redis, features that need
+atomic structures (hashes, sorted sets) use its client directly, under the cache's key prefix.
+"""
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.redis import RedisCache
+
+
+def is_shared():
+    """True when all processes see the same cache."""
+    return bool(settings.CACHE_URL)
+
+
+def redis_client():
+    """The Redis client behind the default cache, or None when the cache isn't Redis."""
+    backend = caches['default']
+    if not isinstance(backend, RedisCache):
+        return None
+    return backend._cache.get_client(write=True)
+
+
+def redis_key(key):
+    """`key` with the cache's prefix and version, for keys written with redis_client()."""
+    return cache.make_and_validate_key(key)
@@ -1,60 +1,41 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.contenttypes.models import ContentType
-from .models import Vote, Notification, Thread, Comment, Subcomment, FitnessGoal, Challenge
+from .models import UserWithType, Vote, Notification, Forum, Thread, Comment, Subcomment, FitnessGoal, ChallengeParticipant
 from chat.models import DirectMessage
-from django.utils import timezone
+from .utils import create_notifications, push_notifications, invalidate_forum_list_cache
+from .votes import notify_upvote
+from .availability import remember_user
+from .leaderboards import refresh_participant, remove_participant
+from django.db import transaction
 
 @receiver(post_save, sender=Vote)
 def create_vote_notification(sender, instance, created, **kwargs):
     """
     Signal handler to create notifications when a user upvotes a thread, comment, or subcomment.
     Only creates notifications for UPVOTE type votes, not DOWNVOTE.
+    Votes cast through api.votes.cast_vote are written without save() and notify there instead.
     """
-    # Only proceed if this is an upvote
     if instance.vote_type != 'UPVOTE':
         return
-    
-    # Get the content object that was voted on
-    content_object = instance.content_object
-    
-    # Don't create notification if user is voting on their own content
-    if content_object.author == instance.user:
-        return
-    
-    # Determine content type and set appropriate notification parameters
-    content_type = instance.content_type
-    
-    # Get model class from content type
-    model_class = content_type.model_class()
-    
-    # Set notification parameters based on content type
-    if model_class == Thread:
-        title = "New upvote on your thread"
-        message = f"{instance.user.username} upvoted your thread: {content_object.title}"
-        related_object_type = 'Thread'
-    elif model_class == Comment:
-        title = "New upvote on your comment"
-        message = f"{instance.user.username} upvoted your comment on thread: {content_object.thread.title}"
-        related_object_type = 'Comment'
-    elif model_class == Subcomment:
-        title = "New upvote on your reply"
-        message = f"{instance.user.username} upvoted your reply to a comment"
-        related_object_type = 'Subcomment'
-    else:
-        # Not a content type we want to notify about
-        return
-    
-    # Create the notification
-    Notification.objects.create(
-        recipient=content_object.author,
-        sender=instance.user,
-        notification_type='LIKE',
-        title=title,
-        message=message,
-        related_object_id=content_object.id,
-        related_object_type=related_object_type
-    )
+    notify_upvote(instance.user, instance.content_object)
+
+
+@receiver(post_save, sender=UserWithType)
+def remember_taken_username(sender, instance, **kwargs):
+    """
+    Signal handler to keep the availability filters in step with new and renamed users.
+    """
+    remember_user(instance.username, instance.email)
+
+
+@receiver(post_save, sender=Notification)
+def push_new_notification(sender, instance, created, **kwargs):
+    """
+    Signal handler to push every newly created notification to the recipient's open WebSocket.
+    """
+    if created:
+        push_notifications([instance])
 
 
 @receiver(post_save, sender=Comment)
@@ -77,7 +58,8 @@ def notify_thread_author_on_new_comment(sender, instance, created, **kwargs):
         title="New comment on your thread",
         message=f"{commenter.username} commented on your thread: {thread.title}",
         related_object_id=thread.id,
-        related_object_type='Thread'
+        related_object_type='Thread',
+        target_thread_id=thread.id
     )
 
 
@@ -104,7 +86,8 @@ def notify_comment_author_on_new_subcomment(sender, instance, created, **kwargs)
         title="New reply to your comment",
         message=f"{subcommenter.username} replied to your comment on thread: {comment.thread.title}",
         related_object_id=comment.id,
-        related_object_type='Comment'
+        related_object_type='Comment',
+        target_thread_id=comment.thread_id
     )
 
 @receiver(post_save, sender=DirectMessage)
@@ -116,51 +99,18 @@ def notify_direct_message_recipient(sender, instance, created, **kwargs):
         return
 
     # Get all participants except the sender
-    recipients = instance.chat.participants.exclude(id=instance.sender.id)
-
-    for recipient in recipients:
-        # Create notification for each recipient
-        Notification.objects.create(
-            recipient=recipient,
-            sender=instance.sender,
-            notification_type='NEW_MESSAGE',
-            title="New Direct Message",
-            message=f"{instance.sender.username} sent you a message",
-            related_object_id=instance.chat.id,
-            related_object_type='DirectChat'
-        )
-
-
-@receiver(post_save, sender=FitnessGoal)
-def notify_goal_deadline(sender, instance, **kwargs):
-    """
-    Signal handler to create notifications when a goal's target date is reached but goal is not completed.
-    """
-    now = timezone.now()
-    
-    # Check if target date has been reached and goal is not completed
-    if instance.target_date <= now and instance.status == 'ACTIVE':
-        # Create notification for the goal owner
-        Notification.objects.create(
-            recipient=instance.user,
-            notification_type='GOAL_INACTIVE',
-            title="Goal Target Date Reached",
-            message=f"Your goal '{instance.title}' has reached its target date but is not completed yet.",
-            related_object_id=instance.id,
-            related_object_type='FitnessGoal'
-        )
-        
-        # If there's a mentor assigned, notify them as well
-        if instance.mentor:
-            Notification.objects.create(
-                recipient=instance.mentor,
-                sender=instance.user,
-                notification_type='GOAL_INACTIVE',
-                title="Mentee Goal Target Date Reached",
-                message=f"Your mentee's goal '{instance.title}' has reached its target date but is not completed yet.",
-                related_object_id=instance.id,
-                related_object_type='FitnessGoal'
-            )
+    recipient_ids = instance.chat.participants.exclude(id=instance.sender_id).values_list('id', flat=True)
+
+    # One bulk insert for every recipient
+    create_notifications(
+        recipient_ids,
+        notification_type='NEW_MESSAGE',
+        title="New Direct Message",
+        message=f"{instance.sender.username} sent you a message",
+        sender=instance.sender,
+        related_object_id=instance.chat_id,
+        related_object_type='DirectChat'
+    )
 
 
 @receiver(post_save, sender=FitnessGoal)
@@ -184,36 +134,27 @@ def notify_mentee_new_goal(sender, instance, created, **kwargs):
         )
 
 
-@receiver(post_save, sender=Challenge)
-def notify_challenge_deadline(sender, instance, **kwargs):
+@receiver(post_save, sender=Forum)
+@receiver(post_delete, sender=Forum)
+@receiver(post_save, sender=Thread)
+@receiver(post_delete, sender=Thread)
+def invalidate_forum_list(sender, instance, **kwargs):
     """
-    Signal handler to create notifications when a challenge's end date is reached.
+    Thread counts and forum details in the cached forums listing change with these rows.
     """
-    now = timezone.now()
-    
-    # Check if end date has been reached and challenge is still active
-    if instance.end_date <= now and instance.is_active():
-        # Get all participants
-        participants = instance.participants.all()
-        
-        # Create notification for each participant
-        for participant in participants.select_related('user'):
-            Notification.objects.create(
-                recipient=participant.user,
-                sender=instance.coach,
-                notification_type='CHALLENGE',
-                title="Challenge Ended",
-                message=f"The challenge '{instance.title}' has ended. Check your results!",
-                related_object_id=instance.id,
-                related_object_type='Challenge'
-            )
-        
-        # Notify the coach as well
-        Notification.objects.create(
-            recipient=instance.coach,
-            notification_type='CHALLENGE',
-            title="Your Challenge Has Ended",
-            message=f"Your challenge '{instance.title}' has ended. Check the participants' results!",
-            related_object_id=instance.id,
-            related_object_type='Challenge'
-        )
\ No newline at end of file
+    invalidate_forum_list_cache()
+
+
+@receiver(post_save, sender=ChallengeParticipant)
+def update_leaderboard_on_progress(sender, instance, **kwargs):
+    """
+    Signal handler to move a participant on their challenge's cached leaderboard after joining or progress.
+    """
+    challenge_id, user_id = instance.challenge_id, instance.user_id
+    transaction.on_commit(lambda: refresh_participant(challenge_id, user_id))
+
+
+@receiver(post_delete, sender=ChallengeParticipant)
+def update_leaderboard_on_leave(sender, instance, **kwargs):
+    challenge_id, user_id = instance.challenge_id, instance.user_id
+    transaction.on_commit(lambda: remove_participant(challenge_id, user_id))
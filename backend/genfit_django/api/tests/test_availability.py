@@ -0,0 +1,100 @@
+from unittest import skipIf, skipUnless
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from ..availability import BloomFilter, build_filters, reset_filters
+from ..shared_cache import redis_client
+
+User = get_user_model()
+
+
+class BloomFilterTests(APITestCase):
+    def test_added_values_are_members(self):
+        bloom = BloomFilter(100)
+        values = [f'user{i}' for i in range(100)]
+        for value in values:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in values))
+
+    def test_false_positive_rate_stays_low(self):
+        bloom = BloomFilter(1000)
+        for i in range(1000):
+            bloom.add(f'taken{i}')
+        false_positives = sum(f'free{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class AvailabilityAPITests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        reset_filters()
+        self.client = APIClient()
+        self.url = reverse('check_availability')
+        User.objects.create_user(
+            username='taken1', email='taken@example.com', password='password123', user_type='User'
+        )
+        build_filters()
+
+    def tearDown(self):
+        reset_filters()
+        cache.clear()
+
+    def test_taken_and_free_values(self):
+        response = self.client.get(self.url, {'username': 'taken1', 'email': 'free@example.com'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['username']['available'])
+        self.assertTrue(response.data['email']['available'])
+
+    @skipUnless(redis_client(), 'the filters are kept in Redis')
+    def test_free_value_does_not_query_once_filter_is_built(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'username': 'brandnew42'})
+        self.assertTrue(response.data['username']['available'])
+        self.assertEqual(len(queries), 0)
+
+    @skipIf(redis_client(), 'the filters are kept in Redis')
+    def test_without_redis_every_check_probes_the_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'username': 'brandnew42'})
+        self.assertTrue(response.data['username']['available'])
+        self.assertEqual(len(queries), 1)
+
+    @skipUnless(redis_client(), 'the filters are kept in Redis')
+    def test_checks_probe_the_index_until_the_filter_is_built(self):
+        reset_filters()
+        User.objects.bulk_create([User(username='bulk1', email='bulk@example.com', user_type='User')])
+        response = self.client.get(self.url, {'username': 'bulk1'})
+        self.assertFalse(response.data['username']['available'])
+
+    def test_new_user_is_seen_without_rebuild(self):
+        User.objects.create_user(
+            username='fresh1', email='Fresh@Example.COM', password='password123', user_type='User'
+        )
+        response = self.client.get(self.url, {'username': 'fresh1', 'email': 'Fresh@example.com'})
+        self.assertFalse(response.data['username']['available'])
+        self.assertFalse(response.data['email']['available'])
+
+    def test_deleted_user_frees_the_name(self):
+        User.objects.filter(username='taken1').delete()
+        response = self.client.get(self.url, {'username': 'taken1'})
+        self.assertTrue(response.data['username']['available'])
+
+    def test_only_requested_fields_are_returned(self):
+        response = self.client.get(self.url, {'email': 'taken@example.com'})
+        self.assertEqual(list(response.data), ['email'])
+        self.assertFalse(response.data['email']['available'])
+
+    def test_missing_parameters(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_checks_are_throttled_per_client(self):
+        for _ in range(20):
+            self.client.get(self.url, {'username': 'someone1'})
+        response = self.client.get(self.url, {'username': 'someone1'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
@@ -0,0 +1,121 @@
+import datetime
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api.lifecycle import process_challenge_lifecycle
+from api.models import UserWithType, Challenge, ChallengeParticipant, Notification
+
+
+class ChallengeLifecycleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+        self.coach = UserWithType.objects.create_user(
+            username="coach", email="coach@example.com", password="coachpass", user_type="Coach"
+        )
+        self.users = [
+            UserWithType.objects.create_user(
+                username=f"user{i}", email=f"user{i}@example.com", password="userpass", user_type="User"
+            )
+            for i in range(3)
+        ]
+        self.challenge = self._challenge(
+            "Steps", self.now + datetime.timedelta(hours=1), self.now + datetime.timedelta(days=1)
+        )
+        for user, progress in zip(self.users, [30, 80, 50]):
+            ChallengeParticipant.objects.create(challenge=self.challenge, user=user, current_value=progress)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _challenge(self, title, start_date, end_date):
+        return Challenge.objects.create(
+            coach=self.coach, title=title, challenge_type="steps", target_value=100, unit="steps",
+            start_date=start_date, end_date=end_date,
+        )
+
+    def _notifications(self, title):
+        return Notification.objects.filter(title=title, related_object_id=self.challenge.id)
+
+    def test_new_challenges_get_the_status_of_their_dates(self):
+        self.assertEqual(self.challenge.status, "UPCOMING")
+        running = self._challenge("Running", self.now - datetime.timedelta(days=1), self.now + datetime.timedelta(days=1))
+        over = self._challenge("Over", self.now - datetime.timedelta(days=2), self.now - datetime.timedelta(days=1))
+        self.assertEqual(running.status, "ACTIVE")
+        self.assertEqual(over.status, "ENDED")
+
+    def test_start_notifies_participants_once(self):
+        later = self.now + datetime.timedelta(hours=2)
+        self.assertEqual(process_challenge_lifecycle(later)["started"], 1)
+        self.assertEqual(process_challenge_lifecycle(later)["started"], 0)
+
+        self.challenge.refresh_from_db()
+        self.assertEqual(self.challenge.status, "ACTIVE")
+        self.assertEqual(self._notifications("Challenge Started").count(), 3)
+
+    def test_end_finalizes_ranks_and_notifies_once(self):
+        later = self.now + datetime.timedelta(days=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            counts = process_challenge_lifecycle(later)
+        self.assertEqual(counts, {"started": 0, "ended": 1, "reopened": 0})
+        process_challenge_lifecycle(later)
+
+        self.challenge.refresh_from_db()
+        self.assertEqual(self.challenge.status, "ENDED")
+        self.assertEqual(self._notifications("Challenge Ended").count(), 3)
+        self.assertEqual(self._notifications("Your Challenge Has Ended").count(), 1)
+        self.assertEqual(self._notifications("Challenge Started").count(), 0)
+
+        ranks = dict(
+            ChallengeParticipant.objects.filter(challenge=self.challenge).values_list("user__username", "final_rank")
+        )
+        self.assertEqual(ranks, {"user1": 1, "user2": 2, "user0": 3})
+
+    def test_extended_challenge_is_reopened_without_notifications(self):
+        later = self.now + datetime.timedelta(days=2)
+        process_challenge_lifecycle(later)
+        Challenge.objects.filter(id=self.challenge.id).update(end_date=self.now + datetime.timedelta(days=5))
+
+        self.assertEqual(process_challenge_lifecycle(later)["reopened"], 1)
+        self.challenge.refresh_from_db()
+        self.assertEqual(self.challenge.status, "ACTIVE")
+        self.assertEqual(self._notifications("Challenge Started").count(), 0)
+
+    def test_reopened_challenge_is_not_announced_again(self):
+        later = self.now + datetime.timedelta(days=2)
+        process_challenge_lifecycle(later)
+        Challenge.objects.filter(id=self.challenge.id).update(end_date=self.now + datetime.timedelta(days=3))
+        self.assertEqual(process_challenge_lifecycle(later)["reopened"], 1)
+
+        counts = process_challenge_lifecycle(self.now + datetime.timedelta(days=4))
+        self.assertEqual(counts["ended"], 1)
+        self.challenge.refresh_from_db()
+        self.assertEqual(self.challenge.status, "ENDED")
+        self.assertEqual(self._notifications("Challenge Ended").count(), 3)
+        self.assertEqual(self._notifications("Your Challenge Has Ended").count(), 1)
+
+    def test_transitions_use_a_constant_number_of_queries(self):
+        for i in range(5):
+            challenge = self._challenge(
+                f"Ending {i}", self.now - datetime.timedelta(days=1), self.now + datetime.timedelta(hours=1)
+            )
+            for user in self.users:
+                ChallengeParticipant.objects.create(challenge=challenge, user=user)
+        later = self.now + datetime.timedelta(hours=3)
+        with CaptureQueriesContext(connection) as queries:
+            counts = process_challenge_lifecycle(later)
+        # 2 reopen UPDATEs; lock, UPDATE, rank, store ranks, participants, notifications to end; 4 to start
+        self.assertEqual(len([q for q in queries.captured_queries if 'SAVEPOINT' not in q['sql']]), 12)
+        self.assertEqual(counts["ended"], 5)
+        self.assertEqual(counts["started"], 1)
+
+    def test_command_runs_once_by_default(self):
+        Challenge.objects.filter(id=self.challenge.id).update(start_date=self.now - datetime.timedelta(minutes=1))
+        call_command("process_challenge_lifecycle", verbosity=0)
+        self.challenge.refresh_from_db()
+        self.assertEqual(self.challenge.status, "ACTIVE")
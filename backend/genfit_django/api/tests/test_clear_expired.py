@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api.models import UserWithType, ProgressSubmission
+
+
+class ClearExpiredTests(APITestCase):
+    def setUp(self):
+        self.user = UserWithType.objects.create_user(
+            username="runner", email="runner@example.com", password="userpass", user_type="User"
+        )
+
+    def _submission(self, key, age):
+        submission = ProgressSubmission.objects.create(
+            user=self.user, idempotency_key=key, target_type="goal", target_id=1, added_value=1,
+        )
+        ProgressSubmission.objects.filter(id=submission.id).update(created_at=timezone.now() - age)
+
+    @override_settings(PROGRESS_IDEMPOTENCY_KEY_DAYS=7)
+    def test_old_keys_and_expired_sessions_are_removed(self):
+        self._submission("old", timedelta(days=8))
+        self._submission("recent", timedelta(days=1))
+        Session.objects.create(session_key="expired", session_data="", expire_date=timezone.now() - timedelta(days=1))
+        Session.objects.create(session_key="current", session_data="", expire_date=timezone.now() + timedelta(days=1))
+
+        call_command("clear_expired", verbosity=0)
+
+        self.assertEqual(list(ProgressSubmission.objects.values_list("idempotency_key", flat=True)), ["recent"])
+        self.assertEqual(list(Session.objects.values_list("session_key", flat=True)), ["current"])
@@ -0,0 +1,88 @@
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from ..models import Forum, Thread, Comment, Subcomment, Vote
+
+User = get_user_model()
+
+
+class CommentTreeTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='password123',
+            user_type='User'
+        )
+        self.forum = Forum.objects.create(title='Test Forum', created_by=self.user)
+        self.thread = Thread.objects.create(forum=self.forum, title='Test Thread', content='Content', author=self.user)
+
+        start = timezone.now() - timedelta(days=1)
+        self.comments = []
+        for i in range(12):
+            author = User.objects.create_user(
+                username=f'commenter{i}', email=f'commenter{i}@example.com', password='password123', user_type='User'
+            )
+            comment = Comment.objects.create(thread=self.thread, author=author, content=f'Comment {i}', like_count=i % 4)
+            Comment.objects.filter(id=comment.id).update(created_at=start + timedelta(minutes=i))
+            self.comments.append(comment)
+
+        self.replies = []
+        for i in range(5):
+            reply = Subcomment.objects.create(comment=self.comments[0], author=self.user, content=f'Reply {i}')
+            Subcomment.objects.filter(id=reply.id).update(created_at=start + timedelta(hours=1, minutes=i))
+            self.replies.append(reply)
+        Subcomment.objects.create(comment=self.comments[1], author=self.user, content='Only reply')
+        Vote.create_or_update_vote(self.user, self.replies[1], 'UPVOTE')
+
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('get_comment_tree', args=[self.thread.id])
+
+    def test_tree_page_is_constant_number_of_queries(self):
+        with self.assertNumQueries(3):  # thread check, comment page, windowed replies
+            response = self.client.get(self.url, {'page_size': 10, 'replies': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([c['id'] for c in results], [c.id for c in self.comments[:10]])
+        self.assertEqual(results[0]['author_username'], 'commenter0')
+
+        first = results[0]
+        self.assertEqual([r['id'] for r in first['subcomments']], [r.id for r in self.replies[:2]])
+        self.assertEqual(first['subcomments'][1]['my_vote'], 'UPVOTE')
+        self.assertIsNotNone(first['more_replies'])
+        self.assertEqual(len(results[1]['subcomments']), 1)
+        self.assertIsNone(results[1]['more_replies'])
+        self.assertEqual(results[2]['subcomments'], [])
+
+    def test_comment_pages_continue_with_cursor(self):
+        response = self.client.get(self.url, {'page_size': 10})
+        response = self.client.get(response.data['next'])
+        self.assertEqual([c['id'] for c in response.data['results']], [c.id for c in self.comments[10:]])
+        self.assertIsNone(response.data['next'])
+
+    def test_more_replies_link_continues_after_shown_replies(self):
+        response = self.client.get(self.url, {'replies': 2})
+        more = response.data['results'][0]['more_replies']
+
+        response = self.client.get(f'{more}&page_size=2')
+        self.assertEqual([r['id'] for r in response.data['results']], [r.id for r in self.replies[2:4]])
+        response = self.client.get(response.data['next'])
+        self.assertEqual([r['id'] for r in response.data['results']], [self.replies[4].id])
+        self.assertIsNone(response.data['next'])
+
+    def test_sort_by_likes(self):
+        response = self.client.get(self.url, {'sort': 'likes', 'page_size': 5})
+        expected = sorted(self.comments, key=lambda c: (-(c.like_count), c.id))[:5]
+        self.assertEqual([c['id'] for c in response.data['results']], [c.id for c in expected])
+
+    def test_invalid_sort_returns_400(self):
+        response = self.client.get(self.url, {'sort': 'random'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_unknown_thread_returns_404(self):
+        response = self.client.get(reverse('get_comment_tree', args=[self.thread.id + 1000]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
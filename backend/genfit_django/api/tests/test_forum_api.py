@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
@@ -8,6 +9,7 @@ User = get_user_model()
 
 class ForumAPITests(APITestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.admin_user = User.objects.create_superuser(
             username='admin',
@@ -118,3 +120,33 @@ class ForumAPITests(APITestCase):
         url = reverse('forum-detail', args=[self.forum.id])
         response = self.client.get(url)
         self.assertEqual(response.data['thread_count'], 2)
+
+    def test_list_forums_counts_threads_in_one_query(self):
+        """Ensure the forums listing annotates thread counts instead of counting per forum"""
+        other_forum = Forum.objects.create(title='Other Forum', created_by=self.admin_user)
+        for forum, count in ((self.forum, 3), (other_forum, 1)):
+            for i in range(count):
+                Thread.objects.create(forum=forum, title=f'Thread {i}', content='Content', author=self.regular_user)
+        latest = Thread.objects.filter(forum=self.forum).order_by('-last_activity').first()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('forum-list'))
+        counts = {forum['id']: forum['thread_count'] for forum in response.data}
+        self.assertEqual(counts, {self.forum.id: 3, other_forum.id: 1})
+        existing = next(forum for forum in response.data if forum['id'] == self.forum.id)
+        self.assertEqual(existing['latest_activity'], latest.last_activity.isoformat().replace('+00:00', 'Z'))
+
+    def test_list_forums_is_cached_until_threads_change(self):
+        """Ensure the cached listing is served without queries and dropped on thread create/delete"""
+        self.client.get(reverse('forum-list'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('forum-list'))
+        self.assertEqual(response.data[0]['thread_count'], 0)
+
+        thread = Thread.objects.create(forum=self.forum, title='New', content='Content', author=self.regular_user)
+        response = self.client.get(reverse('forum-list'))
+        self.assertEqual(response.data[0]['thread_count'], 1)
+
+        thread.delete()
+        response = self.client.get(reverse('forum-list'))
+        self.assertEqual(response.data[0]['thread_count'], 0)
@@ -0,0 +1,109 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from ..models import Forum, Thread, Comment, Subcomment, Vote
+from ..purge import purge_forum_content
+
+User = get_user_model()
+
+
+class ForumPurgeTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='password123',
+            user_type='User'
+        )
+        self.other_user = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='password123',
+            user_type='User'
+        )
+        self.forum = Forum.objects.create(title='Test Forum', created_by=self.other_user)
+        self.thread = Thread.objects.create(forum=self.forum, title='Thread', content='Content', author=self.other_user)
+
+    def _comment_with_replies(self, replies, author=None):
+        comment = Comment.objects.create(thread=self.thread, author=author or self.user, content='Comment')
+        Thread.objects.filter(id=self.thread.id).update(comment_count=Thread.objects.get(id=self.thread.id).comment_count + 1)
+        Vote.create_or_update_vote(self.other_user, comment, 'UPVOTE')
+        for i in range(replies):
+            subcomment = Subcomment.objects.create(comment=comment, author=self.other_user, content=f'Reply {i}')
+            Vote.create_or_update_vote(self.user, subcomment, 'UPVOTE')
+        Comment.objects.filter(id=comment.id).update(subcomment_count=replies)
+        return comment
+
+    def test_comment_delete_uses_same_statements_for_any_number_of_replies(self):
+        small = self._comment_with_replies(2)
+        large = self._comment_with_replies(15)
+
+        counts = []
+        for comment in (small, large):
+            with CaptureQueriesContext(connection) as queries:
+                purge_forum_content(comment_ids=[comment.id])
+            counts.append(len(queries.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Subcomment.objects.exists())
+        self.assertFalse(Vote.objects.exists())
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.comment_count, 0)
+
+    def test_delete_comment_endpoint_removes_subtree(self):
+        comment = self._comment_with_replies(3)
+        self.client.force_authenticate(user=self.user)
+        response = self.client.delete(reverse('delete_comment', args=[comment.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Subcomment.objects.filter(comment_id=comment.id).exists())
+        self.assertFalse(Vote.objects.exists())
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.comment_count, 0)
+
+    def test_delete_subcomment_decrements_parent(self):
+        comment = self._comment_with_replies(2)
+        subcomment = comment.subcomments.first()
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.delete(reverse('delete_subcomment', args=[subcomment.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        comment.refresh_from_db()
+        self.assertEqual(comment.subcomment_count, 1)
+        self.assertEqual(Vote.objects.filter(object_id=subcomment.id, content_type__model='subcomment').count(), 0)
+
+    def test_thread_delete_removes_tree_and_votes(self):
+        self._comment_with_replies(3)
+        Vote.create_or_update_vote(self.user, self.thread, 'UPVOTE')
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.delete(reverse('thread-detail', args=[self.thread.id]))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Thread.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Subcomment.objects.exists())
+        self.assertFalse(Vote.objects.exists())
+
+    def test_rtbf_removes_forum_content_and_takes_back_likes(self):
+        kept_comment = self._comment_with_replies(2, author=self.other_user)
+        self._comment_with_replies(1)
+        own_thread = Thread.objects.create(forum=self.forum, title='Mine', content='Content', author=self.user)
+        Vote.create_or_update_vote(self.user, self.thread, 'UPVOTE')
+        Vote.create_or_update_vote(self.user, kept_comment, 'UPVOTE')
+        Vote.create_or_update_vote(self.other_user, own_thread, 'UPVOTE')
+
+        self.client.force_authenticate(user=self.user)
+        response = self.client.delete(reverse('rtbf_delete_user_data'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.thread.refresh_from_db()
+        kept_comment.refresh_from_db()
+        self.assertEqual(self.thread.like_count, 0)
+        self.assertEqual(self.thread.comment_count, 1)
+        self.assertEqual(kept_comment.like_count, 1)  # other_user's upvote stays
+        self.assertEqual(kept_comment.subcomment_count, 2)
+        self.assertFalse(Thread.objects.filter(id=own_thread.id).exists())
+        self.assertEqual(list(Comment.objects.values_list('id', flat=True)), [kept_comment.id])
+        self.assertFalse(User.objects.filter(username='user').exists())
@@ -0,0 +1,102 @@
+import os
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch, MagicMock
+
+import requests
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ..geocoding import geocode_location, clear_memory_cache, normalize_query
+from ..models import GeocodeCacheEntry
+
+
+def nominatim_response(results):
+    response = MagicMock()
+    response.json.return_value = results
+    response.raise_for_status.return_value = None
+    return response
+
+
+@override_settings(GEOCODING_GAZETTEER_PATH=None)
+class GeocodingTests(TestCase):
+    def setUp(self):
+        clear_memory_cache()
+
+    def tearDown(self):
+        clear_memory_cache()
+
+    @patch('api.geocoding.requests.get')
+    def test_result_is_cached_in_memory_and_database(self, mock_get):
+        mock_get.return_value = nominatim_response([{'lat': '40.99', 'lon': '29.03'}])
+
+        self.assertEqual(geocode_location('Kadıköy'), (40.99, 29.03))
+        self.assertEqual(geocode_location('  Kadıköy '), (40.99, 29.03))
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(mock_get.call_args.kwargs['timeout'], 3)
+
+        clear_memory_cache()
+        with self.assertNumQueries(1):
+            self.assertEqual(geocode_location('kadıköy'), (40.99, 29.03))
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('api.geocoding.requests.get')
+    def test_not_found_is_cached_until_it_expires(self, mock_get):
+        mock_get.return_value = nominatim_response([])
+
+        self.assertEqual(geocode_location('Nowhere'), (None, None))
+        clear_memory_cache()
+        self.assertEqual(geocode_location('Nowhere'), (None, None))
+        self.assertEqual(mock_get.call_count, 1)
+
+        GeocodeCacheEntry.objects.filter(query='nowhere').update(updated_at=timezone.now() - timedelta(days=2))
+        clear_memory_cache()
+        geocode_location('Nowhere')
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch('api.geocoding.requests.get', side_effect=requests.Timeout)
+    def test_errors_return_not_found_without_persisting(self, mock_get):
+        self.assertEqual(geocode_location('Ankara'), (None, None))
+        self.assertEqual(geocode_location('Ankara'), (None, None))
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertFalse(GeocodeCacheEntry.objects.exists())
+
+    @patch('api.geocoding.requests.get')
+    def test_gazetteer_is_used_first(self, mock_get):
+        rows = [
+            ['745044', 'İstanbul', 'Istanbul', '', '41.01384', '28.94966', 'P', 'PPLA', 'TR', '', '34', '', '', '', '14804116'],
+            ['1', 'Istanbul', 'Istanbul', '', '10.0', '10.0', 'P', 'PPL', 'XX', '', '', '', '', '', '10'],
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as gazetteer:
+            gazetteer.write(''.join('\t'.join(row) + '\n' for row in rows))
+        self.addCleanup(os.remove, gazetteer.name)
+
+        with override_settings(GEOCODING_GAZETTEER_PATH=gazetteer.name):
+            with self.assertNumQueries(0):
+                self.assertEqual(geocode_location('istanbul'), (41.01384, 28.94966))
+        mock_get.assert_not_called()
+
+    @patch('api.geocoding._executor')
+    @patch('api.geocoding.requests.get')
+    def test_cold_query_without_waiting_is_resolved_in_the_background(self, mock_get, mock_executor):
+        mock_get.return_value = nominatim_response([{'lat': '39.93', 'lon': '32.85'}])
+        mock_executor.submit.side_effect = lambda function, *args: function(*args)
+
+        with patch('api.geocoding.connections'):
+            self.assertEqual(geocode_location('Ankara', wait=False), (None, None))
+        mock_executor.submit.assert_called_once()
+        self.assertEqual(geocode_location('Ankara', wait=False), (39.93, 32.85))
+        self.assertEqual(mock_get.call_count, 1)
+
+    @patch('api.geocoding.requests.get')
+    def test_long_query_is_not_stored(self, mock_get):
+        mock_get.return_value = nominatim_response([])
+        query = 'x' * 300
+        self.assertEqual(geocode_location(query), (None, None))
+        self.assertEqual(geocode_location(query), (None, None))
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertFalse(GeocodeCacheEntry.objects.exists())
+
+    def test_blank_query(self):
+        self.assertEqual(geocode_location('   '), (None, None))
+        self.assertEqual(normalize_query(' Kadıköy,  Istanbul, '), 'kadıköy, istanbul')
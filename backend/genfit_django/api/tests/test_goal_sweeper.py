@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from api.goal_sweeper import sweep_goals, sweep_overdue_goals
+from api.models import UserWithType, FitnessGoal, Notification
+
+
+class GoalSweeperTests(APITestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.mentor = UserWithType.objects.create_user(
+            username="mentor", email="mentor@example.com", password="pass", user_type="Coach"
+        )
+        self.users = [
+            UserWithType.objects.create_user(
+                username=f"user{i}", email=f"user{i}@example.com", password="pass", user_type="User"
+            )
+            for i in range(3)
+        ]
+
+    def _goal(self, user, target_date, mentor=None, status="ACTIVE"):
+        return FitnessGoal.objects.create(
+            user=user, mentor=mentor, goal_type="WORKOUT", title=f"Goal of {user.username}",
+            target_value=10, unit="sessions", target_date=target_date, status=status,
+        )
+
+    def _count(self, title):
+        return Notification.objects.filter(title=title).count()
+
+    def test_overdue_goals_are_notified_once_per_target_date(self):
+        goal = self._goal(self.users[0], self.now - timedelta(days=1), mentor=self.mentor)
+        self._goal(self.users[1], self.now + timedelta(days=5))
+        Notification.objects.all().delete()
+
+        self.assertEqual(sweep_overdue_goals(self.now), 1)
+        self.assertEqual(sweep_overdue_goals(self.now), 0)
+        self.assertEqual(self._count("Goal Target Date Reached"), 1)
+        self.assertEqual(self._count("Mentee Goal Target Date Reached"), 1)
+
+        # Saving the goal, e.g. on a progress update, no longer notifies again
+        goal.refresh_from_db()
+        goal.save()
+        self.assertEqual(self._count("Goal Target Date Reached"), 1)
+
+        # A later target date is reported once it passes as well
+        FitnessGoal.objects.filter(id=goal.id).update(target_date=self.now + timedelta(days=1))
+        self.assertEqual(sweep_overdue_goals(self.now + timedelta(days=2)), 1)
+        self.assertEqual(self._count("Goal Target Date Reached"), 2)
+
+    def test_inactive_goals_of_every_user_are_marked(self):
+        for user in self.users:
+            self._goal(user, self.now + timedelta(days=30))
+        self._goal(self.users[0], self.now + timedelta(days=30), status="COMPLETED")
+        FitnessGoal.objects.update(last_updated=self.now - timedelta(days=8))
+        Notification.objects.all().delete()
+
+        self.assertEqual(sweep_goals(self.now), {"overdue": 0, "inactive": 3})
+        self.assertEqual(sweep_goals(self.now), {"overdue": 0, "inactive": 0})
+        self.assertEqual(FitnessGoal.objects.filter(status="INACTIVE").count(), 3)
+        self.assertEqual(self._count("Inactive Goal Alert"), 3)
+
+    def test_sweep_uses_a_constant_number_of_queries(self):
+        for user in self.users:
+            self._goal(user, self.now - timedelta(days=1), mentor=self.mentor)
+            self._goal(user, self.now + timedelta(days=30))
+        FitnessGoal.objects.update(last_updated=self.now - timedelta(days=8))
+
+        with CaptureQueriesContext(connection) as queries:
+            counts = sweep_goals(self.now)
+        # Per state: locked SELECT, UPDATE, notification INSERT
+        self.assertEqual(len([q for q in queries.captured_queries if 'SAVEPOINT' not in q['sql']]), 6)
+        self.assertEqual(counts, {"overdue": 3, "inactive": 6})
+
+    def test_command_sweeps_once_by_default(self):
+        self._goal(self.users[0], self.now - timedelta(days=1))
+        call_command("sweep_goals", verbosity=0)
+        self.assertEqual(self._count("Goal Target Date Reached"), 1)
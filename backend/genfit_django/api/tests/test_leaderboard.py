@@ -0,0 +1,108 @@
+import datetime
+from unittest import skipIf, skipUnless
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from api.models import UserWithType, Challenge, ChallengeParticipant
+from api.shared_cache import redis_client
+
+
+class LeaderboardTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.coach = UserWithType.objects.create_user(
+            username="coach", email="coach@example.com", password="coachpass", user_type="Coach"
+        )
+        self.challenge = Challenge.objects.create(
+            coach=self.coach, title="Steps", challenge_type="steps", target_value=100, unit="steps",
+            start_date=timezone.now() - datetime.timedelta(days=1),
+            end_date=timezone.now() + datetime.timedelta(days=1),
+        )
+        self.users = []
+        for i, progress in enumerate([10, 50, 30, 70, 20]):
+            user = UserWithType.objects.create_user(
+                username=f"user{i}", email=f"user{i}@example.com", password="userpass", user_type="User"
+            )
+            ChallengeParticipant.objects.create(challenge=self.challenge, user=user, current_value=progress)
+            self.users.append(user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+        self.url = reverse("challenge_leaderboard", args=[self.challenge.id])
+        self.me_url = reverse("my_leaderboard_position", args=[self.challenge.id])
+
+    def tearDown(self):
+        cache.clear()
+
+    def _usernames(self, entries):
+        return [entry["username"] for entry in entries]
+
+    def test_default_ranking(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._usernames(response.data), ["user3", "user1", "user2", "user4", "user0"])
+        self.assertEqual([entry["rank"] for entry in response.data], [1, 2, 3, 4, 5])
+
+    @skipUnless(redis_client(), 'boards are only cached in Redis')
+    def test_warm_board_is_served_without_participant_queries(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):  # the challenge lookup
+            response = self.client.get(self.url, {"offset": 1, "limit": 2})
+        self.assertEqual(self._usernames(response.data), ["user1", "user2"])
+        self.assertEqual(response.data[0]["rank"], 2)
+
+    def test_progress_moves_participant_on_warm_board(self):
+        self.client.get(self.url)
+        participant = ChallengeParticipant.objects.get(challenge=self.challenge, user=self.users[0])
+        with self.captureOnCommitCallbacks(execute=True):
+            participant.update_progress(150)
+
+        response = self.client.get(self.me_url, {"neighbours": 1})
+        self.assertEqual(response.data["rank"], 1)
+        self.assertEqual(response.data["total"], 5)
+        self.assertEqual(self._usernames(response.data["entries"]), ["user0", "user3"])
+        self.assertIsNotNone(response.data["entries"][0]["finish_date"])
+
+    def test_join_and_leave_update_warm_board(self):
+        self.client.get(self.url)
+        newcomer = UserWithType.objects.create_user(
+            username="newcomer", email="newcomer@example.com", password="userpass", user_type="User"
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            ChallengeParticipant.objects.create(challenge=self.challenge, user=newcomer, current_value=40)
+        self.assertEqual(self._usernames(self.client.get(self.url).data)[2], "newcomer")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ChallengeParticipant.objects.filter(user=self.users[3]).delete()
+        self.assertEqual(self._usernames(self.client.get(self.url).data)[0], "user1")
+
+    @skipIf(redis_client(), 'boards are cached in Redis')
+    def test_without_redis_changes_from_other_processes_show_up_at_once(self):
+        self.client.get(self.url)
+        # As if another process had applied the progress: no on_commit refresh in this one
+        ChallengeParticipant.objects.filter(user=self.users[4]).update(current_value=90)
+        self.assertEqual(self._usernames(self.client.get(self.url).data)[0], "user4")
+        self.assertEqual(self.client.get(self.me_url).data["rank"], 5)
+
+    def test_my_position_with_neighbours(self):
+        self.client.force_authenticate(self.users[2])
+        response = self.client.get(self.me_url)
+        self.assertEqual(response.data["rank"], 3)
+        self.assertEqual(self._usernames(response.data["entries"]), ["user3", "user1", "user2", "user4", "user0"])
+
+    def test_my_position_when_not_joined(self):
+        self.client.force_authenticate(self.coach)
+        response = self.client.get(self.me_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_reversed_ordering_uses_database(self):
+        response = self.client.get(self.url, {"progress": "-"})
+        self.assertEqual(self._usernames(response.data), ["user0", "user4", "user2", "user1", "user3"])
+        self.assertEqual(response.data[0]["rank"], 1)
+
+    def test_invalid_limit(self):
+        response = self.client.get(self.url, {"limit": "-1"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,89 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from api.models import UserWithType, LoginDay
+
+
+class LoginDayTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.user = UserWithType.objects.create_user(
+            username="runner", email="runner@example.com", password="userpass", user_type="User"
+        )
+        self.client = APIClient()
+
+    def tearDown(self):
+        cache.clear()
+
+    def _login(self):
+        return self.client.post(reverse("login"), {"username": "runner", "password": "userpass"}, format="json")
+
+    def test_login_records_one_day(self):
+        self.assertEqual(self._login().status_code, status.HTTP_200_OK)
+        self._login()
+        self.assertEqual(list(LoginDay.objects.values_list("day", flat=True)), [self.today])
+        self.user.refresh_from_db()
+        self.assertEqual((self.user.current_streak, self.user.total_login_days), (1, 1))
+
+    def test_streak_update_is_one_insert_and_one_narrow_update(self):
+        self.user.last_login_date = self.today - datetime.timedelta(days=1)
+        self.user.current_streak = 4
+        self.user.save()
+
+        with self.assertNumQueries(2) as queries:
+            self.user.update_login_streak()
+        update = queries.captured_queries[-1]["sql"]
+        self.assertNotIn('"password"', update)
+        self.assertEqual(self.user.current_streak, 5)
+
+        with self.assertNumQueries(0):
+            self.user.update_login_streak()
+
+    def test_calendar_is_served_from_month_masks(self):
+        first_of_month = self.today.replace(day=1)
+        previous_month = (first_of_month - datetime.timedelta(days=1)).replace(day=1)
+        for day in [previous_month, previous_month.replace(day=3), first_of_month]:
+            LoginDay.objects.create(user=self.user, day=day)
+        self.client.force_authenticate(self.user)
+        url = reverse("get_login_calendar")
+
+        response = self.client.get(url, {"months": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        months = response.data["months"]
+        self.assertEqual([month["month"] for month in months], [f"{previous_month:%Y-%m}", f"{first_of_month:%Y-%m}"])
+        self.assertEqual(months[0]["mask"], 0b101)
+        self.assertEqual(months[0]["days"], [1, 3])
+
+        # Without a shared cache only the past month is kept; the current one is read again
+        with self.assertNumQueries(1):
+            self.client.get(url, {"months": 2})
+        with override_settings(CACHE_URL="redis://cache:6379/0"):
+            self.client.get(url, {"months": 2})
+            with self.assertNumQueries(0):
+                self.client.get(url, {"months": 2})
+
+        # A new login day shows up in the current month right away
+        self.user.update_login_streak()
+        self.assertIn(self.today.day, self.client.get(url, {"months": 2}).data["months"][1]["days"])
+
+    def test_login_stats_calendar_uses_recorded_days(self):
+        for offset in [0, 2, 5]:
+            LoginDay.objects.create(user=self.user, day=self.today - datetime.timedelta(days=offset))
+        self.client.force_authenticate(self.user)
+        calendar = self.client.get(reverse("get_login_stats")).data["login_calendar"]
+        self.assertEqual(
+            [entry["date"] for entry in calendar],
+            [(self.today - datetime.timedelta(days=offset)).isoformat() for offset in [5, 2, 0]],
+        )
+
+    def test_invalid_months(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("get_login_calendar"), {"months": 30})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,101 @@
+from datetime import timedelta
+from django.core import mail
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from chat.models import DirectChat, DirectMessage
+from ..models import UserWithType, FitnessGoal, Notification
+from ..utils import create_notifications
+
+
+def data_queries(context):
+    """Statements in a captured block, ignoring transaction bookkeeping."""
+    return [q['sql'] for q in context.captured_queries if 'SAVEPOINT' not in q['sql']]
+
+
+class NotificationDispatchTests(APITestCase):
+    def setUp(self):
+        self.sender = UserWithType.objects.create_user(
+            username='sender', email='sender@example.com', password='pass', user_type='Coach'
+        )
+        self.users = [
+            UserWithType.objects.create_user(
+                username=f'user{i}', email=f'user{i}@example.com', password='pass', user_type='User'
+            )
+            for i in range(25)
+        ]
+
+    def test_fan_out_uses_constant_number_of_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            created = create_notifications(
+                [user.id for user in self.users],
+                notification_type='CHALLENGE',
+                title='Challenge Ended',
+                message='The challenge has ended.',
+                sender=self.sender,
+            )
+        self.assertEqual(len(data_queries(queries)), 1)
+        self.assertEqual(len(created), 25)
+        self.assertEqual(Notification.objects.filter(notification_type='CHALLENGE').count(), 25)
+
+    def test_invalid_type_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            create_notifications(self.users, notification_type='NOPE', title='t', message='m')
+        self.assertFalse(Notification.objects.exists())
+
+    def test_emails_are_sent_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_notifications(
+                self.users[:3],
+                notification_type='SYSTEM',
+                title='Maintenance',
+                message='We will be down tonight.',
+                send_email=True,
+                defer_email=False,
+            )
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(Notification.objects.filter(is_email_sent=True).count(), 3)
+
+    def test_direct_message_notifies_other_participants(self):
+        chat = DirectChat.objects.create()
+        chat.participants.add(self.sender, self.users[0])
+        DirectMessage.objects.create(chat=chat, sender=self.sender, body='hi')
+
+        notifications = Notification.objects.filter(notification_type='NEW_MESSAGE')
+        self.assertEqual(notifications.count(), 1)
+        self.assertEqual(notifications.first().recipient, self.users[0])
+        self.assertEqual(notifications.first().related_object_id, chat.id)
+
+
+class CheckInactiveGoalsTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserWithType.objects.create_user(
+            username='user', email='user@example.com', password='pass', user_type='User'
+        )
+        self.client.force_authenticate(user=self.user)
+        for i in range(5):
+            FitnessGoal.objects.create(
+                user=self.user,
+                goal_type='WORKOUT',
+                title=f'Goal {i}',
+                target_value=10,
+                unit='sessions',
+                target_date=timezone.now() + timedelta(days=30),
+            )
+        FitnessGoal.objects.update(last_updated=timezone.now() - timedelta(days=8))
+        Notification.objects.all().delete()
+
+    def test_inactive_goals_are_marked_and_notified_in_bulk(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('check_inactive_goals'))
+        # goal lookup, notification insert, status update
+        self.assertEqual(len(data_queries(queries)), 3)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['message'], '5 goals marked as inactive')
+        self.assertEqual(FitnessGoal.objects.filter(status='INACTIVE').count(), 5)
+        self.assertEqual(Notification.objects.filter(notification_type='GOAL_INACTIVE').count(), 5)
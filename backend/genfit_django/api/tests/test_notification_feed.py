@@ -0,0 +1,147 @@
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from ..models import UserWithType, Forum, Thread, Comment, Subcomment, Notification, Vote
+
+
+class NotificationFeedTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = UserWithType.objects.create_user(
+            username='owner', email='owner@example.com', password='pass', user_type='User'
+        )
+        self.other = UserWithType.objects.create_user(
+            username='other', email='other@example.com', password='pass', user_type='User'
+        )
+        self.forum = Forum.objects.create(title='Test Forum', created_by=self.owner)
+        self.thread = Thread.objects.create(
+            forum=self.forum, title='Test Thread', content='Content', author=self.owner
+        )
+        self.comment = Comment.objects.create(thread=self.thread, author=self.owner, content='Comment')
+        self.subcomment = Subcomment.objects.create(comment=self.comment, author=self.owner, content='Reply')
+        Notification.objects.all().delete()
+        self.client.force_authenticate(user=self.owner)
+
+    def _create_notifications(self, count):
+        targets = [
+            ('Thread', self.thread.id),
+            ('Comment', self.comment.id),
+            ('Subcomment', self.subcomment.id),
+        ]
+        for i in range(count):
+            related_object_type, related_object_id = targets[i % len(targets)]
+            Notification.objects.create(
+                recipient=self.owner,
+                sender=self.other,
+                notification_type='LIKE',
+                title=f'Notification {i}',
+                message='message',
+                related_object_id=related_object_id,
+                related_object_type=related_object_type,
+            )
+
+    def test_feed_is_cursor_paginated(self):
+        self._create_notifications(5)
+        response = self.client.get(reverse('get_notification_feed'), {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+        seen = [n['id'] for n in response.data['results']]
+        next_url = response.data['next']
+        while next_url:
+            response = self.client.get(next_url)
+            seen.extend(n['id'] for n in response.data['results'])
+            next_url = response.data['next']
+        expected = list(Notification.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(seen, expected)
+
+    def test_feed_resolves_target_thread_ids(self):
+        self._create_notifications(3)
+        response = self.client.get(reverse('get_notification_feed'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        for notification in response.data['results']:
+            self.assertEqual(notification['target_thread_id'], self.thread.id)
+            self.assertEqual(notification['sender_username'], 'other')
+
+    def test_feed_query_count_does_not_grow_with_page_size(self):
+        self._create_notifications(30)
+        # one page query, one comment lookup, one subcomment lookup
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('get_notification_feed'), {'page_size': 30})
+        self.assertEqual(len(response.data['results']), 30)
+
+    def test_legacy_list_query_count(self):
+        self._create_notifications(30)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('get_notifications'))
+        self.assertEqual(len(response.data), 30)
+
+    def test_unread_count(self):
+        self._create_notifications(4)
+        Notification.objects.filter(id=Notification.objects.first().id).update(is_read=True)
+        response = self.client.get(reverse('get_unread_notification_count'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['unread_count'], 3)
+
+    def test_unread_count_requires_authentication(self):
+        response = APIClient().get(reverse('get_unread_notification_count'))
+        self.assertIn(response.status_code, [status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN])
+
+
+class NotificationTargetThreadTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = UserWithType.objects.create_user(
+            username='owner', email='owner@example.com', password='pass', user_type='User'
+        )
+        self.other = UserWithType.objects.create_user(
+            username='other', email='other@example.com', password='pass', user_type='User'
+        )
+        self.forum = Forum.objects.create(title='Test Forum', created_by=self.owner)
+        self.thread = Thread.objects.create(
+            forum=self.forum, title='Test Thread', content='Content', author=self.owner
+        )
+        self.client.force_authenticate(user=self.owner)
+
+    def test_signals_store_target_thread_id(self):
+        comment = Comment.objects.create(thread=self.thread, author=self.other, content='Comment')
+        own_comment = Comment.objects.create(thread=self.thread, author=self.owner, content='Mine')
+        Subcomment.objects.create(comment=own_comment, author=self.other, content='Reply')
+        Vote.create_or_update_vote(self.other, self.thread, 'UPVOTE')
+        Vote.create_or_update_vote(self.owner, comment, 'UPVOTE')
+
+        notifications = Notification.objects.all()
+        self.assertEqual(notifications.count(), 4)
+        for notification in notifications:
+            self.assertEqual(notification.target_thread_id, self.thread.id)
+
+    def test_feed_reads_stored_target_thread_id_without_joins(self):
+        for _ in range(10):
+            Comment.objects.create(thread=self.thread, author=self.other, content='Comment')
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('get_notification_feed'))
+        for notification in response.data['results']:
+            self.assertEqual(notification['target_thread_id'], self.thread.id)
+
+    def test_backfill_command(self):
+        comment = Comment.objects.create(thread=self.thread, author=self.owner, content='Comment')
+        subcomment = Subcomment.objects.create(comment=comment, author=self.owner, content='Reply')
+        for related_object_type, related_object_id in [('Comment', comment.id), ('Subcomment', subcomment.id)]:
+            Notification.objects.create(
+                recipient=self.owner,
+                notification_type='LIKE',
+                title='Legacy',
+                message='message',
+                related_object_id=related_object_id,
+                related_object_type=related_object_type,
+            )
+
+        call_command('backfill_notification_threads', batch_size=1, stdout=StringIO())
+
+        self.assertFalse(Notification.objects.filter(target_thread_id__isnull=True).exists())
+        self.assertEqual(
+            set(Notification.objects.values_list('target_thread_id', flat=True)), {self.thread.id}
+        )
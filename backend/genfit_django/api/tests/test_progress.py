@@ -0,0 +1,127 @@
+import datetime
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from api.models import UserWithType, Challenge, ChallengeParticipant, FitnessGoal, Notification, ProgressSubmission
+
+
+class ProgressTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.coach = UserWithType.objects.create_user(
+            username="coach", email="coach@example.com", password="coachpass", user_type="Coach"
+        )
+        self.user = UserWithType.objects.create_user(
+            username="runner", email="runner@example.com", password="userpass", user_type="User"
+        )
+        self.challenge = Challenge.objects.create(
+            coach=self.coach, title="Run 10 km", challenge_type="running", target_value=10, unit="km",
+            start_date=timezone.now() - datetime.timedelta(days=1),
+            end_date=timezone.now() + datetime.timedelta(days=1),
+        )
+        self.participant = ChallengeParticipant.objects.create(challenge=self.challenge, user=self.user)
+        self.goal = FitnessGoal.objects.create(
+            user=self.user, goal_type="YOGA", title="Yoga minutes", target_value=60, unit="minutes",
+            target_date=timezone.now() + datetime.timedelta(days=30),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("update_progress", args=[self.challenge.id])
+        self.batch_url = reverse("submit_progress_batch")
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_progress_is_added_and_finish_date_set_at_target(self):
+        response = self.client.post(self.url, {"added_value": 4}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.current_value, 4)
+        self.assertIsNone(self.participant.finish_date)
+
+        self.client.post(self.url, {"added_value": 6}, format="json")
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.current_value, 10)
+        finished_at = self.participant.finish_date
+        self.assertIsNotNone(finished_at)
+
+        self.client.post(self.url, {"added_value": 1}, format="json")
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.finish_date, finished_at)
+
+    def test_invalid_added_value_is_rejected(self):
+        for value in [None, "abc", -3, 0, True, "nan", "inf"]:
+            response = self.client.post(self.url, {"added_value": value}, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, value)
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.current_value, 0)
+
+    def test_retry_with_same_idempotency_key_is_not_counted_twice(self):
+        for _ in range(2):
+            response = self.client.post(self.url, {"added_value": 3}, format="json", HTTP_IDEMPOTENCY_KEY="run-1")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["detail"], "Progress already recorded.")
+        self.participant.refresh_from_db()
+        self.assertEqual(self.participant.current_value, 3)
+
+        response = self.client.post(self.url, {"added_value": 5, "idempotency_key": "run-1"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+
+    def test_failed_submission_does_not_use_up_its_key(self):
+        self.challenge.end_date = timezone.now() - datetime.timedelta(hours=1)
+        self.challenge.save()
+        response = self.client.post(self.url, {"added_value": 3, "idempotency_key": "late"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(ProgressSubmission.objects.filter(idempotency_key="late").exists())
+
+    def test_non_participant_is_rejected(self):
+        self.participant.delete()
+        response = self.client.post(self.url, {"added_value": 3}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_batch_applies_challenges_and_goals(self):
+        entries = [
+            {"type": "challenge", "id": self.challenge.id, "added_value": 2, "idempotency_key": "c-1"},
+            {"type": "goal", "id": self.goal.id, "added_value": 45, "idempotency_key": "g-1"},
+            {"type": "goal", "id": self.goal.id, "added_value": 20, "idempotency_key": "g-2"},
+            {"type": "goal", "id": self.goal.id, "added_value": 20, "idempotency_key": "g-2"},
+            {"type": "goal", "id": 999999, "added_value": 1},
+            {"type": "workout", "id": self.goal.id, "added_value": 1},
+        ]
+        response = self.client.post(self.batch_url, {"entries": entries}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["applied", "applied", "applied", "duplicate", "error", "error"],
+        )
+        self.assertEqual(response.data["results"][4]["status_code"], 404)
+
+        self.participant.refresh_from_db()
+        self.goal.refresh_from_db()
+        self.assertEqual(self.participant.current_value, 2)
+        self.assertEqual(self.goal.current_value, 65)
+        self.assertEqual(self.goal.status, "COMPLETED")
+        self.assertEqual(
+            Notification.objects.filter(recipient=self.user, notification_type="ACHIEVEMENT").count(), 1
+        )
+
+    def test_batch_cannot_touch_other_users_goals(self):
+        other = UserWithType.objects.create_user(
+            username="other", email="other@example.com", password="userpass", user_type="User"
+        )
+        self.client.force_authenticate(other)
+        response = self.client.post(
+            self.batch_url, {"entries": [{"type": "goal", "id": self.goal.id, "added_value": 5}]}, format="json"
+        )
+        self.assertEqual(response.data["results"][0]["status"], "error")
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.current_value, 0)
+
+    def test_batch_size_is_limited(self):
+        entries = [{"type": "goal", "id": self.goal.id, "added_value": 1}] * 101
+        response = self.client.post(self.batch_url, {"entries": entries}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,109 @@
+import datetime
+
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+
+from api.models import (
+    UserWithType, Challenge, ChallengeParticipant, FitnessGoal, ProgressEvent, ProgressDailyRollup,
+)
+from api.progress_history import roll_up_progress
+
+
+def noon(day):
+    return timezone.make_aware(datetime.datetime.combine(day, datetime.time(12)))
+
+
+class ProgressHistoryTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.localdate()
+        self.user = UserWithType.objects.create_user(
+            username="runner", email="runner@example.com", password="userpass", user_type="User"
+        )
+        self.goal = FitnessGoal.objects.create(
+            user=self.user, goal_type="WALKING_RUNNING", title="Run 100 km", target_value=100, unit="km",
+            target_date=timezone.now() + datetime.timedelta(days=60),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("goal_progress_history", args=[self.goal.id])
+
+    def tearDown(self):
+        cache.clear()
+
+    def _event(self, days_ago, delta):
+        ProgressEvent.objects.create(
+            user=self.user, target_type=ProgressEvent.GOAL, target_id=self.goal.id,
+            delta=delta, recorded_at=noon(self.today - datetime.timedelta(days=days_ago)),
+        )
+
+    def test_progress_updates_append_events(self):
+        self.client.patch(reverse("update_goal_progress", args=[self.goal.id]), {"current_value": 5}, format="json")
+        self.client.patch(reverse("update_goal_progress", args=[self.goal.id]), {"current_value": 12}, format="json")
+        self.client.post(
+            reverse("submit_progress_batch"),
+            {"entries": [{"type": "goal", "id": self.goal.id, "added_value": 3}]}, format="json",
+        )
+        deltas = ProgressEvent.objects.filter(target_id=self.goal.id).order_by("id").values_list("delta", flat=True)
+        self.assertEqual(list(deltas), [5, 7, 3])
+
+    def test_challenge_progress_appends_events(self):
+        coach = UserWithType.objects.create_user(
+            username="coach", email="coach@example.com", password="coachpass", user_type="Coach"
+        )
+        challenge = Challenge.objects.create(
+            coach=coach, title="Steps", challenge_type="steps", target_value=100, unit="steps",
+            start_date=timezone.now() - datetime.timedelta(days=1),
+            end_date=timezone.now() + datetime.timedelta(days=1),
+        )
+        ChallengeParticipant.objects.create(challenge=challenge, user=self.user)
+        self.client.post(reverse("update_progress", args=[challenge.id]), {"added_value": 40}, format="json")
+
+        response = self.client.get(reverse("challenge_progress_history", args=[challenge.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["total"], 40)
+        self.assertEqual(response.data["current_streak"], 1)
+
+    def test_daily_history_combines_rollups_and_todays_events(self):
+        for days_ago, delta in [(3, 2), (2, 4), (2, 1), (1, 3), (0, 5)]:
+            self._event(days_ago, delta)
+        self.assertEqual(roll_up_progress(self.today), 3)
+        self.assertEqual(roll_up_progress(self.today), 1)  # only the last rolled-up day again
+        self.assertEqual(ProgressDailyRollup.objects.count(), 3)
+
+        with self.assertNumQueries(4):  # goal, last rolled-up day, rollup buckets, event buckets
+            response = self.client.get(self.url, {"days": 7})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        buckets = response.data["buckets"]
+        self.assertEqual([bucket["total"] for bucket in buckets], [2, 5, 3, 5])
+        self.assertEqual([bucket["entries"] for bucket in buckets], [1, 2, 1, 1])
+        self.assertEqual([bucket["running_total"] for bucket in buckets], [2, 7, 10, 15])
+        self.assertEqual(buckets[-1]["period_start"], self.today)
+        self.assertEqual(response.data["total"], 15)
+        self.assertEqual(response.data["current_streak"], 4)
+
+    def test_weekly_history(self):
+        for days_ago in range(14):
+            self._event(days_ago, 1)
+        roll_up_progress(self.today)
+
+        response = self.client.get(self.url, {"period": "week", "days": 14})
+        buckets = response.data["buckets"]
+        self.assertEqual(sum(bucket["total"] for bucket in buckets), 14)
+        self.assertEqual(buckets[-1]["running_total"], 14)
+        self.assertTrue(all(bucket["period_start"].weekday() == 0 for bucket in buckets))
+        self.assertNotIn("current_streak", response.data)
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(self.url, {"period": "month"}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"days": 0}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_other_users_cannot_read_history(self):
+        other = UserWithType.objects.create_user(
+            username="other", email="other@example.com", password="userpass", user_type="User"
+        )
+        self.client.force_authenticate(other)
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,96 @@
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from ..models import Forum, Thread, Comment, Subcomment, Challenge
+
+User = get_user_model()
+
+
+class SearchAPITests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password123', user_type='User'
+        )
+        self.coach = User.objects.create_user(
+            username='coach', email='coach@example.com', password='password123', user_type='Coach'
+        )
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('search_content')
+
+        forum = Forum.objects.create(title='Running', created_by=self.user)
+        self.title_match = Thread.objects.create(
+            forum=forum, title='Marathon training plan', content='Weekly mileage for beginners', author=self.user
+        )
+        self.content_match = Thread.objects.create(
+            forum=forum, title='Shoes', content='Which shoes do you wear for a marathon?', author=self.user
+        )
+        Thread.objects.create(forum=forum, title='Yoga', content='Morning stretching routine', author=self.user)
+        self.comment = Comment.objects.create(thread=self.title_match, author=self.user, content='I ran my first marathon last spring')
+        self.subcomment = Subcomment.objects.create(comment=self.comment, author=self.user, content='Congrats on the marathon!')
+        self.challenge = Challenge.objects.create(
+            coach=self.coach, title='Spring marathon', description='Build up to 42 km', challenge_type='distance',
+            target_value=42, unit='km', location='Istanbul', end_date=timezone.now() + timedelta(days=30)
+        )
+
+    def _search(self, q, **params):
+        response = self.client.get(self.url, {'q': q, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_threads_are_ranked_with_title_first(self):
+        data = self._search('marathon')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual([r['id'] for r in data['results']], [self.title_match.id, self.content_match.id])
+        self.assertIn('<mark>marathon</mark>', data['results'][1]['snippet'])
+
+    def test_snippet_escapes_the_stored_text(self):
+        # ts_headline drops tag-like tokens itself, but keeps stray < and &
+        Thread.objects.create(
+            forum=self.title_match.forum, title='Tips', author=self.user,
+            content='Pace 5 < 6 & hydration tips for race day',
+        )
+        snippet = self._search('hydration')['results'][0]['snippet']
+        self.assertIn('&lt;', snippet)
+        self.assertIn('&amp;', snippet)
+        self.assertNotIn(' < ', snippet)
+        self.assertIn('<mark>hydration</mark>', snippet)
+
+    def test_search_vector_is_not_serialized(self):
+        response = self.client.get(reverse('get_challenge_detail', args=[self.challenge.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['challenge']['id'], self.challenge.id)
+        self.assertNotIn('search_vector', response.data['challenge'])
+
+    def test_stemmed_words_match(self):
+        data = self._search('trainings')
+        self.assertEqual([r['id'] for r in data['results']], [self.title_match.id])
+
+    def test_each_type_is_searchable(self):
+        self.assertEqual(self._search('marathon', type='comment')['results'][0]['id'], self.comment.id)
+        subcomment = self._search('marathon', type='subcomment')['results'][0]
+        self.assertEqual(subcomment['thread_id'], self.title_match.id)
+        self.assertEqual(self._search('istanbul', type='challenge')['results'][0]['id'], self.challenge.id)
+
+    def test_vector_follows_edits(self):
+        self.content_match.content = 'Which trail shoes do you wear?'
+        self.content_match.save()
+        self.assertEqual(self._search('marathon')['count'], 1)
+        self.assertEqual(self._search('trail')['results'][0]['id'], self.content_match.id)
+
+    def test_counter_updates_keep_vector(self):
+        Thread.objects.filter(pk=self.content_match.pk).update(like_count=5)
+        self.assertEqual(self._search('marathon')['count'], 2)
+
+    def test_results_are_paginated(self):
+        data = self._search('marathon', page_size=1)
+        self.assertEqual(len(data['results']), 1)
+        self.assertIsNotNone(data['next'])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'q': 'marathon', 'type': 'forum'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
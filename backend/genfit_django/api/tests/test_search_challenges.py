@@ -1,11 +1,13 @@
 import datetime
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
+from django.test import override_settings
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 
+from api.geocoding import clear_memory_cache
 from api.models import UserWithType, Challenge, ChallengeParticipant
 
 
@@ -154,7 +156,7 @@ class SearchChallengesAPITest(APITestCase):
         self.assertNotIn(age_too_low.id, ids)  # 10-19 excludes 20
         self.assertIn(self.active_challenge.id, ids)  # 18-60 includes 20
 
-    @patch("api.utils.geocode_location", return_value=(41.0, 29.0))
+    @patch("api.separate_views.challenges.geocode_location", return_value=(41.0, 29.0))
     def test_location_radius_filter(self, mocked_geo):
         # distance 0 → active_challenge should match
         response = self._get(location="Kadıköy", radius_km=5)
@@ -178,6 +180,116 @@ class SearchChallengesAPITest(APITestCase):
         self.assertNotIn(far.id, ids)
 
     def test_invalid_radius_returns_400(self):
-        response = self._get(location="Kadıköy", radius_km="abc")
+        for radius in ["abc", "nan", "inf", "0"]:
+            response = self._get(location="Kadıköy", radius_km=radius)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, radius)
+
+    @patch("api.separate_views.challenges.geocode_location", return_value=(None, None))
+    def test_unresolved_location_returns_400(self, mocked_geo):
+        response = self._get(location="Atlantis", radius_km=5)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(GEOCODING_GAZETTEER_PATH=None)
+    @patch("api.geocoding.requests.get")
+    def test_first_search_of_a_place_is_geocoded(self, mock_get):
+        mock_get.return_value = MagicMock(**{"json.return_value": [{"lat": "41.0", "lon": "29.0"}]})
+        clear_memory_cache()
+        self.addCleanup(clear_memory_cache)
+        response = self._get(location="Moda", radius_km=5)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(self.active_challenge.id, {c["id"] for c in response.data})
+        self.assertEqual(mock_get.call_count, 1)
+
+
+
+class SearchChallengesDistanceTest(APITestCase):
+    """Distance filtering, ordering and pagination done in the database."""
+
+    def setUp(self):
+        self.coach = UserWithType.objects.create_user(
+            username="coach", email="coach@example.com", password="coachpass", user_type="Coach"
+        )
+        self.user = UserWithType.objects.create_user(
+            username="runner", email="runner@example.com", password="userpass", user_type="User"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("search-challenges")
+
+        # Roughly 0, 4, 8 and 30 km east of (60.0, 25.0); at 60°N a degree of longitude is ~55.7 km
+        self.here = self._challenge("Here", 60.0, 25.0)
+        self.near = self._challenge("Near", 60.0, 25.072)
+        self.farther = self._challenge("Farther", 60.0, 25.144)
+        self.outside = self._challenge("Outside", 60.0, 25.54)
+        self._challenge("No coordinates", None, None)
+
+    def _challenge(self, title, lat, lon):
+        return Challenge.objects.create(
+            coach=self.coach, title=title, challenge_type="distance", target_value=1, unit="km",
+            end_date=timezone.now() + datetime.timedelta(days=1), latitude=lat, longitude=lon,
+        )
+
+    @patch("api.separate_views.challenges.geocode_location", return_value=(60.0, 25.0))
+    def test_radius_accounts_for_longitude_shrinkage(self, mocked_geo):
+        response = self.client.get(self.url, {"location": "Helsinki", "radius_km": 10, "order_by": "distance"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([c["id"] for c in response.data], [self.here.id, self.near.id, self.farther.id])
+        self.assertAlmostEqual(response.data[1]["distance_km"], 4.0, delta=0.1)
+
+    @patch("api.separate_views.challenges.geocode_location", return_value=(60.0, 25.0))
+    def test_distance_pages(self, mocked_geo):
+        params = {"location": "Helsinki", "radius_km": 50, "order_by": "distance", "page_size": 2}
+        first = self.client.get(self.url, params)
+        self.assertEqual(first.data["count"], 4)
+        self.assertEqual([c["id"] for c in first.data["results"]], [self.here.id, self.near.id])
+        second = self.client.get(first.data["next"])
+        self.assertEqual([c["id"] for c in second.data["results"]], [self.farther.id, self.outside.id])
+
+    def test_distance_only_returned_for_location_search(self):
+        response = self.client.get(self.url)
+        self.assertNotIn("distance_km", response.data[0])
+
+    def test_invalid_order_by_returns_400(self):
+        response = self.client.get(self.url, {"order_by": "title"})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+
+class SearchChallengesQueryCountTest(APITestCase):
+    """Participant stats come from annotations, not one query per challenge."""
+
+    def setUp(self):
+        self.coach = UserWithType.objects.create_user(
+            username="coach", email="coach@example.com", password="coachpass", user_type="Coach"
+        )
+        self.user = UserWithType.objects.create_user(
+            username="runner", email="runner@example.com", password="userpass", user_type="User"
+        )
+        self.other = UserWithType.objects.create_user(
+            username="walker", email="walker@example.com", password="userpass", user_type="User"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse("search-challenges")
+
+        self.challenges = [
+            Challenge.objects.create(
+                coach=self.coach, title=f"Challenge {i}", challenge_type="steps", target_value=100, unit="steps",
+                end_date=timezone.now() + datetime.timedelta(days=1),
+            )
+            for i in range(5)
+        ]
+        ChallengeParticipant.objects.create(challenge=self.challenges[0], user=self.user, current_value=42)
+        ChallengeParticipant.objects.create(challenge=self.challenges[0], user=self.other)
+        ChallengeParticipant.objects.create(challenge=self.challenges[1], user=self.other)
+
+    def test_stats_are_annotated(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        by_id = {c["id"]: c for c in response.data}
+        first, second = by_id[self.challenges[0].id], by_id[self.challenges[1].id]
+        self.assertEqual((first["participant_count"], first["is_joined"], first["user_progress"]), (2, True, 42))
+        self.assertEqual((second["participant_count"], second["is_joined"], second["user_progress"]), (1, False, 0))
+
+    def test_count_is_not_narrowed_by_participation_filter(self):
+        response = self.client.get(self.url, {"user_participating": "true"})
+        self.assertEqual([(c["id"], c["participant_count"]) for c in response.data], [(self.challenges[0].id, 2)])
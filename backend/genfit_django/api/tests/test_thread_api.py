@@ -1,13 +1,20 @@
+from io import StringIO
+from unittest import skipUnless
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
 from ..models import Forum, Thread
+from ..shared_cache import redis_client
 
 User = get_user_model()
 
 class ThreadAPITests(APITestCase):
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.user = User.objects.create_user(
             username='user',
@@ -67,14 +74,71 @@ class ThreadAPITests(APITestCase):
         self.assertEqual(len(response.data), 1)
 
     def test_retrieve_thread_increments_view_count(self):
-        """Ensure retrieving a thread increments view_count"""
+        """Ensure retrieving a thread increments view_count once buffered views are flushed"""
         url = reverse('thread-detail', args=[self.thread.id])
         initial_views = self.thread.view_count
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['view_count'], initial_views + 1)
+        call_command('flush_thread_views', stdout=StringIO())
         self.thread.refresh_from_db()
         self.assertEqual(self.thread.view_count, initial_views + 1)
 
+    @skipUnless(redis_client(), 'views are only buffered with a Redis cache')
+    def test_retrieve_thread_does_not_write_thread_row(self):
+        """Ensure reading a thread leaves view_count and last_activity alone until the flush"""
+        url = reverse('thread-detail', args=[self.thread.id])
+        last_activity = self.thread.last_activity
+        with self.assertNumQueries(1):  # thread lookup joined with author and forum, no UPDATE
+            self.client.get(url)
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.view_count, 0)
+        self.assertEqual(self.thread.last_activity, last_activity)
+
+        call_command('flush_thread_views', stdout=StringIO())
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.view_count, 1)
+        self.assertEqual(self.thread.last_activity, last_activity)
+
+    @skipUnless(redis_client() is None, 'views are buffered with a Redis cache')
+    def test_views_are_written_through_without_redis(self):
+        """Ensure each view reaches the row right away when there is nothing to buffer views in"""
+        url = reverse('thread-detail', args=[self.thread.id])
+        last_activity = self.thread.last_activity
+        with self.assertNumQueries(2):  # thread lookup, view_count + 1
+            response = self.client.get(url)
+        self.assertEqual(response.data['view_count'], 1)
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.view_count, 1)
+        self.assertEqual(self.thread.last_activity, last_activity)
+
+    def test_repeat_views_by_same_user_are_counted_once(self):
+        """Ensure a user re-opening a thread within the dedup window is not counted again"""
+        self.client.force_authenticate(user=self.user)
+        url = reverse('thread-detail', args=[self.thread.id])
+        self.client.get(url)
+        response = self.client.get(url)
+        self.assertEqual(response.data['view_count'], 1)
+
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get(url)
+        self.assertEqual(response.data['view_count'], 2)
+
+    @override_settings(THREAD_VIEW_DEDUP_SECONDS=0)
+    def test_flush_writes_buffered_views_in_bulk(self):
+        """Ensure the flush applies every thread's pending views and keeps nothing twice"""
+        other_thread = Thread.objects.create(forum=self.forum, title='Other', content='Content', author=self.user)
+        for _ in range(3):
+            self.client.get(reverse('thread-detail', args=[self.thread.id]))
+        self.client.get(reverse('thread-detail', args=[other_thread.id]))
+
+        call_command('flush_thread_views', stdout=StringIO())
+        call_command('flush_thread_views', stdout=StringIO())
+        self.thread.refresh_from_db()
+        other_thread.refresh_from_db()
+        self.assertEqual(self.thread.view_count, 3)
+        self.assertEqual(other_thread.view_count, 1)
+
     def test_update_thread_author(self):
         """Ensure author can update their thread"""
         self.client.force_authenticate(user=self.user)
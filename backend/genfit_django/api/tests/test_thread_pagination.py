@@ -0,0 +1,83 @@
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from ..models import Forum, Thread, ThreadBookmark
+
+User = get_user_model()
+
+
+class ThreadPaginationTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='password123',
+            user_type='User'
+        )
+        self.forum = Forum.objects.create(title='Test Forum', created_by=self.user)
+        self.other_forum = Forum.objects.create(title='Other Forum', created_by=self.user)
+
+        now = timezone.now()
+        self.threads = []
+        for i in range(7):
+            thread = Thread.objects.create(
+                forum=self.forum if i % 2 == 0 else self.other_forum,
+                title=f'Thread {i}',
+                content='Content',
+                author=self.user,
+                is_pinned=(i == 0),
+            )
+            self.threads.append(thread)
+        # Two threads share a timestamp so the id tiebreaker is exercised
+        for i, thread in enumerate(self.threads):
+            Thread.objects.filter(id=thread.id).update(last_activity=now - timedelta(minutes=min(i, 5)))
+
+    def _walk(self, url, page_size):
+        ids = []
+        response = self.client.get(url, {'page_size': page_size})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data['results']), page_size)
+            ids.extend(thread['id'] for thread in response.data['results'])
+            if response.data['next'] is None:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_unpaginated_list_is_unchanged(self):
+        response = self.client.get(reverse('thread-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 7)
+
+    def test_thread_list_pages_follow_ordering(self):
+        expected = list(Thread.objects.order_by('-is_pinned', '-last_activity', '-id').values_list('id', flat=True))
+        self.assertEqual(self._walk(reverse('thread-list'), page_size=2), expected)
+        self.assertEqual(expected[0], self.threads[0].id)
+
+    def test_page_is_one_query(self):
+        first = self.client.get(reverse('thread-list'), {'page_size': 3})
+        with self.assertNumQueries(1):
+            response = self.client.get(first.data['next'])
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(response.data['results'][0]['author'], 'user')
+
+    def test_forum_threads_are_paginated(self):
+        url = reverse('forum-threads', args=[self.forum.id])
+        expected = list(
+            Thread.objects.filter(forum=self.forum).order_by('-is_pinned', '-last_activity', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(self._walk(url, page_size=3), expected)
+
+    def test_bookmarked_threads_are_paginated(self):
+        self.client.force_authenticate(user=self.user)
+        for thread in self.threads[:5]:
+            ThreadBookmark.objects.create(user=self.user, thread=thread)
+        ids = self._walk(reverse('thread-bookmarked'), page_size=2)
+        self.assertEqual(sorted(ids), sorted(thread.id for thread in self.threads[:5]))
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(reverse('thread-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
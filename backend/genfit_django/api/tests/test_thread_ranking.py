@@ -0,0 +1,81 @@
+from datetime import timedelta
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from ..models import Forum, Thread
+from ..thread_scores import refresh_thread_scores
+
+User = get_user_model()
+
+
+class ThreadRankingTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='password123',
+            user_type='User'
+        )
+        self.forum = Forum.objects.create(title='Test Forum', created_by=self.user)
+        self.url = reverse('thread-list')
+
+        now = timezone.now()
+        self.fresh_popular = self._thread('Fresh popular', now - timedelta(hours=2), likes=20)
+        self.fresh_quiet = self._thread('Fresh quiet', now - timedelta(hours=1), likes=1)
+        self.week_old = self._thread('Three days old', now - timedelta(days=3), likes=50)
+        self.ancient = self._thread('Ancient', now - timedelta(days=30), likes=500)
+        refresh_thread_scores()
+
+    def _thread(self, title, created_at, likes):
+        thread = Thread.objects.create(forum=self.forum, title=title, content='Content', author=self.user)
+        Thread.objects.filter(pk=thread.pk).update(created_at=created_at, like_count=likes)
+        return thread
+
+    def _ids(self, sort, **params):
+        response = self.client.get(self.url, {'sort': sort, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [thread['id'] for thread in response.data['results']]
+
+    def test_hot_weighs_engagement_against_age(self):
+        self.assertEqual(
+            self._ids('hot'),
+            [self.fresh_popular.id, self.fresh_quiet.id, self.week_old.id, self.ancient.id]
+        )
+
+    def test_top_week_only_includes_last_week(self):
+        self.assertEqual(self._ids('top_week'), [self.week_old.id, self.fresh_popular.id, self.fresh_quiet.id])
+
+    def test_rising_only_includes_last_day(self):
+        self.assertEqual(self._ids('rising'), [self.fresh_popular.id, self.fresh_quiet.id])
+
+    def test_refresh_only_rescores_changed_or_rising_threads(self):
+        self.assertEqual(refresh_thread_scores(), 2)
+        Thread.objects.filter(pk=self.ancient.pk).update(comment_count=5)
+        self.assertEqual(refresh_thread_scores(), 3)
+        self.assertEqual(refresh_thread_scores(), 2)
+
+    def test_aged_out_threads_leave_windowed_rankings(self):
+        refresh_thread_scores(now=timezone.now() + timedelta(days=2))
+        self.week_old.refresh_from_db()
+        self.fresh_popular.refresh_from_db()
+        self.assertEqual(self.fresh_popular.rising_score, 0)
+        self.assertGreater(self.week_old.top_week_score, 0)
+
+    def test_new_thread_is_scored_on_create(self):
+        thread = Thread.objects.create(forum=self.forum, title='New', content='Content', author=self.user)
+        self.assertGreater(thread.hot_score, self.ancient.hot_score)
+        self.assertIn(thread.id, self._ids('rising'))
+
+    def test_ranked_pages_follow_ranking(self):
+        first = self.client.get(self.url, {'sort': 'hot', 'page_size': 3})
+        self.assertEqual(len(first.data['results']), 3)
+        second = self.client.get(first.data['next'])
+        self.assertEqual([thread['id'] for thread in second.data['results']], [self.ancient.id])
+        self.assertIsNone(second.data['next'])
+
+    def test_unknown_sort_is_rejected(self):
+        response = self.client.get(self.url, {'sort': 'best'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
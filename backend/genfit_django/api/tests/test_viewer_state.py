@@ -0,0 +1,86 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from django.contrib.auth import get_user_model
+from ..models import Forum, Thread, Comment, Subcomment, Vote, ThreadBookmark
+
+User = get_user_model()
+
+
+class ViewerStateTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='user',
+            email='user@example.com',
+            password='password123',
+            user_type='User'
+        )
+        self.author = User.objects.create_user(
+            username='author',
+            email='author@example.com',
+            password='password123',
+            user_type='User'
+        )
+        self.forum = Forum.objects.create(title='Test Forum', created_by=self.author)
+        self.threads = [
+            Thread.objects.create(forum=self.forum, title=f'Thread {i}', content='Content', author=self.author)
+            for i in range(4)
+        ]
+        Vote.create_or_update_vote(self.user, self.threads[0], 'UPVOTE')
+        Vote.create_or_update_vote(self.user, self.threads[1], 'DOWNVOTE')
+        ThreadBookmark.objects.create(user=self.user, thread=self.threads[0])
+        ThreadBookmark.objects.create(user=self.user, thread=self.threads[2])
+
+        self.comments = [
+            Comment.objects.create(thread=self.threads[0], author=self.author, content=f'Comment {i}')
+            for i in range(3)
+        ]
+        Vote.create_or_update_vote(self.user, self.comments[1], 'UPVOTE')
+        self.subcomment = Subcomment.objects.create(comment=self.comments[0], author=self.author, content='Reply')
+        Vote.create_or_update_vote(self.user, self.subcomment, 'DOWNVOTE')
+        self.client.force_authenticate(user=self.user)
+
+    def test_thread_list_includes_viewer_state_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('thread-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        state = {thread['id']: (thread['my_vote'], thread['is_bookmarked']) for thread in response.data}
+        self.assertEqual(state, {
+            self.threads[0].id: ('UPVOTE', True),
+            self.threads[1].id: ('DOWNVOTE', False),
+            self.threads[2].id: (None, True),
+            self.threads[3].id: (None, False),
+        })
+
+    def test_forum_threads_include_viewer_state(self):
+        with self.assertNumQueries(2):  # forum lookup, thread page
+            response = self.client.get(reverse('forum-threads', args=[self.forum.id]), {'page_size': 10})
+        votes = {thread['id']: thread['my_vote'] for thread in response.data['results']}
+        self.assertEqual(votes[self.threads[1].id], 'DOWNVOTE')
+
+    def test_thread_detail_includes_viewer_state(self):
+        response = self.client.get(reverse('thread-detail', args=[self.threads[0].id]))
+        self.assertEqual(response.data['my_vote'], 'UPVOTE')
+        self.assertTrue(response.data['is_bookmarked'])
+
+    def test_comments_include_my_vote_without_per_comment_queries(self):
+        url = reverse('get_comments_for_thread_date', args=[self.threads[0].id])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        vote_queries = [q['sql'] for q in queries.captured_queries if '"api_vote"' in q['sql']]
+        self.assertEqual(len(vote_queries), 1)  # the subquery inside the comment query
+        self.assertEqual([comment['my_vote'] for comment in response.data], [None, 'UPVOTE', None])
+
+    def test_subcomments_include_my_vote(self):
+        response = self.client.get(reverse('get_subcomments_by_comment_date', args=[self.comments[0].id]))
+        self.assertEqual(response.data[0]['my_vote'], 'DOWNVOTE')
+
+    def test_anonymous_viewer_gets_empty_state(self):
+        self.client.force_authenticate(user=None)
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('thread-list'))
+        self.assertTrue(all(thread['my_vote'] is None for thread in response.data))
+        self.assertTrue(all(thread['is_bookmarked'] is False for thread in response.data))
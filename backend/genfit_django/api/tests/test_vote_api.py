@@ -1,8 +1,12 @@
+import threading
+from django.db import connection
+from django.test import TransactionTestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from django.contrib.auth import get_user_model
-from ..models import Forum, Thread, Comment, Subcomment, Vote
+from ..models import Forum, Thread, Comment, Subcomment, Vote, Notification
 
 User = get_user_model()
 
@@ -138,3 +142,125 @@ class VoteAPITests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.subcomment.refresh_from_db()
         self.assertEqual(self.subcomment.like_count, 1)
+
+
+class VoteServiceTests(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='password123', user_type='User'
+        )
+        self.voter = User.objects.create_user(
+            username='voter', email='voter@example.com', password='password123', user_type='User'
+        )
+        forum = Forum.objects.create(title='Test Forum', description='Test Description', created_by=self.author)
+        self.thread = Thread.objects.create(forum=forum, title='Test Thread', content='Test Content', author=self.author)
+        self.comment = Comment.objects.create(thread=self.thread, author=self.author, content='Test Comment')
+        self.subcomment = Subcomment.objects.create(comment=self.comment, author=self.author, content='Test Subcomment')
+        Notification.objects.all().delete()
+        self.client.force_authenticate(user=self.voter)
+        self.url = reverse('create_vote')
+
+    def test_upvote_notifies_author_once_with_target_thread(self):
+        for content_type, obj in (('THREAD', self.thread), ('COMMENT', self.comment), ('SUBCOMMENT', self.subcomment)):
+            self.client.post(self.url, {'content_type': content_type, 'object_id': obj.id, 'vote_type': 'UPVOTE'})
+            self.client.post(self.url, {'content_type': content_type, 'object_id': obj.id, 'vote_type': 'UPVOTE'})
+
+        notifications = Notification.objects.filter(notification_type='LIKE', recipient=self.author)
+        self.assertEqual(notifications.count(), 3)
+        self.assertEqual(set(notifications.values_list('target_thread_id', flat=True)), {self.thread.id})
+        self.assertTrue(notifications.filter(message=f'voter upvoted your comment on thread: {self.thread.title}').exists())
+
+    def test_vote_uses_fixed_number_of_queries(self):
+        data = {'content_type': 'COMMENT', 'object_id': self.comment.id, 'vote_type': 'UPVOTE'}
+        self.client.post(self.url, data)
+        data['vote_type'] = 'DOWNVOTE'
+        # target with its thread, locked vote lookup, vote update, like_count update
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(self.url, data)
+        statements = [q['sql'] for q in queries.captured_queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 4)
+        self.assertFalse(any('django_content_type' in sql for sql in statements))
+
+    def test_flip_to_upvote_notifies(self):
+        data = {'content_type': 'THREAD', 'object_id': self.thread.id, 'vote_type': 'DOWNVOTE'}
+        self.client.post(self.url, data)
+        self.assertFalse(Notification.objects.exists())
+        data['vote_type'] = 'UPVOTE'
+        self.client.post(self.url, data)
+        self.assertEqual(Notification.objects.filter(notification_type='LIKE').count(), 1)
+
+    def test_own_content_is_not_notified(self):
+        self.client.force_authenticate(user=self.author)
+        self.client.post(self.url, {'content_type': 'THREAD', 'object_id': self.thread.id, 'vote_type': 'UPVOTE'})
+        self.assertFalse(Notification.objects.exists())
+
+    def test_invalid_vote_type_is_rejected(self):
+        response = self.client.post(self.url, {'content_type': 'THREAD', 'object_id': self.thread.id, 'vote_type': 'MEH'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Vote.objects.exists())
+
+    def test_missing_content_returns_404(self):
+        response = self.client.post(self.url, {'content_type': 'THREAD', 'object_id': self.thread.id + 1000, 'vote_type': 'UPVOTE'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_delete_missing_vote_returns_404(self):
+        response = self.client.delete(reverse('delete_vote', args=['thread', self.thread.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class VoteConcurrencyTests(TransactionTestCase):
+    """Parallel votes must not lose like_count updates."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='password123', user_type='User'
+        )
+        self.voters = [
+            User.objects.create_user(
+                username=f'voter{i}', email=f'voter{i}@example.com', password='password123', user_type='User'
+            )
+            for i in range(12)
+        ]
+        forum = Forum.objects.create(title='Test Forum', description='Test Description', created_by=self.author)
+        self.thread = Thread.objects.create(forum=forum, title='Test Thread', content='Test Content', author=self.author)
+
+    def _run_in_parallel(self, vote_type):
+        barrier = threading.Barrier(len(self.voters))
+        errors = []
+
+        def cast(voter):
+            try:
+                thread = Thread.objects.get(pk=self.thread.pk)
+                barrier.wait()
+                Vote.create_or_update_vote(voter, thread, vote_type)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=cast, args=(voter,)) for voter in self.voters]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+
+    def test_parallel_upvotes_are_all_counted(self):
+        self._run_in_parallel('UPVOTE')
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.like_count, len(self.voters))
+
+    def test_parallel_vote_flips_are_all_counted(self):
+        self._run_in_parallel('UPVOTE')
+        self._run_in_parallel('DOWNVOTE')
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.like_count, 0)
+        self.assertEqual(Vote.objects.filter(vote_type='DOWNVOTE').count(), len(self.voters))
+
+    def test_counter_updates_do_not_touch_last_activity(self):
+        last_activity = self.thread.last_activity
+        self._run_in_parallel('UPVOTE')
+        self.thread.refresh_from_db()
+        self.assertEqual(self.thread.last_activity, last_activity)
@@ -0,0 +1,118 @@
+"""
+Precomputed thread rankings for `threads/?sort=hot|top_week|rising`.
+
+Each thread stores one score column per ranking, indexed with the id so a ranked page is an index
+scan. `python manage.py refresh_thread_scores` keeps them current. A run only rescores threads whose
+engagement changed since they were last scored, plus the threads young enough to still be rising,
+and zeroes the windowed scores of threads that aged out with one UPDATE each.
+
+- hot: log10 of engagement plus the thread's age bonus, so every HOT_DECAY_SECONDS a thread needs ten
+  times the engagement to stay level with a new one. It only changes when engagement does.
+- top_week: engagement of threads created in the last TOP_WEEK_WINDOW.
+- rising: engagement per hour of age, for threads created in the last RISING_WINDOW.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+# Engagement in points: a like is worth 10 views and a comment 20, kept integral so it can be compared in SQL
+LIKE_POINTS = 10
+COMMENT_POINTS = 20
+VIEW_POINTS = 1
+
+HOT_DECAY_SECONDS = 45000
+HOT_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+TOP_WEEK_WINDOW = timedelta(days=7)
+RISING_WINDOW = timedelta(hours=24)
+RISING_GRAVITY = 1.5
+
+THREAD_RANKINGS = {
+    'hot': ('-hot_score', '-id'),
+    'top_week': ('-top_week_score', '-id'),
+    'rising': ('-rising_score', '-id'),
+}
+
+_RANKING_WINDOWS = {
+    'top_week': TOP_WEEK_WINDOW,
+    'rising': RISING_WINDOW,
+}
+
+
+def engagement(like_count, comment_count, view_count):
+    return like_count * LIKE_POINTS + comment_count * COMMENT_POINTS + view_count * VIEW_POINTS
+
+
+def engagement_expression():
+    return F('like_count') * LIKE_POINTS + F('comment_count') * COMMENT_POINTS + F('view_count') * VIEW_POINTS
+
+
+def hot_score(points, created_at):
+    return math.log10(max(points, 1)) + (created_at - HOT_EPOCH).total_seconds() / HOT_DECAY_SECONDS
+
+
+def rising_score(points, created_at, now):
+    if now - created_at > RISING_WINDOW:
+        return 0.0
+    age_hours = max((now - created_at).total_seconds(), 0) / 3600
+    return points / (age_hours + 2) ** RISING_GRAVITY
+
+
+def top_week_score(points, created_at, now):
+    if now - created_at > TOP_WEEK_WINDOW:
+        return 0
+    return points
+
+
+def score_thread(thread, now=None):
+    """Set the score columns of an (unsaved) thread from its counters."""
+    now = now or timezone.now()
+    created_at = thread.created_at or now
+    points = engagement(thread.like_count, thread.comment_count, thread.view_count)
+    thread.scored_engagement = points
+    thread.hot_score = hot_score(points, created_at)
+    thread.top_week_score = top_week_score(points, created_at, now)
+    thread.rising_score = rising_score(points, created_at, now)
+
+
+def ranked_threads(queryset, sort, now=None):
+    """Order a thread queryset by one of THREAD_RANKINGS, dropping threads outside its time window."""
+    now = now or timezone.now()
+    window = _RANKING_WINDOWS.get(sort)
+    if window is not None:
+        queryset = queryset.filter(created_at__gte=now - window)
+    return queryset.order_by(*THREAD_RANKINGS[sort])
+
+
+def refresh_thread_scores(batch_size=1000, now=None):
+    """
+    Rescore threads whose engagement moved or that are still rising. Returns the number rescored.
+    """
+    from .models import Thread
+
+    now = now or timezone.now()
+    Thread.objects.filter(created_at__lt=now - TOP_WEEK_WINDOW, top_week_score__gt=0).update(top_week_score=0)
+    Thread.objects.filter(created_at__lt=now - RISING_WINDOW, rising_score__gt=0).update(rising_score=0)
+
+    stale = (
+        Thread.objects
+        .alias(points=engagement_expression())
+        .filter(~Q(points=F('scored_engagement')) | Q(created_at__gte=now - RISING_WINDOW))
+        .order_by('id')
+        .only('id', 'created_at', 'like_count', 'comment_count', 'view_count')
+    )
+    fields = ['scored_engagement', 'hot_score', 'top_week_score', 'rising_score']
+    total = 0
+    batch = []
+    for thread in stale.iterator(chunk_size=batch_size):
+        score_thread(thread, now)
+        batch.append(thread)
+        if len(batch) >= batch_size:
+            Thread.objects.bulk_update(batch, fields)
+            total += len(batch)
+            batch = []
+    if batch:
+        Thread.objects.bulk_update(batch, fields)
+        total += len(batch)
+    return total
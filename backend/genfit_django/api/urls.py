@@ -21,15 +21,19 @@ from .separate_views import daily_advice_views
 from .separate_views import mentor_relationships
 from .separate_views import report_views
 from .separate_views import exercise_db_view
+from .separate_views import search
+from .separate_views import progress
 
 
 urlpatterns = [
     path('register/', views.register, name='register'),
+    path('register/availability/', views.check_availability, name='check_availability'),
     path('verify-email/<str:uidb64>/<str:token>/', views.verify_email, name='verify_email'),
     path('login/', views.user_login, name='login'),
     path('logout/', views.user_logout, name='logout'),
     path('user/', views.get_user, name='get_user'),
     path('user/login-stats/', views.get_login_stats, name='get_login_stats'),
+    path('user/login-calendar/', views.get_login_calendar, name='get_login_calendar'),
     path('user/settings/', views.user_settings, name='user_settings'),
     path('users/', views.get_users, name='get_users'),
     path('csrf-token/', views.get_csrf_token, name='get_csrf_token'),
@@ -39,6 +43,8 @@ urlpatterns = [
 
     # Notifications
     path('notifications/', views.get_user_notifications, name='get_notifications'),
+    path('notifications/feed/', views.get_notification_feed, name='get_notification_feed'),
+    path('notifications/unread-count/', views.get_unread_notification_count, name='get_unread_notification_count'),
     path('notifications/<int:notification_id>/', views.get_single_notification, name='get_single_notification'),
     path('notifications/<int:notification_id>/read/', views.mark_notification_read, name='mark_notification_read'),
     path('notifications/<int:notification_id>/unread/', views.mark_notification_unread, name='mark_notification_unread'),
@@ -70,6 +76,7 @@ urlpatterns = [
     path('goals/', fitness_goals.fitness_goals, name='fitness_goals'),
     path('goals/<int:goal_id>/', fitness_goals.fitness_goal_detail, name='fitness_goal_detail'),
     path('goals/<int:goal_id>/progress/', fitness_goals.update_goal_progress, name='update_goal_progress'),
+    path('goals/<int:goal_id>/progress/history/', fitness_goals.goal_progress_history, name='goal_progress_history'),
     path('goals/<int:goal_id>/restart/', fitness_goals.restart_goal, name='restart_goal'),
     path('goals/check-inactive/', fitness_goals.check_inactive_goals, name='check_inactive_goals'),
     path('goals/suggestions/', goal_suggestions.get_goal_suggestions, name='get_goal_suggestions'),
@@ -92,6 +99,8 @@ urlpatterns = [
     path('comments/thread/<int:thread_id>/date/', forum_comments.get_comments_for_thread_by_date, name='get_comments_for_thread_date'),
     path('comments/thread/<int:thread_id>/likes/', forum_comments.get_comments_for_thread_by_likes, name='get_comments_for_thread_likes'),
     path('comments/thread/<int:thread_id>/', forum_comments.get_comments_for_thread_by_date, name='get_comments_for_thread'),
+    path('comments/thread/<int:thread_id>/tree/', forum_comments.get_comment_tree, name='get_comment_tree'),
+    path('comments/<int:comment_id>/replies/', forum_comments.get_comment_replies, name='get_comment_replies'),
 
     # SubComment endpoints by comment
     path('subcomments/comment/<int:comment_id>/date/', forum_comments.get_subcomments_for_comment_by_date, name='get_subcomments_by_comment_date'),
@@ -109,6 +118,9 @@ urlpatterns = [
     path('forum/vote/<str:content_type>/<int:object_id>/', forum_vote.delete_vote, name='delete_vote'),
     path('forum/vote/<str:content_type>/<int:object_id>/status/', forum_vote.get_user_vote, name='get_user_vote'),
 
+    # Full-text search over threads, comments, subcomments and challenges
+    path('search/', search.search_content, name='search_content'),
+
     # Local time
     path('localtime/<str:lat>/<str:lon>', local_hour.get_local_hour, name='get_local_hour'),
 
@@ -124,9 +136,13 @@ urlpatterns = [
     path('challenges/<int:challenge_id>/join/', challenges.join_challenge, name='join_challenge'),
     path('challenges/<int:challenge_id>/leave/', challenges.leave_challenge, name='leave_challenge'),
     path('challenges/<int:challenge_id>/update-progress/', challenges.update_progress, name='update_progress'),
+    path('challenges/<int:challenge_id>/progress/history/', challenges.challenge_progress_history, name='challenge_progress_history'),
+    # Progress for many challenges and goals at once
+    path('progress/batch/', progress.submit_progress_batch, name='submit_progress_batch'),
 
     # Leaderboard
     path('challenges/<int:challenge_id>/leaderboard/', challenges.challenge_leaderboard, name='challenge_leaderboard'),
+    path('challenges/<int:challenge_id>/leaderboard/me/', challenges.my_leaderboard_position, name='my_leaderboard_position'),
 
     # Challenge search
     path('challenges/search/', challenges.search_challenges, name='search-challenges'),
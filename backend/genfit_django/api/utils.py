@@ -1,10 +1,33 @@
-from django.core.mail import send_mail
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.mail import send_mail, get_connection, EmailMessage
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from .models import Notification
-import requests
+from django.db import transaction, connections
+from .models import Notification, Comment, Subcomment
+from chat.consumers import notification_group_name
+from .geocoding import geocode_location
 
-def create_notification(recipient, notification_type, title, message, sender=None, related_object_id=None, related_object_type=None, send_email=False):
+logger = logging.getLogger(__name__)
+
+FORUM_LIST_CACHE_KEY = 'forum_list'
+
+
+def invalidate_forum_list_cache():
+    """
+    Drop the cached forums listing now and again once the surrounding transaction commits,
+    in case another request re-cached the old rows in between.
+    """
+    cache.delete(FORUM_LIST_CACHE_KEY)
+    transaction.on_commit(lambda: cache.delete(FORUM_LIST_CACHE_KEY))
+
+# Emails for bulk notifications are sent off the request thread
+_email_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='notification-email')
+
+def create_notification(recipient, notification_type, title, message, sender=None, related_object_id=None, related_object_type=None, send_email=False, target_thread_id=None):
     # Validate notification type
     if notification_type not in dict(Notification.NOTIFICATION_TYPES):
         raise ValidationError(f"Invalid notification type: {notification_type}")
@@ -17,7 +40,8 @@ def create_notification(recipient, notification_type, title, message, sender=Non
             title=title,
             message=message,
             related_object_id=related_object_id,
-            related_object_type=related_object_type
+            related_object_type=related_object_type,
+            target_thread_id=target_thread_id
         )
 
         if send_email:
@@ -31,32 +55,183 @@ def create_notification(recipient, notification_type, title, message, sender=Non
                 )
                 notification.is_email_sent = True
                 notification.save()
-            except Exception as e:
-                print("Failed to send email:", str(e))
+            except Exception:
+                logger.exception("Failed to send notification email to user %s", recipient.pk)
 
         return notification
 
-    except Exception as e:
-        print("Failed to create notification:", str(e))
+    except Exception:
+        logger.exception("Failed to create notification for user %s", recipient.pk)
 
 
+def dispatch_notifications(notifications, send_email=False, defer_email=True):
+    """
+    Write a batch of unsaved Notification instances with bulk_create in one transaction.
+    If send_email is set, emails are sent once the transaction commits, on a background
+    worker unless defer_email is False.
+    """
+    notifications = list(notifications)
+    if not notifications:
+        return []
 
-def geocode_location(query):
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {
-        "q": query,
-        "format": "json",
-        "limit": 1,
-    }
-    headers = {
-        "User-Agent": "ChallengeApp/1.0 (a.akdogan101@gmail.com)"
+    valid_types = dict(Notification.NOTIFICATION_TYPES)
+    for notification in notifications:
+        if notification.notification_type not in valid_types:
+            raise ValidationError(f"Invalid notification type: {notification.notification_type}")
+
+    with transaction.atomic():
+        created = Notification.objects.bulk_create(notifications, batch_size=500)
+        # bulk_create skips post_save, so push explicitly
+        push_notifications(created)
+        if send_email:
+            notification_ids = [notification.id for notification in created]
+            if defer_email:
+                transaction.on_commit(lambda: _email_executor.submit(_send_notification_emails_in_worker, notification_ids))
+            else:
+                transaction.on_commit(lambda: send_notification_emails(notification_ids))
+    return created
+
+
+def create_notifications(recipients, notification_type, title, message, sender=None, related_object_id=None, related_object_type=None, send_email=False, target_thread_id=None, defer_email=True):
+    """
+    Fan the same notification out to many recipients (users or user ids) with a handful of statements.
+    """
+    recipient_ids = {getattr(recipient, 'pk', recipient) for recipient in recipients}
+    notifications = [
+        Notification(
+            recipient_id=recipient_id,
+            sender=sender,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            related_object_id=related_object_id,
+            related_object_type=related_object_type,
+            target_thread_id=target_thread_id
+        )
+        for recipient_id in recipient_ids
+    ]
+    return dispatch_notifications(notifications, send_email=send_email, defer_email=defer_email)
+
+
+def notification_push_payload(notification):
+    """Compact representation of a notification sent over ws/notifications/."""
+    payload = {
+        'id': notification.id,
+        'notification_type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'related_object_id': notification.related_object_id,
+        'related_object_type': notification.related_object_type,
+        'target_thread_id': notification.target_thread_id,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
     }
+    # Only include the sender name when it is already loaded, never query for it
+    if Notification.sender.is_cached(notification) and notification.sender is not None:
+        payload['sender_username'] = notification.sender.username
+    return payload
+
+
+def push_notifications(notifications):
+    """
+    Push notifications to their recipients' WebSocket group once the current transaction commits.
+    """
+    messages = [
+        (notification_group_name(notification.recipient_id), notification_push_payload(notification))
+        for notification in notifications
+    ]
+    if messages:
+        transaction.on_commit(lambda: _send_to_channel_layer(messages))
+
+
+def _send_to_channel_layer(messages):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for group_name, payload in messages:
+        try:
+            async_to_sync(channel_layer.group_send)(
+                group_name,
+                {'type': 'notification_message', 'notification': payload}
+            )
+        except Exception as e:
+            logger.error(f"Failed to push notification to {group_name}: {str(e)}")
+
+
+def send_notification_emails(notification_ids):
+    """Email the given notifications over one SMTP connection and flag the ones that went out."""
+    notifications = Notification.objects.filter(id__in=notification_ids, is_email_sent=False).select_related('recipient')
+    sent_ids = []
+    try:
+        with get_connection(fail_silently=False) as connection:
+            for notification in notifications:
+                if not notification.recipient.email:
+                    continue
+                try:
+                    EmailMessage(
+                        subject=notification.title,
+                        body=notification.message,
+                        from_email=settings.DEFAULT_FROM_EMAIL,
+                        to=[notification.recipient.email],
+                        connection=connection,
+                    ).send()
+                    sent_ids.append(notification.id)
+                except Exception:
+                    logger.exception("Failed to send email for notification %s", notification.id)
+    except Exception:
+        logger.exception("Failed to open email connection")
 
+    if sent_ids:
+        Notification.objects.filter(id__in=sent_ids).update(is_email_sent=True)
+    return sent_ids
+
+
+def _send_notification_emails_in_worker(notification_ids):
     try:
-        response = requests.get(url, params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        if data:
-            return float(data[0]["lat"]), float(data[0]["lon"])
-    except:
-        return None, None
+        send_notification_emails(notification_ids)
+    finally:
+        # The worker thread owns its own connection; don't leave it open between jobs
+        connections.close_all()
+
+
+def resolve_target_thread_ids(notifications):
+    """
+    Map notification id -> thread id for a batch of notifications.
+    Rows that already carry target_thread_id are used as-is; the rest are resolved
+    with at most one query per related content type instead of one or two per notification.
+    """
+    comment_ids = set()
+    subcomment_ids = set()
+    for notification in notifications:
+        if notification.target_thread_id is not None or not notification.related_object_id:
+            continue
+        if notification.related_object_type == 'Comment':
+            comment_ids.add(notification.related_object_id)
+        elif notification.related_object_type == 'Subcomment':
+            subcomment_ids.add(notification.related_object_id)
+
+    comment_threads = {}
+    if comment_ids:
+        comment_threads = dict(
+            Comment.objects.filter(id__in=comment_ids).values_list('id', 'thread_id')
+        )
+    subcomment_threads = {}
+    if subcomment_ids:
+        subcomment_threads = dict(
+            Subcomment.objects.filter(id__in=subcomment_ids).values_list('id', 'comment__thread_id')
+        )
+
+    thread_ids = {}
+    for notification in notifications:
+        if notification.target_thread_id is not None:
+            thread_ids[notification.id] = notification.target_thread_id
+        elif not notification.related_object_id:
+            thread_ids[notification.id] = None
+        elif notification.related_object_type == 'Thread':
+            thread_ids[notification.id] = notification.related_object_id
+        elif notification.related_object_type == 'Comment':
+            thread_ids[notification.id] = comment_threads.get(notification.related_object_id)
+        elif notification.related_object_type == 'Subcomment':
+            thread_ids[notification.id] = subcomment_threads.get(notification.related_object_id)
+        else:
+            thread_ids[notification.id] = None
+    return thread_ids
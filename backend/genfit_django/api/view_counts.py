@@ -0,0 +1,112 @@
+"""
+Write-behind thread view counting.
+
+With a Redis cache, views are accumulated in one Redis hash (thread id -> pending views) and written
+to Thread.view_count in bulk by `python manage.py flush_thread_views`, so reading a thread never writes
+to the Thread row. The hash only holds threads viewed since the last flush, so a flush costs the same
+however many threads exist.
+
+Other caches can't buffer: a per-process cache is invisible to the flush command, and the database
+and file caches don't increment atomically across processes. There each view is written through
+with a single `view_count + 1` UPDATE.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import Thread
+from .shared_cache import redis_client, redis_key
+
+VIEWS_KEY = 'thread_views'
+FLUSHING_KEY = 'thread_views:flushing'
+FLUSH_LOCK_KEY = 'thread_views:flush_lock'
+FLUSH_LOCK_SECONDS = 600
+
+
+def _seen_key(thread_id, viewer_key):
+    return f'thread_viewed:{thread_id}:{viewer_key}'
+
+
+def viewer_key(request):
+    """Identify who is viewing for deduplication: the user, else the session, else nobody."""
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    session = getattr(request, 'session', None)
+    if session is not None and session.session_key:
+        return f'session:{session.session_key}'
+    return None
+
+
+def record_thread_view(thread_id, viewer_key=None):
+    """
+    Count one view of a thread and return how many views a Thread row read before the call is missing:
+    the views still waiting to be flushed, including this one.
+    A viewer (session or user) is only counted once per THREAD_VIEW_DEDUP_SECONDS.
+    """
+    dedup_seconds = getattr(settings, 'THREAD_VIEW_DEDUP_SECONDS', 0)
+    if viewer_key and dedup_seconds:
+        if not cache.add(_seen_key(thread_id, viewer_key), 1, timeout=dedup_seconds):
+            return pending_thread_views(thread_id)
+
+    client = redis_client()
+    if client is None:
+        Thread.objects.filter(pk=thread_id).update(view_count=F('view_count') + 1)
+        return 1
+    return client.hincrby(redis_key(VIEWS_KEY), thread_id, 1)
+
+
+def pending_thread_views(thread_id):
+    client = redis_client()
+    if client is None:
+        return 0
+    return int(client.hget(redis_key(VIEWS_KEY), thread_id) or 0)
+
+
+def flush_thread_views(batch_size=1000):
+    """
+    Move buffered views into Thread.view_count. Returns the number of views written.
+    Threads with the same number of pending views are updated together, one UPDATE per distinct count.
+    """
+    client = redis_client()
+    if client is None:
+        return 0  # Views were written through
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_SECONDS):
+        return 0  # Another flush is running
+
+    try:
+        flushing = redis_key(FLUSHING_KEY)
+        # Views recorded from now on go to a new hash. A flush that stopped midway left its hash
+        # behind, with the threads it already wrote removed; that one is finished first.
+        if not client.exists(flushing):
+            if not client.exists(redis_key(VIEWS_KEY)):
+                return 0
+            client.rename(redis_key(VIEWS_KEY), flushing)
+
+        total = 0
+        batch = []
+        for thread_id, count in client.hscan_iter(flushing, count=batch_size):
+            batch.append((int(thread_id), int(count)))
+            if len(batch) >= batch_size:
+                total += _flush_batch(client, flushing, batch)
+                batch = []
+        if batch:
+            total += _flush_batch(client, flushing, batch)
+        client.delete(flushing)
+        return total
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+def _flush_batch(client, flushing, pending):
+    by_count = defaultdict(list)
+    for thread_id, count in pending:
+        by_count[count].append(thread_id)
+
+    total = 0
+    for count, ids in by_count.items():
+        Thread.objects.filter(id__in=ids).update(view_count=F('view_count') + count)
+        total += count * len(ids)
+    client.hdel(flushing, *(thread_id for thread_id, _ in pending))
+    return total
@@ -0,0 +1,47 @@
+"""
+The requesting user's own state on forum content (their vote, whether they bookmarked a thread),
+annotated onto list querysets so a page carries it without one status lookup per item.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Exists, OuterRef, Subquery
+
+from .models import Thread, ThreadBookmark, Vote
+
+
+def with_viewer_state(queryset, user):
+    """
+    Annotate `viewer_vote` ('UPVOTE', 'DOWNVOTE' or None) and, for threads, `viewer_bookmarked`.
+    Anonymous users get the queryset back unchanged; serializers treat that as no vote and no bookmark.
+    """
+    if user is None or not user.is_authenticated:
+        return queryset
+
+    content_type = ContentType.objects.get_for_model(queryset.model)
+    votes = Vote.objects.filter(user=user, content_type=content_type, object_id=OuterRef('pk'))
+    queryset = queryset.annotate(viewer_vote=Subquery(votes.values('vote_type')[:1]))
+
+    if queryset.model is Thread:
+        bookmarks = ThreadBookmark.objects.filter(user=user, thread=OuterRef('pk'))
+        queryset = queryset.annotate(viewer_bookmarked=Exists(bookmarks))
+    return queryset
+
+
+def viewer_vote(obj, request):
+    """The requesting user's vote on obj, from the annotation when present."""
+    if hasattr(obj, 'viewer_vote'):
+        return obj.viewer_vote
+    if request is None or not request.user.is_authenticated:
+        return None
+    content_type = ContentType.objects.get_for_model(obj)
+    return Vote.objects.filter(
+        user=request.user, content_type=content_type, object_id=obj.pk
+    ).values_list('vote_type', flat=True).first()
+
+
+def viewer_bookmarked(thread, request):
+    """Whether the requesting user bookmarked thread, from the annotation when present."""
+    if hasattr(thread, 'viewer_bookmarked'):
+        return thread.viewer_bookmarked
+    if request is None or not request.user.is_authenticated:
+        return False
+    return ThreadBookmark.objects.filter(user=request.user, thread=thread).exists()
@@ -1,8 +1,9 @@
 from django.contrib.auth import login, logout, get_user_model
 from rest_framework import status, viewsets, permissions
-from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.decorators import api_view, permission_classes, throttle_classes, action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.throttling import SimpleRateThrottle
 from django.core.mail import send_mail
 from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
@@ -24,6 +25,12 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.shortcuts import get_object_or_404
+from .pagination import NotificationCursorPagination
+from .utils import resolve_target_thread_ids
+from .purge import purge_forum_content, remove_user_votes
+from .availability import is_username_available, is_email_available
+from .login_days import login_calendar, login_days_between
+from django.utils import timezone
 
 
 User = get_user_model()
@@ -72,6 +79,34 @@ def register(request):
         }, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class AvailabilityThrottle(SimpleRateThrottle):
+    """Per client IP, signed in or not, so the check can't be used to enumerate accounts."""
+    scope = 'availability'
+    rate = '20/minute'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+@throttle_classes([AvailabilityThrottle])
+def check_availability(request):
+    """
+    Report whether a username and/or email is still free, e.g. ?username=jane1&email=jane@example.com.
+    Only the fields given are checked and returned.
+    """
+    username = request.query_params.get('username', '').strip()
+    email = request.query_params.get('email', '').strip()
+    if not username and not email:
+        return Response({'error': 'Provide a username or an email'}, status=status.HTTP_400_BAD_REQUEST)
+
+    result = {}
+    if username:
+        result['username'] = {'value': username, 'available': is_username_available(username)}
+    if email:
+        result['email'] = {'value': email, 'available': is_email_available(email)}
+    return Response(result)
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def verify_email(request, uidb64, token):
@@ -161,31 +196,12 @@ def rtbf_delete_user_data(request):
         MentorMenteeRelationship.objects.filter(mentee=user).delete()
         FitnessGoal.objects.filter(user=user).delete()
         FitnessGoal.objects.filter(mentor=user).delete()
-        Vote.objects.filter(user=user).delete()
-        thread_ct = ContentType.objects.get_for_model(Thread)
-        comment_ct = ContentType.objects.get_for_model(Comment)
-        subcomment_ct = ContentType.objects.get_for_model(Subcomment)
-        threads = list(Thread.objects.filter(author=user).values_list('id', flat=True))
-        if threads:
-            Vote.objects.filter(content_type=thread_ct, object_id__in=threads).delete()
-            comment_ids = list(Comment.objects.filter(thread_id__in=threads).values_list('id', flat=True))
-            if comment_ids:
-                Vote.objects.filter(content_type=comment_ct, object_id__in=comment_ids).delete()
-                sub_ids = list(Subcomment.objects.filter(comment_id__in=comment_ids).values_list('id', flat=True))
-                if sub_ids:
-                    Vote.objects.filter(content_type=subcomment_ct, object_id__in=sub_ids).delete()
-                Subcomment.objects.filter(comment_id__in=comment_ids).delete()
-            Comment.objects.filter(thread_id__in=threads).delete()
-            Thread.objects.filter(id__in=threads).delete()
-        user_comment_ids = list(Comment.objects.filter(author=user).values_list('id', flat=True))
-        if user_comment_ids:
-            Vote.objects.filter(content_type=comment_ct, object_id__in=user_comment_ids).delete()
-            Subcomment.objects.filter(comment_id__in=user_comment_ids).delete()
-            Comment.objects.filter(id__in=user_comment_ids).delete()
-        user_sub_ids = list(Subcomment.objects.filter(author=user).values_list('id', flat=True))
-        if user_sub_ids:
-            Vote.objects.filter(content_type=subcomment_ct, object_id__in=user_sub_ids).delete()
-            Subcomment.objects.filter(id__in=user_sub_ids).delete()
+        remove_user_votes(user)
+        purge_forum_content(
+            thread_ids=Thread.objects.filter(author=user).values_list('id', flat=True),
+            comment_ids=Comment.objects.filter(author=user).values_list('id', flat=True),
+            subcomment_ids=Subcomment.objects.filter(author=user).values_list('id', flat=True),
+        )
         DirectMessage.objects.filter(sender=user).delete()
         DirectChat.objects.filter(participants__id=user.id).delete()
         UserAiMessage.objects.filter(user=user).delete()
@@ -204,11 +220,38 @@ def rtbf_delete_user_data(request):
 # Get all notifications for a single user
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
-def get_user_notifications(request):      
-    notifications = Notification.objects.filter(recipient=request.user)
-    serializer = NotificationSerializer(notifications, many=True)
+def get_user_notifications(request):
+    notifications = list(
+        Notification.objects.filter(recipient=request.user).select_related('sender', 'recipient')
+    )
+    serializer = NotificationSerializer(
+        notifications,
+        many=True,
+        context={'target_thread_ids': resolve_target_thread_ids(notifications)}
+    )
     return Response(serializer.data)
 
+# Cursor-paginated notification feed, newest first
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_notification_feed(request):
+    notifications = Notification.objects.filter(recipient=request.user).select_related('sender', 'recipient')
+    paginator = NotificationCursorPagination()
+    page = paginator.paginate_queryset(notifications, request)
+    serializer = NotificationSerializer(
+        page,
+        many=True,
+        context={'target_thread_ids': resolve_target_thread_ids(page)}
+    )
+    return paginator.get_paginated_response(serializer.data)
+
+# Number of unread notifications, answered from the (recipient, is_read, created_at) index
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_unread_notification_count(request):
+    unread_count = Notification.objects.filter(recipient=request.user, is_read=False).count()
+    return Response({'unread_count': unread_count})
+
 # Get a single notification
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -268,10 +311,10 @@ def get_user(request):
 @permission_classes([IsAuthenticated])
 def get_login_stats(request):
     """Get detailed login statistics for the authenticated user"""
-    from datetime import date, timedelta
+    from datetime import timedelta
     
     user = request.user
-    today = date.today()
+    today = timezone.localdate()
     
     # Calculate if streak is still active (logged in today or yesterday)
     streak_active = False
@@ -286,21 +329,11 @@ def get_login_stats(request):
     elif streak_active and user.last_login_date == (today - timedelta(days=1)):
         days_until_break = 0  # Will break today if not logged in
     
-    # Get login calendar data for the last 90 days
-    login_calendar = []
-    if user.last_login_date:
-        # For now, we'll return the last login date and streak info
-        # In a more advanced implementation, you'd track each login date
-        start_date = max(user.last_login_date - timedelta(days=user.current_streak - 1), 
-                        today - timedelta(days=90))
-        
-        current_date = start_date
-        while current_date <= min(user.last_login_date, today):
-            login_calendar.append({
-                'date': current_date.isoformat(),
-                'logged_in': True
-            })
-            current_date += timedelta(days=1)
+    # Days logged in during the last 90 days, from the login day records
+    login_calendar = [
+        {'date': day.isoformat(), 'logged_in': True}
+        for day in login_days_between(user.id, today - timedelta(days=90), today)
+    ]
     
     response_data = {
         'current_streak': user.current_streak,
@@ -316,6 +349,19 @@ def get_login_stats(request):
     return Response(response_data)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_login_calendar(request):
+    """Days logged in per month for the last `months` months (default 3, at most 24), oldest first"""
+    try:
+        months = int(request.query_params.get('months', 3))
+    except ValueError:
+        months = 0
+    if not 1 <= months <= 24:
+        return Response({'error': 'months must be an integer from 1 to 24'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'months': login_calendar(request.user.id, months)})
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_users(request):
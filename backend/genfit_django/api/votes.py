@@ -0,0 +1,132 @@
+"""
+Voting on threads, comments and subcomments.
+
+The vote endpoints, VoteSerializer and Vote.create_or_update_vote all go through cast_vote /
+remove_vote, which never resolve Vote.content_object: content type ids are cached per process,
+the target is loaded once together with the parent the notification needs, the vote
+row is locked or created with one get_or_create, and like_count moves with a single UPDATE.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+
+from .counters import adjust_counter, like_count_delta
+from .models import Thread, Comment, Subcomment, Vote, Notification
+
+VOTE_TARGETS = {
+    'thread': Thread,
+    'comment': Comment,
+    'subcomment': Subcomment,
+}
+
+# Parents the upvote notification reads, fetched together with the target (the author is only needed by id)
+_TARGET_RELATED = {
+    Thread: (),
+    Comment: ('thread',),
+    Subcomment: ('comment',),
+}
+
+
+def vote_target_model(kind):
+    """Model for a content type name as used by the API ('THREAD', 'comment', ...), or None."""
+    return VOTE_TARGETS.get(str(kind).lower())
+
+
+def content_type_id(model):
+    """
+    ContentType id of a votable model. ContentTypeManager keeps these in a per-process cache
+    (cleared with the table, e.g. between test flushes), so only the first call queries.
+    """
+    return ContentType.objects.get_for_model(model).id
+
+
+def get_vote_target(model, object_id):
+    """The target with everything the vote notification needs, in one query. Raises model.DoesNotExist."""
+    return model.objects.select_related(*_TARGET_RELATED[model]).get(pk=object_id)
+
+
+def cast_vote(user, target, vote_type):
+    """
+    Create the user's vote on target or change its type, keeping target.like_count in step.
+    Notifies the target's author when the vote becomes an upvote. Returns the Vote.
+    """
+    model = type(target)
+    ct_id = content_type_id(model)
+    lookup = {'user': user, 'content_type_id': ct_id, 'object_id': target.pk}
+
+    with transaction.atomic():
+        # If the same user's first vote is being written concurrently, the INSERT fails on the unique
+        # (user, content_type, object_id) index, and theirs is locked and treated as the previous vote
+        vote, created = Vote.objects.select_for_update().get_or_create(defaults={'vote_type': vote_type}, **lookup)
+        previous_type = None if created else vote.vote_type
+
+        vote.user = user  # spares VoteSerializer a user lookup
+        if vote.vote_type != vote_type:
+            vote.vote_type = vote_type
+            vote.updated_at = timezone.now()
+            # update() rather than save(): the post_save notification is sent below, once
+            Vote.objects.filter(pk=vote.pk).update(vote_type=vote_type, updated_at=vote.updated_at)
+        elif previous_type is not None:
+            return vote
+
+        adjust_counter(model, target.pk, 'like_count', like_count_delta(previous_type, vote_type))
+        if vote_type == 'UPVOTE':
+            notify_upvote(user, target)
+    return vote
+
+
+def remove_vote(user, model, object_id):
+    """Delete the user's vote on a target, taking back its like. Returns False if there was no vote."""
+    lookup = {'user': user, 'content_type_id': content_type_id(model), 'object_id': object_id}
+    with transaction.atomic():
+        vote_type = Vote.objects.select_for_update().filter(**lookup).values_list('vote_type', flat=True).first()
+        if vote_type is None:
+            return False
+        Vote.objects.filter(**lookup).delete()
+        adjust_counter(model, object_id, 'like_count', like_count_delta(vote_type, None))
+    return True
+
+
+def upvote_notification(voter, target):
+    """
+    The unsaved LIKE notification for voter upvoting target, or None for own content.
+    Reads only target.author_id and the parent loaded by get_vote_target.
+    """
+    if target.author_id == voter.id:
+        return None
+
+    if isinstance(target, Thread):
+        title = "New upvote on your thread"
+        message = f"{voter.username} upvoted your thread: {target.title}"
+        related_object_type = 'Thread'
+        target_thread_id = target.id
+    elif isinstance(target, Comment):
+        title = "New upvote on your comment"
+        message = f"{voter.username} upvoted your comment on thread: {target.thread.title}"
+        related_object_type = 'Comment'
+        target_thread_id = target.thread_id
+    elif isinstance(target, Subcomment):
+        title = "New upvote on your reply"
+        message = f"{voter.username} upvoted your reply to a comment"
+        related_object_type = 'Subcomment'
+        target_thread_id = target.comment.thread_id
+    else:
+        return None
+
+    return Notification(
+        recipient_id=target.author_id,
+        sender=voter,
+        notification_type='LIKE',
+        title=title,
+        message=message,
+        related_object_id=target.id,
+        related_object_type=related_object_type,
+        target_thread_id=target_thread_id,
+    )
+
+
+def notify_upvote(voter, target):
+    notification = upvote_notification(voter, target)
+    if notification is not None:
+        notification.save()
+    return notification
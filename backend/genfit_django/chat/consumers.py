@@ -121,4 +121,64 @@ class DirectChatConsumer(WebsocketConsumer):
                 self.channel_name
             )
         except Exception as e:
-            logger.error(f"Error disconnecting from chat: {str(e)}")
\ No newline at end of file
+            logger.error(f"Error disconnecting from chat: {str(e)}")
+
+def notification_group_name(user_id):
+    return f'notifications_{user_id}'
+
+
+class NotificationConsumer(WebsocketConsumer):
+    """
+    Pushes new notifications to the connected user so clients don't have to poll notifications/.
+    """
+    def connect(self):
+        self.user = self.scope['user']
+
+        # Check if user is authenticated
+        if not self.user.is_authenticated:
+            logger.error("Unauthenticated user tried to connect to notifications")
+            self.close()
+            return
+
+        self.notification_group_name = notification_group_name(self.user.id)
+
+        # Join the per-user group
+        try:
+            async_to_sync(self.channel_layer.group_add)(
+                self.notification_group_name,
+                self.channel_name
+            )
+            self.accept()
+        except Exception as e:
+            logger.error(f"Error joining notification group: {str(e)}")
+            self.close()
+            return
+
+        # Send the current unread count once so the client can render its badge without polling
+        try:
+            from api.models import Notification
+            unread_count = Notification.objects.filter(recipient=self.user, is_read=False).count()
+            self.send(text_data=json.dumps({'unread_count': unread_count}))
+        except Exception as e:
+            logger.error(f"Error loading unread notification count: {str(e)}")
+
+    def notification_message(self, event):
+        # Send notification to WebSocket
+        try:
+            self.send(text_data=json.dumps({
+                'notification': event['notification']
+            }))
+        except Exception as e:
+            logger.error(f"Error sending notification to client: {str(e)}")
+
+    def disconnect(self, close_code):
+        # Leave group (connect may have closed before joining)
+        if not hasattr(self, 'notification_group_name'):
+            return
+        try:
+            async_to_sync(self.channel_layer.group_discard)(
+                self.notification_group_name,
+                self.channel_name
+            )
+        except Exception as e:
+            logger.error(f"Error disconnecting from notifications: {str(e)}")
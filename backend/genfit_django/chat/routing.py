@@ -1,6 +1,7 @@
 from django.urls import path
-from .consumers import DirectChatConsumer
+from .consumers import DirectChatConsumer, NotificationConsumer
 
 websocket_urlpatterns = [
     path('ws/chat/<int:chat_id>/', DirectChatConsumer.as_asgi()),
-]
\ No newline at end of file
+    path('ws/notifications/', NotificationConsumer.as_asgi()),
+]
@@ -1,3 +1,76 @@
-from django.test import TestCase
+import json
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase, TransactionTestCase
+from api.models import UserWithType, Forum, Thread, Comment, Notification
+from .consumers import NotificationConsumer, notification_group_name
 
-# Create your tests here.
+
+class NotificationPushTests(TestCase):
+    def setUp(self):
+        self.owner = UserWithType.objects.create_user(
+            username='owner', email='owner@example.com', password='pass', user_type='User'
+        )
+        self.commenter = UserWithType.objects.create_user(
+            username='commenter', email='commenter@example.com', password='pass', user_type='User'
+        )
+        forum = Forum.objects.create(title='Test Forum', created_by=self.owner)
+        self.thread = Thread.objects.create(forum=forum, title='Test Thread', content='Content', author=self.owner)
+
+        self.channel_layer = get_channel_layer()
+        self.channel_name = async_to_sync(self.channel_layer.new_channel)()
+        async_to_sync(self.channel_layer.group_add)(notification_group_name(self.owner.id), self.channel_name)
+
+    def tearDown(self):
+        async_to_sync(self.channel_layer.group_discard)(notification_group_name(self.owner.id), self.channel_name)
+
+    def test_new_notification_is_pushed_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(thread=self.thread, author=self.commenter, content='Nice thread!')
+
+        event = async_to_sync(self.channel_layer.receive)(self.channel_name)
+        notification = Notification.objects.get(recipient=self.owner)
+        self.assertEqual(event['type'], 'notification_message')
+        self.assertEqual(event['notification']['id'], notification.id)
+        self.assertEqual(event['notification']['notification_type'], 'COMMENT')
+        self.assertEqual(event['notification']['target_thread_id'], self.thread.id)
+        self.assertEqual(event['notification']['sender_username'], 'commenter')
+
+    def test_nothing_is_pushed_before_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Comment.objects.create(thread=self.thread, author=self.commenter, content='Nice thread!')
+        self.assertEqual(len(callbacks), 1)
+
+
+class NotificationConsumerTests(TransactionTestCase):
+    # Consumers close the database connection between events, which TestCase's wrapping transaction can't survive
+    def setUp(self):
+        self.user = UserWithType.objects.create_user(
+            username='user', email='user@example.com', password='pass', user_type='User'
+        )
+        Notification.objects.create(recipient=self.user, notification_type='SYSTEM', title='Hi', message='Welcome')
+
+    async def _connect(self, user):
+        communicator = WebsocketCommunicator(NotificationConsumer.as_asgi(), '/ws/notifications/')
+        communicator.scope['user'] = user
+        connected, _ = await communicator.connect()
+        return communicator, connected
+
+    async def test_authenticated_user_receives_unread_count_and_pushes(self):
+        communicator, connected = await self._connect(self.user)
+        self.assertTrue(connected)
+        self.assertEqual(json.loads(await communicator.receive_from()), {'unread_count': 1})
+
+        await get_channel_layer().group_send(
+            notification_group_name(self.user.id),
+            {'type': 'notification_message', 'notification': {'id': 42, 'title': 'New'}}
+        )
+        message = json.loads(await communicator.receive_from())
+        self.assertEqual(message['notification']['id'], 42)
+        await communicator.disconnect()
+
+    async def test_anonymous_user_is_rejected(self):
+        communicator, connected = await self._connect(AnonymousUser())
+        self.assertFalse(connected)
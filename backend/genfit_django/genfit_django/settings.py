@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -79,6 +80,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'django_extensions',
     'corsheaders',
@@ -221,14 +223,72 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache shared by the worker processes: sessions, rate limits, leaderboards, view counters and the other caches.
+# CACHE_URL picks the backend:
+#   redis://host:6379/0            Redis, for production (needs the `redis` package)
+#   db                             the table created by `python manage.py createcachetable`
+#   file:///var/tmp/genfit_cache   a directory, for processes on one machine
+#   unset                          each process's own memory, for development and tests
+# Keys are prefixed with CACHE_KEY_PREFIX, so environments can share a Redis. Bumping CACHE_VERSION
+# drops everything cached at once, e.g. when a deploy changes the shape of cached values.
+CACHE_URL = os.environ.get('CACHE_URL', '')
+CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'genfit')
+CACHE_VERSION = int(os.environ.get('CACHE_VERSION', 1))
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    _cache = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}
+elif CACHE_URL == 'db':
+    _cache = {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'genfit_cache'}
+elif CACHE_URL.startswith('file://'):
+    _cache = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_URL[len('file://'):]}
+elif not CACHE_URL:
+    _cache = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+else:
+    raise ImproperlyConfigured(f'Unsupported CACHE_URL: {CACHE_URL}')
+CACHES = {
+    'default': {**_cache, 'KEY_PREFIX': CACHE_KEY_PREFIX, 'VERSION': CACHE_VERSION},
+}
+
 # Session Settings
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# With a shared cache, sessions are read from it and written through to the database. A per-process
+# cache could keep serving a session another process logged out, so without one they stay in the database.
+# Expired sessions are removed by `python manage.py clear_expired`.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db' if CACHE_URL else 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 1209600  # 2 weeks in seconds
 SESSION_COOKIE_SECURE = not DEBUG  # Only send cookie over HTTPS in production
 SESSION_COOKIE_HTTPONLY = False  # Allow JavaScript access to session cookie for mobile app
 SESSION_COOKIE_SAMESITE = 'Lax'  # CSRF protection
 CSRF_COOKIE_SECURE = not DEBUG  # Only send CSRF cookie over HTTPS in production
 
+# With a Redis cache, thread views are buffered and written by `manage.py flush_thread_views`;
+# otherwise each view is written to the database directly.
+# A session or user is counted once per this many seconds (0 counts every request).
+THREAD_VIEW_DEDUP_SECONDS = int(os.environ.get('THREAD_VIEW_DEDUP_SECONDS', 1800))
+
+# The forums listing is cached and dropped whenever a forum or thread is created, changed or deleted.
+# The timeout bounds how stale latest_activity can get from comment activity alone.
+FORUM_LIST_CACHE_SECONDS = int(os.environ.get('FORUM_LIST_CACHE_SECONDS', 60))
+
+# With a Redis cache, username/email availability checks are answered from Bloom filters kept there and
+# built by `manage.py build_availability_filter`. Sized for this many users; past it false positives,
+# each costing one index probe, become more frequent.
+USERNAME_AVAILABILITY_CAPACITY = int(os.environ.get('USERNAME_AVAILABILITY_CAPACITY', 1000000))
+
+# With a Redis cache, challenge leaderboards are kept sorted there and updated as participants progress.
+# Boards untouched for this long are dropped and rebuilt from the database on the next read.
+LEADERBOARD_CACHE_SECONDS = int(os.environ.get('LEADERBOARD_CACHE_SECONDS', 3600))
+
+# Challenge locations are geocoded from an optional offline GeoNames cities file first, then a
+# database cache, then Nominatim (in the background for searches). "Not found" answers are cached for
+# GEOCODING_NEGATIVE_TTL_SECONDS.
+GEOCODING_GAZETTEER_PATH = os.environ.get('GEOCODING_GAZETTEER_PATH')
+GEOCODING_TIMEOUT_SECONDS = float(os.environ.get('GEOCODING_TIMEOUT_SECONDS', 3))
+GEOCODING_NEGATIVE_TTL_SECONDS = int(os.environ.get('GEOCODING_NEGATIVE_TTL_SECONDS', 86400))
+GEOCODING_LRU_SIZE = int(os.environ.get('GEOCODING_LRU_SIZE', 1024))
+
+# Progress idempotency keys are kept this long, so retries within it are recognized; older ones are
+# removed by `python manage.py clear_expired`.
+PROGRESS_IDEMPOTENCY_KEY_DAYS = int(os.environ.get('PROGRESS_IDEMPOTENCY_KEY_DAYS', 7))
+
 # Security settings for HTTPS
 if not DEBUG:
     SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')